@@ -0,0 +1,73 @@
+"""
+De-jitter an RTP stream and forward it to a local viewer.
+
+Receives the vehicle's RTP stream, reorders it and releases packets on a smooth schedule
+through a jitter buffer, then forwards them to another port. Point gstreamer_viewer.py or an
+OpenCV .sdp file at the forwarding port. Works for both the jpeg and h264 streams.
+
+Raising --latency trades lag for fewer stutters. With --adaptive the latency is adjusted
+automatically from the measured network jitter, between --min-latency and --max-latency.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+import argparse
+import socket
+import time
+
+from skydio.streaming.jitter_buffer import JitterBuffer
+from skydio.streaming.receiver import RtpReceiver
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--local-port', type=int, default=55004,
+                        help='local port from which to listen for RTP packets')
+    parser.add_argument('--remote-port', type=int, default=55005,
+                        help='port to forward de-jittered packets to')
+    parser.add_argument('--remote-host', default='127.0.0.1',
+                        help='host to forward de-jittered packets to')
+    parser.add_argument('--latency', type=float, default=0.1,
+                        help='initial target latency in seconds')
+    parser.add_argument('--min-latency', type=float, default=0.02,
+                        help='lower bound for the adaptive latency in seconds')
+    parser.add_argument('--max-latency', type=float, default=0.5,
+                        help='upper bound for the adaptive latency in seconds')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='adapt the latency to the measured network jitter')
+    parser.add_argument('--stats-interval', type=float, default=5.0,
+                        help='seconds between printing buffer statistics, 0 to disable')
+    args = parser.parse_args()
+
+    jitter_buffer = JitterBuffer(target_latency=args.latency,
+                                 min_latency=args.min_latency,
+                                 max_latency=args.max_latency,
+                                 adaptive=args.adaptive)
+    receiver = RtpReceiver(args.local_port, jitter_buffer=jitter_buffer)
+    out_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    destination = (args.remote_host, args.remote_port)
+    print('Forwarding port {} to {}:{}'.format(receiver.port, *destination))
+
+    last_stats = time.time()
+    try:
+        for _, packet in receiver.packets():
+            out_sock.sendto(packet.data, destination)
+
+            now = time.time()
+            if args.stats_interval and now - last_stats > args.stats_interval:
+                last_stats = now
+                stats = jitter_buffer.stats()
+                print('latency {:.0f}ms playout delay {:.0f}ms jitter {:.1f}ms depth {} '
+                      'late {} lost {} reordered {}'.format(
+                          1000 * stats['target_latency'], 1000 * stats['last_playout_delay'],
+                          1000 * stats['jitter'], stats['depth'], stats['late_drops'],
+                          stats['lost'], stats['reordered']))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        receiver.close()
+        out_sock.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""
+Latency harness
+
+Measure the teleop path end to end and print histograms of:
+    command rtt         CustomRpcRequest.utime to the RemoteControl status that echoes it
+    command to motion   first non-zero command to the reported speed reaching --threshold
+    frame age           RTP capture time to receive, and to release from the jitter buffer
+
+Run it against a local stand-in vehicle, which echoes commands and sends a synthetic RTP
+stream with wall clock timestamps:
+
+    python latency_harness.py --stand-in
+
+Against a real R1 the RemoteControl skill must be on the vehicle. The harness sends short
+pulses of forward velocity (--speed, default 0.5 m/s) so the vehicle must be flying in open
+space, or pass --speed 0 to only measure command round trips and frame ages. Frame ages from a
+real vehicle are relative to the fastest frame seen, since its clock is not shared.
+"""
+# Prep for python3
+from __future__ import absolute_import
+from __future__ import print_function
+import argparse
+import json
+import threading
+import time
+
+from skydio.comms.http_client import HTTPClient
+from skydio.comms.latency import CommandTracker
+from skydio.comms.latency import FrameAgeTracker
+from skydio.comms.latency import MotionTracker
+from skydio.comms.stand_in import StandInVehicle
+from skydio.comms.udp_link import UDPLink
+from skydio.streaming.jitter_buffer import JitterBuffer
+from skydio.streaming.negotiation import negotiate_stream
+from skydio.streaming.receiver import RtpReceiver
+from skydio.streaming.synthetic import NetworkEmulator
+from skydio.types import custom_comms_pb2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--baseurl', metavar='URL', default='http://192.168.10.1',
+                        help='the url of the vehicle')
+    parser.add_argument('--skill-key', type=str, default='my_skillset.remote.RemoteControl',
+                        help='the import path of the RemoteControl skill on the vehicle')
+    parser.add_argument('--stand-in', action='store_true',
+                        help='measure against a local stand-in vehicle instead of an R1')
+    parser.add_argument('--stream', choices=['h264', 'jpeg'], default='jpeg',
+                        help='The video stream type that the vehicle should produce')
+    parser.add_argument('--duration', type=float, default=20.0,
+                        help='seconds to measure for')
+    parser.add_argument('--rate', type=float, default=15.0,
+                        help='commands sent per second')
+    parser.add_argument('--speed', type=float, default=0.5,
+                        help='forward speed of the command pulses in m/s')
+    parser.add_argument('--pulse', type=float, default=2.0,
+                        help='seconds each pulse of motion, and each pause, lasts')
+    parser.add_argument('--threshold', type=float, default=0.5,
+                        help='fraction of the commanded speed that counts as moving')
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='jitter buffer latency before frames are displayed, in seconds')
+    parser.add_argument('--network-delay', type=float, default=0.02,
+                        help='one-way video delay added by the stand-in, in seconds')
+    parser.add_argument('--network-jitter', type=float, default=0.005,
+                        help='video delay jitter added by the stand-in, in seconds')
+    args = parser.parse_args()
+
+    stream = negotiate_stream(args.stream)
+    stand_in = None
+    if args.stand_in:
+        network = NetworkEmulator(delay=args.network_delay, jitter=args.network_jitter)
+        stand_in = StandInVehicle(skill_key=args.skill_key, video_port=stream.port,
+                                  fps=stream.fps, network=network).start()
+        link = UDPLink('latency_harness', local_port=0, remote_address=stand_in.address)
+    else:
+        client = HTTPClient(args.baseurl, pilot=True, stream_settings=stream.stream_settings)
+
+        # Periodically poll the status endpoint to keep ourselves the active pilot.
+        def update_loop():
+            while True:
+                client.update_pilot_status()
+                time.sleep(2)
+        status_thread = threading.Thread(target=update_loop)
+        status_thread.setDaemon(True)
+        status_thread.start()
+
+        client.set_skill(args.skill_key)
+        link = UDPLink(client.client_id, local_port=50112,
+                       remote_address=client.get_udp_link_address())
+    link.connect()
+
+    commands = CommandTracker()
+    motion = MotionTracker(threshold=args.threshold)
+    frames = FrameAgeTracker(wall_clock=args.stand_in)
+    lock = threading.Lock()
+    running = [True]
+
+    def status_loop():
+        while running[0]:
+            message = link.read()
+            if not isinstance(message, custom_comms_pb2.CustomSkillStatus):
+                continue
+            now = time.time()
+            status = json.loads(message.data.decode('utf-8'))
+            with lock:
+                commands.echo(status.get('command_seq'), now)
+                motion.status(status.get('speed', 0.0), now)
+
+    def video_loop():
+        receiver = RtpReceiver(stream.port)
+        jitter_buffer = JitterBuffer(target_latency=args.latency, adaptive=False)
+        try:
+            while running[0]:
+                for arrival, packet in receiver.read():
+                    jitter_buffer.push(packet, arrival)
+                    if packet.marker:
+                        frames.receive(packet.timestamp, arrival)
+                for packet in jitter_buffer.pop():
+                    if packet.marker:
+                        frames.display(packet.timestamp, time.time())
+        finally:
+            receiver.close()
+
+    threads = [threading.Thread(target=status_loop), threading.Thread(target=video_loop)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    print('Measuring for {:.0f}s, video {}'.format(args.duration, stream.describe()))
+    start = time.time()
+    seq = 0
+    try:
+        while time.time() - start < args.duration:
+            pulse_on = int((time.time() - start) / args.pulse) % 2 == 1
+            move = [args.speed if pulse_on else 0.0, 0.0, 0.0, 0.0, 0.0]
+            seq += 1
+            utime = link.send_json(args.skill_key, {'move': move, 'seq': seq})
+            with lock:
+                commands.stamp(seq, utime)
+                motion.command(move[:3], utime / 1e6)
+            time.sleep(1.0 / args.rate)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        running[0] = False
+        for thread in threads:
+            thread.join()
+        if stand_in is not None:
+            stand_in.stop()
+
+    print()
+    for histogram in (commands.histogram, motion.histogram, frames.received, frames.displayed):
+        print(histogram.format())
+        print()
+    print('{} commands sent, {} superseded before their echo'.format(seq, commands.superseded))
+
+
+if __name__ == '__main__':
+    main()
@@ -11,6 +11,7 @@ This script uses an RTP stream from the vehicle to create an opencv window.
 from __future__ import absolute_import
 from __future__ import print_function
 import argparse
+import atexit
 import threading
 import time
 import os
@@ -20,8 +21,19 @@ os.environ['OPENCV_FFMPEG_CAPTURE_OPTIONS'] = "protocol_whitelist;file,rtp,udp"
 import cv2  # pylint: disable=import-error
 
 from skydio.comms.http_client import HTTPClient
+from skydio.comms.session_log import RecordingLink
+from skydio.comms.session_log import SessionRecorder
+from skydio.comms.session_log import SOURCE_GAMEPAD
+from skydio.comms.session_log import SOURCE_KEYBOARD
 from skydio.comms.udp_link import UDPLink
+from skydio.input_devices.button_events import DOUBLE_PRESS
+from skydio.input_devices.button_events import LONG_PRESS
+from skydio.input_devices.calibration import calibrate
+from skydio.input_devices.calibration import f310_profile
+from skydio.input_devices.calibration import load_profile
+from skydio.input_devices.calibration import save_profile
 from skydio.input_devices.gamepad import Gamepad
+from skydio.streaming.negotiation import negotiate_stream
 
 # Hit q to exit the program
 QUIT = ord('q')
@@ -93,11 +105,30 @@ def main():
     parser.add_argument('--update-skillsets-email', type=str,
                         help='The email of the user to get skillsets for and send them to the '
                              'vehicle (must be pilot)')
+    parser.add_argument('--vehicle-id', type=str,
+                        help='Identifies the vehicle, e.g. its serial number, so that skillsets '
+                             'it already has are not sent again')
     parser.add_argument('--skydio-api-url', type=str, help='Override the skydio api url')
 
+    # h264 is the 720P 15fps h264 encoded stream directly from the camera.
+    # TODO: this stream seems like have client-induced lag
+    # Perhaps due to incorrect timestamps.
+    # jpeg is the raw images, converted to 240p jpeg on the vehicle before sending.
     parser.add_argument('--stream', choices=['h264', 'jpeg'], default='jpeg',
                         help='The video stream type that the vehicle should produce')
 
+    parser.add_argument('--port', type=int,
+                        help='local port for the video stream, a free port by default')
+
+    parser.add_argument('--gamepad-profile', default='default',
+                        help='name of the stored gamepad calibration profile to use')
+
+    parser.add_argument('--calibrate', action='store_true',
+                        help='calibrate the gamepad and store it as --gamepad-profile')
+
+    parser.add_argument('--record-session', metavar='PATH',
+                        help='log the commands sent during the session, for replay_session.py')
+
     args = parser.parse_args()
 
     if 'sim' in args.baseurl:
@@ -106,24 +137,18 @@ def main():
         # You may be able to add port-forwarding to your firewall to fix this.
         raise RuntimeError('RTP streaming is not supported in the simulator yet.')
 
-    if args.stream == 'h264':
-        # H264 is the 720P 15fps h264 encoded stream directly from the camera.
-        stream_settings = {'source': 'h264', 'port': 55004}
-        # TODO: this stream seems like have client-induced lag
-        # Perhaps due to incorrect timestamps.
-        stream_file = 'h264_stream.sdp'
-    elif args.stream == 'jpeg':
-        # NATIVE is the raw images, though we convert to 240p jpeg by default before sending.
-        stream_settings = {'source': 'NATIVE', 'port': 55004}
-        stream_file = 'jpeg_stream.sdp'
-    else:
-        raise ValueError('Unknown stream format {}'.format(args.stream))
+    # Pick a free local port unless one was given, and describe the stream to opencv via SDP.
+    stream = negotiate_stream(args.stream, port=args.port)
+    stream_file = stream.write_sdp()
+    # Remove the temporary SDP file however the demo exits.
+    atexit.register(os.remove, stream_file)
+    print('Requesting stream: {}'.format(stream.describe()))
 
     # Create the client to use for all requests.
     client = HTTPClient(args.baseurl,
                         pilot=True,
                         token_file=args.token_file,
-                        stream_settings=stream_settings)
+                        stream_settings=stream.stream_settings)
 
     if not client.check_min_api_version():
         print('Your vehicle is running an older api version.'
@@ -136,7 +161,8 @@ def main():
 
     if args.update_skillsets_email:
         client.update_skillsets(args.update_skillsets_email,
-                                api_url=args.skydio_api_url)
+                                api_url=args.skydio_api_url,
+                                vehicle_id=args.vehicle_id)
 
     # Periodically poll the status endpoint to keep ourselves the active pilot.
     def update_loop():
@@ -154,15 +180,44 @@ def main():
     # Connect the UDPLink to the vehicle before trying to takeoff.
     link.connect()
 
-    if args.takeoff:
-        # Ensure that the vehicle has taken off before continuing.
-        client.takeoff()
+    recorder = None
+    if args.record_session:
+        # Log the command axes and everything sent over the link, see replay_session.py.
+        recorder = SessionRecorder(args.record_session)
+        link = RecordingLink(link, recorder)
 
     if Gamepad.available():
         controller = Gamepad()
+        if args.calibrate:
+            controller.profile = calibrate(controller, name=args.gamepad_profile)
+            print('Saved calibration to {}'.format(
+                save_profile(controller.profile, controller.name)))
+        else:
+            controller.profile = (load_profile(controller.name, args.gamepad_profile)
+                                  or controller.profile)
+        profile = controller.profile
     else:
         print('USB gamepad not available, falling back to using keyboard input instead.')
         controller = None
+        profile = f310_profile()
+
+    if controller:
+        # Hold START to takeoff and BACK to land, double-tap Y to re-enter the skill.
+        # Takeoff and landing block, so run them off the event dispatcher thread.
+        def in_background(func, *func_args):
+            def callback(_):
+                thread = threading.Thread(target=func, args=func_args)
+                thread.setDaemon(True)
+                thread.start()
+            return callback
+        controller.events.subscribe('BTN_START', LONG_PRESS, in_background(client.takeoff))
+        controller.events.subscribe('BTN_SELECT', LONG_PRESS, in_background(client.land))
+        controller.events.subscribe('BTN_NORTH', DOUBLE_PRESS,
+                                    in_background(client.set_skill, args.skill_key))
+
+    if args.takeoff:
+        # Ensure that the vehicle has taken off before continuing.
+        client.takeoff()
 
     # Switch into the RemoteControl skill so that our commands are followed.
     # If the skill isn't on the vehicle, the commands will be ignored.
@@ -187,21 +242,20 @@ def main():
             cmd_axes = controller.get_command()
         else:
             cmd_axes = key_to_command(key)
+        if recorder:
+            recorder.record_command(cmd_axes, SOURCE_GAMEPAD if controller else SOURCE_KEYBOARD)
 
-        # Scale each axis into the correct units.
-        scales = [
-            10,  # x-velocity [m/s]
-            10,  # y-velocity [m/s]
-            10,  # z-velocity [m/s]
-            1,  # yaw-rate [rad/s]
-            1,  # pitch-rate [rad/s]
-        ]
+        # Scale each axis into the correct units, see f310_profile for the defaults.
         request = {}
-        request['move'] = [scale * axis for scale, axis in zip(scales, cmd_axes)]
+        request['move'] = profile.scale(cmd_axes).tolist()
 
         # Continously send movement commands to the Gamepad skill.
         link.send_json(args.skill_key, request)
 
+    if recorder:
+        recorder.close()
+        print('Recorded {} entries to {}'.format(recorder.records, args.record_session))
+
 
 if __name__ == '__main__':
     main()
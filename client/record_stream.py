@@ -0,0 +1,103 @@
+"""
+Record the RTP video stream from R1 to disk, without decoding it.
+
+By default this requests the stream from the vehicle and keeps the session alive, like
+pi_proxy_demo.py. Pass --listen-only if another client already requested the stream.
+
+Recordings are written as fixed-size segment files with a sidecar index, see
+skydio/streaming/recorder.py. Use --frames to store assembled JPEG images or H.264 access units
+instead of raw RTP packets.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+import argparse
+import threading
+import time
+
+from skydio.comms.http_client import HTTPClient
+from skydio.streaming.depacketizer import create_depacketizer
+from skydio.streaming.jitter_buffer import JitterBuffer
+from skydio.streaming.negotiation import negotiate_stream
+from skydio.streaming.receiver import RtpReceiver
+from skydio.streaming.recorder import KIND_H264
+from skydio.streaming.recorder import KIND_JPEG
+from skydio.streaming.recorder import KIND_PACKETS
+from skydio.streaming.recorder import StreamRecorder
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--baseurl', metavar='URL', default='http://192.168.10.1',
+                        help='the url of the vehicle')
+    parser.add_argument('--stream', choices=['h264', 'jpeg'], default='jpeg',
+                        help='The video stream type that the vehicle should produce')
+    parser.add_argument('--port', type=int,
+                        help='local port for the stream, a free port by default')
+    parser.add_argument('--listen-only', action='store_true',
+                        help='do not request the stream from the vehicle')
+    parser.add_argument('--directory', default='recording',
+                        help='directory to write segments into')
+    parser.add_argument('--prefix', default='stream',
+                        help='file name prefix for the segments')
+    parser.add_argument('--segment-size', type=int, default=64,
+                        help='maximum segment file size in MB')
+    parser.add_argument('--frames', action='store_true',
+                        help='store assembled frames instead of raw RTP packets')
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='jitter buffer latency in seconds when assembling frames')
+    args = parser.parse_args()
+
+    stream = negotiate_stream(args.stream, port=args.port)
+    frame_kind = KIND_H264 if args.stream == 'h264' else KIND_JPEG
+
+    if not args.listen_only:
+        print('Requesting stream: {}'.format(stream.describe()))
+        client = HTTPClient(args.baseurl, pilot=True, stream_settings=stream.stream_settings)
+
+        # Periodically poll the status endpoint to keep the stream alive.
+        def update_loop():
+            while True:
+                client.update_pilot_status()
+                time.sleep(2)
+        status_thread = threading.Thread(target=update_loop)
+        status_thread.setDaemon(True)
+        status_thread.start()
+
+    recorder = StreamRecorder(args.directory,
+                              kind=frame_kind if args.frames else KIND_PACKETS,
+                              prefix=args.prefix,
+                              segment_size=args.segment_size * 1024 * 1024)
+
+    if args.frames:
+        # Frames must be assembled from in-order packets.
+        receiver = RtpReceiver(stream.port,
+                               jitter_buffer=JitterBuffer(target_latency=args.latency))
+        depacketizer = create_depacketizer(stream.payload_type)
+    else:
+        receiver = RtpReceiver(stream.port)
+        depacketizer = None
+
+    print('Recording port {} to {}'.format(receiver.port, args.directory))
+    last_print = time.time()
+    try:
+        for receive_time, packet in receiver.packets():
+            if depacketizer is None:
+                recorder.write_packet(packet, receive_time)
+            else:
+                for frame in depacketizer.push(packet):
+                    recorder.write_frame(frame, receive_time)
+
+            if receive_time - last_print > 5.0:
+                last_print = receive_time
+                stats = recorder.stats()
+                print('{records} records, {bytes} bytes, {segments} segments'.format(**stats))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        receiver.close()
+        recorder.close()
+
+
+if __name__ == '__main__':
+    main()
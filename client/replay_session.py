@@ -0,0 +1,107 @@
+"""
+Replay a session recorded with `rc_demo.py --record-session`.
+
+Every payload the pilot sent is sent again over a UDPLink, with the original timing or as fast
+as possible (--fast), and the achieved rate and timing error are printed. Use --stand-in to
+benchmark the link against a local stand-in vehicle instead of an R1.
+
+The replayed payloads move a real vehicle exactly as they did when recorded, so only replay
+against a flying R1 in open space.
+"""
+# Prep for python3
+from __future__ import absolute_import
+from __future__ import print_function
+import argparse
+import threading
+import time
+
+from skydio.comms.http_client import HTTPClient
+from skydio.comms.session_log import CommandRecord
+from skydio.comms.session_log import PayloadRecord
+from skydio.comms.session_log import SOURCE_NAMES
+from skydio.comms.session_log import read_session
+from skydio.comms.session_log import replay_session
+from skydio.comms.stand_in import StandInVehicle
+from skydio.comms.udp_link import UDPLink
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('session', help='the session log to replay')
+    parser.add_argument('--baseurl', metavar='URL', default='http://192.168.10.1',
+                        help='the url of the vehicle')
+    parser.add_argument('--skill-key', type=str,
+                        help='switch to and send to this skill instead of the recorded one')
+    parser.add_argument('--stand-in', action='store_true',
+                        help='replay to a local stand-in vehicle instead of an R1')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='playback speed relative to the original timing')
+    parser.add_argument('--fast', action='store_true',
+                        help='send as fast as possible, ignoring the original timing')
+    parser.add_argument('--info', action='store_true',
+                        help='only print a summary of the session')
+    args = parser.parse_args()
+
+    records = list(read_session(args.session))
+    commands = [record for record in records if isinstance(record, CommandRecord)]
+    payloads = len(records) - len(commands)
+    duration = records[-1].time - records[0].time if records else 0.0
+    sources = set(SOURCE_NAMES.get(record.source, record.source) for record in commands)
+    print('{} commands from {} and {} payloads over {:.1f}s'.format(
+        len(commands), ', '.join(sorted(sources)) or 'nothing', payloads, duration))
+    skill_keys = []
+    for record in records:
+        if isinstance(record, PayloadRecord) and record.skill_key not in skill_keys:
+            skill_keys.append(record.skill_key)
+    if skill_keys:
+        print('Payloads for {}'.format(', '.join(skill_keys)))
+    if args.info:
+        return
+
+    stand_in = None
+    if args.stand_in:
+        stand_in = StandInVehicle().start()
+        link = UDPLink('replay_session', local_port=0, remote_address=stand_in.address)
+    else:
+        client = HTTPClient(args.baseurl, pilot=True)
+
+        # Periodically poll the status endpoint to keep ourselves the active pilot.
+        def update_loop():
+            while True:
+                client.update_pilot_status()
+                time.sleep(2)
+        status_thread = threading.Thread(target=update_loop)
+        status_thread.setDaemon(True)
+        status_thread.start()
+
+        # Switch into the skill the payloads are for, or the vehicle ignores them.
+        skill_key = args.skill_key or (skill_keys[0] if skill_keys else None)
+        if skill_key:
+            if len(skill_keys) > 1 and not args.skill_key:
+                print('Switching to {}, the first skill sent to'.format(skill_key))
+            client.set_skill(skill_key)
+
+        link = UDPLink(client.client_id, local_port=50112,
+                       remote_address=client.get_udp_link_address())
+    link.connect()
+
+    try:
+        stats = replay_session(args.session, link, speed=None if args.fast else args.speed,
+                               skill_key=args.skill_key)
+    finally:
+        if stand_in is not None:
+            # Give the last packets time to arrive before counting them.
+            time.sleep(0.1)
+            stand_in.stop()
+
+    print('Sent {sent} payloads in {elapsed:.2f}s, {rate:.0f} per second'.format(**stats))
+    if 'max_lateness' in stats:
+        print('Timing error: mean {:.2f}ms, worst {:.2f}ms'.format(
+            stats['mean_lateness'] * 1e3, stats['max_lateness'] * 1e3))
+    if stand_in is not None:
+        print('Stand-in received {} of them'.format(stand_in.requests))
+
+
+if __name__ == '__main__':
+    main()
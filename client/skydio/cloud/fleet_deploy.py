@@ -0,0 +1,299 @@
+"""
+Deploy skillsets to a fleet of vehicles and simulators.
+
+The cloud config is fetched once, then uploaded to every vehicle concurrently by a bounded pool
+of workers, with a per-vehicle timeout and retries. A progress table is shown while it runs and
+a JSON summary of which vehicle got which config hash can be written at the end.
+
+The fleet is a JSON list of vehicles:
+
+    [
+        {"url": "http://192.168.10.1", "id": "r1-a", "access_token": "..."},
+        {"url": "https://sim-1.example.com", "token_file": "sim-1.token"}
+    ]
+
+A vehicle without an access_token is authenticated as pilot, using the simulator credentials
+in token_file if one is given.
+A vehicle with an id, e.g. its serial number, is skipped if it already has the config; one
+without is always uploaded to.
+
+    python -m skydio.cloud.fleet_deploy pilot@example.com fleet.json --parallel 8
+"""
+
+import argparse
+import json
+import logging
+import random
+import sys
+import threading
+import time
+import uuid
+
+try:
+    # python 2
+    from Queue import Queue
+except ImportError:
+    # python 3
+    from queue import Queue
+
+import requests
+
+from .update_util import DEFAULT_CLOUD_URL
+from .update_util import LOGGER_NAME
+from .update_util import fetch_cloud_config
+from .update_util import push_cloud_config
+
+# Vehicle states shown in the progress table.
+PENDING = 'pending'
+AUTHENTICATING = 'authenticating'
+UPLOADING = 'uploading'
+RETRYING = 'retrying'
+DONE = 'done'
+UNCHANGED = 'unchanged'
+FAILED = 'failed'
+
+
+def vehicle_access_token(vehicle_url, token_file=None, timeout=10):
+    """
+    Authenticate with a vehicle as pilot and return the access token
+    """
+    request = {'client_id': str(uuid.uuid4()), 'requested_level': 8, 'commandeer': True}
+    if token_file:
+        with open(token_file, 'r') as tokenf:
+            request['credentials'] = tokenf.read().strip()
+    res = requests.post(url="{}/api/authentication".format(vehicle_url),
+                        data=json.dumps(request),
+                        headers={"Accept": "application/json",
+                                 "Content-Type": "application/json"},
+                        timeout=timeout)
+    res.raise_for_status()
+    data = res.json().get('data') or {}
+    if data.get('accessLevel') != 'PILOT':
+        raise RuntimeError('Did not authenticate as pilot')
+    return data['accessToken']
+
+
+class VehicleDeploy(object):
+    """
+    The progress of deploying to one vehicle
+    """
+
+    def __init__(self, url, vehicle_id=None, access_token=None, token_file=None):
+        self.url = url
+        self.vehicle_id = vehicle_id
+        self.access_token = access_token
+        self.token_file = token_file
+        self.state = PENDING
+        self.attempts = 0
+        self.error = None
+        self.digest = None
+        self.start_time = None
+        self.end_time = None
+        self.rate = None
+
+    @classmethod
+    def from_dict(cls, vehicle):
+        return cls(vehicle['url'], vehicle.get('id'), vehicle.get('access_token'),
+                   vehicle.get('token_file'))
+
+    @property
+    def name(self):
+        return self.vehicle_id or self.url
+
+    def transferred(self, done, total, rate):
+        """ Progress callback for the upload, keeps its rate for the table. """
+        self.rate = rate
+
+    @property
+    def elapsed(self):
+        if self.start_time is None:
+            return 0.0
+        return (self.end_time or time.time()) - self.start_time
+
+    def summary(self):
+        return {
+            'url': self.url,
+            'id': self.vehicle_id,
+            'state': self.state,
+            'digest': self.digest,
+            'attempts': self.attempts,
+            'elapsed': round(self.elapsed, 3),
+            'bytes_per_second': round(self.rate) if self.rate is not None else None,
+            'error': self.error,
+        }
+
+
+class ProgressTable(object):
+    """
+    Print the state of every vehicle. On a terminal the table is redrawn in place, otherwise
+    each state change is printed as a line.
+    """
+
+    def __init__(self, deploys, stream=None):
+        self.deploys = deploys
+        self.stream = stream or sys.stdout
+        self.live = hasattr(self.stream, 'isatty') and self.stream.isatty()
+        self.lock = threading.Lock()
+        self._lines = 0
+
+    def update(self, deploy):
+        with self.lock:
+            if not self.live:
+                line = '{:<32} {:<14} attempt {}'.format(deploy.name, deploy.state,
+                                                         deploy.attempts)
+                if deploy.error:
+                    line += '  ' + deploy.error
+                self.stream.write(line + '\n')
+            else:
+                if self._lines:
+                    # Move the cursor back to the top of the previous table.
+                    self.stream.write('\x1b[{}F'.format(self._lines))
+                lines = ['{:<32} {:<14} {:>8} {:>7} {:>7}  {}'.format(
+                    'VEHICLE', 'STATE', 'ATTEMPTS', 'SECONDS', 'KB/S', 'CONFIG')]
+                for item in self.deploys:
+                    rate = '{:.0f}'.format(item.rate / 1e3) if item.rate is not None else '-'
+                    lines.append('{:<32} {:<14} {:>8} {:>7.1f} {:>7}  {}'.format(
+                        item.name[:32], item.state, item.attempts, item.elapsed, rate,
+                        (item.digest or item.error or '')[:40]))
+                self.stream.write(''.join('\x1b[2K' + line + '\n' for line in lines))
+                self._lines = len(lines)
+            self.stream.flush()
+
+
+def deploy_to_fleet(user_email, deploys, cloud_url=DEFAULT_CLOUD_URL, parallel=4, timeout=10,
+                    retries=2, retry_backoff=1.0, force=False, compress=False, progress=None,
+                    skillset_dir=None):
+    """
+    Fetch the cloud config once and upload it to every vehicle concurrently.
+
+    Args:
+        user_email (str): the user to get skillsets for.
+        deploys (list): a VehicleDeploy per vehicle, updated as the deploy progresses.
+        cloud_url (str): the Skydio Cloud API url.
+        parallel (int): the most vehicles to upload to at once.
+        timeout (float): seconds to wait for each vehicle request.
+        retries (int): extra attempts for a vehicle after a failure.
+        retry_backoff (float): base of the jittered exponential backoff between attempts.
+        force (bool): upload even to vehicles the cache says already have the config.
+        compress (bool): gzip the uploads to vehicles that accept it.
+        progress (callable): called with each VehicleDeploy when its state changes.
+        skillset_dir (str): the local skillset, to report which skill modules changed on each
+            vehicle.
+
+    Returns:
+        str: the hash of the cloud config.
+    """
+    digest, cache = fetch_cloud_config(user_email, cloud_url)
+    progress = progress or (lambda deploy: None)
+    log = logging.getLogger(LOGGER_NAME)
+
+    def deploy_one(deploy):
+        deploy.start_time = time.time()
+        for attempt in range(1 + retries):
+            deploy.attempts = attempt + 1
+            try:
+                if not deploy.access_token:
+                    deploy.state = AUTHENTICATING
+                    progress(deploy)
+                    deploy.access_token = vehicle_access_token(deploy.url, deploy.token_file,
+                                                               timeout=timeout)
+                deploy.state = UPLOADING
+                progress(deploy)
+                uploaded = push_cloud_config(deploy.url, deploy.access_token, digest, cache,
+                                             vehicle_id=deploy.vehicle_id, force=force,
+                                             timeout=timeout, compress=compress,
+                                             progress=deploy.transferred,
+                                             skillset_dir=skillset_dir)
+                deploy.state = DONE if uploaded else UNCHANGED
+                deploy.digest = digest
+                deploy.error = None
+                break
+            except (requests.RequestException, RuntimeError, IOError, ValueError) as err:
+                deploy.error = '{}: {}'.format(err.__class__.__name__, err)
+                log.debug('{} attempt {} failed: {}'.format(deploy.name, attempt + 1, err))
+                if attempt == retries:
+                    deploy.state = FAILED
+                    break
+                deploy.state = RETRYING
+                progress(deploy)
+                time.sleep(random.uniform(0, retry_backoff * 2 ** attempt))
+            except Exception as err:  # pylint: disable=broad-except
+                # A bug must not kill the worker and leave the rest of its queue undeployed.
+                deploy.error = '{}: {}'.format(err.__class__.__name__, err)
+                log.exception('{} failed'.format(deploy.name))
+                deploy.state = FAILED
+                break
+        deploy.end_time = time.time()
+        progress(deploy)
+
+    work = Queue()
+    for deploy in deploys:
+        work.put(deploy)
+
+    def worker():
+        while True:
+            deploy = work.get()
+            if deploy is None:
+                return
+            deploy_one(deploy)
+
+    workers = [threading.Thread(target=worker) for _ in range(max(1, min(parallel, len(deploys))))]
+    for thread in workers:
+        thread.daemon = True
+        thread.start()
+        work.put(None)
+    for thread in workers:
+        thread.join()
+
+    cache.prune()
+    return digest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('user_email', type=str, help='The email of the user to get skillsets for')
+    parser.add_argument('fleet', type=str, help='JSON file listing the vehicles')
+    parser.add_argument('--skydio-api-url', type=str, default=DEFAULT_CLOUD_URL,
+                        help='Override the skydio api url')
+    parser.add_argument('--parallel', type=int, default=4,
+                        help='Most vehicles to upload to at once')
+    parser.add_argument('--timeout', type=float, default=10,
+                        help='Seconds to wait for each vehicle request')
+    parser.add_argument('--retries', type=int, default=2,
+                        help='Extra attempts for each vehicle after a failure')
+    parser.add_argument('--force', action='store_true',
+                        help='Upload even to vehicles that should already have the config')
+    parser.add_argument('--compress', action='store_true',
+                        help='Gzip the uploads to vehicles that accept it')
+    parser.add_argument('--skillset', type=str, metavar='DIR',
+                        help='The local skillset, to report which skills changed on each vehicle')
+    parser.add_argument('--summary', type=str,
+                        help='Write a JSON summary of the deploy to this file')
+
+    args = parser.parse_args()
+
+    with open(args.fleet, 'r') as fleet_file:
+        vehicles = json.load(fleet_file)
+
+    deploys = [VehicleDeploy.from_dict(vehicle) for vehicle in vehicles]
+    digest = deploy_to_fleet(args.user_email, deploys, cloud_url=args.skydio_api_url,
+                             parallel=args.parallel, timeout=args.timeout, retries=args.retries,
+                             force=args.force, compress=args.compress,
+                             progress=ProgressTable(deploys).update, skillset_dir=args.skillset)
+    if args.summary:
+        with open(args.summary, 'w') as summary_file:
+            json.dump({'cloud_config': digest,
+                       'vehicles': [deploy.summary() for deploy in deploys]},
+                      summary_file, indent=2)
+
+    failed = [deploy for deploy in deploys if deploy.state == FAILED]
+    print('{} vehicles updated, {} unchanged, {} failed'.format(
+        sum(deploy.state == DONE for deploy in deploys),
+        sum(deploy.state == UNCHANGED for deploy in deploys), len(failed)))
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
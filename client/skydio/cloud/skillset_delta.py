@@ -0,0 +1,140 @@
+"""
+Per-module deltas between two versions of a skillset.
+
+A skillset is summarized by the sha256 of each of its modules: __init__.py, manifest.json, the
+module of every skill listed in the manifest and the helper modules the skills share. Comparing
+the summary of the local tree with the one recorded for a vehicle tells which modules, and so
+which skills, changed since the vehicle last received the skillset. The delta is only reported;
+the whole cloud config is still uploaded.
+
+    delta = SkillsetDelta.between(cache.vehicle_skillset('r1-a'), 'skillset')
+    print(delta.describe())
+"""
+
+import hashlib
+import json
+import os
+
+MANIFEST = 'manifest.json'
+PACKAGE_INIT = '__init__.py'
+
+
+def _module_path(skill):
+    """ The file of the module defining a manifest skill like 'follow_modes.Lead'. """
+    return skill.rsplit('.', 1)[0].replace('.', '/') + '.py'
+
+
+def load_manifest(skillset_dir):
+    with open(os.path.join(skillset_dir, MANIFEST), 'r') as manifest_file:
+        return json.load(manifest_file)
+
+
+def skills_by_module(manifest):
+    """
+    Map each module file to the skills it defines
+    """
+    modules = {}
+    for skill in sorted(manifest):
+        modules.setdefault(_module_path(skill), []).append(skill)
+    return modules
+
+
+def helper_modules(skillset_dir):
+    """
+    The python files of a skillset directory that don't define skills, like shared helpers
+    """
+    skill_modules = set(skills_by_module(load_manifest(skillset_dir)))
+    # Skills in packages rather than modules.
+    skill_modules |= set(module[:-len('.py')] + '/' + PACKAGE_INIT for module in skill_modules)
+    helpers = []
+    for root, dirs, files in os.walk(skillset_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith(('.', '__pycache__')))
+        for name in sorted(files):
+            module = os.path.relpath(os.path.join(root, name), skillset_dir).replace(os.sep, '/')
+            if name.endswith('.py') and module != PACKAGE_INIT and module not in skill_modules:
+                helpers.append(module)
+    return helpers
+
+
+def module_hashes(skillset_dir):
+    """
+    Return {module file: sha256} for the modules of a skillset directory
+    """
+    modules = [PACKAGE_INIT, MANIFEST] + sorted(skills_by_module(load_manifest(skillset_dir)))
+    modules += [module for module in helper_modules(skillset_dir) if module not in modules]
+    hashes = {}
+    for module in modules:
+        path = os.path.join(skillset_dir, module)
+        if not os.path.isfile(path):
+            # A skill in a package rather than a module.
+            package_init = os.path.join(path[:-len('.py')], PACKAGE_INIT)
+            if not os.path.isfile(package_init):
+                raise IOError('Skillset module not found: {}'.format(path))
+            module, path = os.path.relpath(package_init, skillset_dir), package_init
+        with open(path, 'rb') as module_file:
+            hashes[module.replace(os.sep, '/')] = hashlib.sha256(module_file.read()).hexdigest()
+    return hashes
+
+
+class SkillsetDelta(object):
+    """
+    The modules that differ between two skillset summaries, and the skills they affect.
+
+    Args:
+        old (dict): {module file: sha256} the vehicle has, or None if unknown.
+        new (dict): {module file: sha256} of the local tree.
+        manifest (dict): the manifest of the local tree.
+    """
+
+    def __init__(self, old, new, manifest):
+        self.old = old
+        self.new = new
+        self.manifest = manifest
+        old = old or {}
+        self.added = sorted(set(new) - set(old))
+        self.removed = sorted(set(old) - set(new))
+        self.changed = sorted(module for module in set(new) & set(old)
+                              if new[module] != old[module])
+
+    @classmethod
+    def between(cls, old, skillset_dir):
+        return cls(old, module_hashes(skillset_dir), load_manifest(skillset_dir))
+
+    @property
+    def unknown(self):
+        """ Whether nothing is known about the vehicle, so every skill counts as changed. """
+        return self.old is None
+
+    @property
+    def modules(self):
+        """ The module files added or changed. """
+        return sorted(self.added + self.changed)
+
+    @property
+    def empty(self):
+        return not (self.added or self.removed or self.changed)
+
+    @property
+    def changed_skills(self):
+        """
+        The skills whose behavior may have changed. Changing __init__.py, the manifest or a
+        helper module affects every skill.
+        """
+        by_module = skills_by_module(self.manifest)
+        if self.unknown or any(module not in by_module for module in self.modules + self.removed):
+            return sorted(self.manifest)
+        return sorted(skill for module in self.modules for skill in by_module.get(module, []))
+
+    def describe(self):
+        if self.unknown:
+            return 'skillset not known on the vehicle, all {} skills changed'.format(
+                len(self.manifest))
+        if self.empty:
+            return 'skillset unchanged'
+        parts = []
+        for label, modules in (('changed', self.changed), ('added', self.added),
+                               ('removed', self.removed)):
+            if modules:
+                parts.append('{} {}'.format(label, ', '.join(modules)))
+        return '{}; skills changed: {}'.format('; '.join(parts),
+                                               ', '.join(self.changed_skills) or 'none')
@@ -0,0 +1,250 @@
+"""
+A local stand-in for the Skydio Cloud API and the vehicle's cloud config endpoints, for
+exercising CloudAPIClient and the skillset update tools without network access.
+
+    server = StandInServer().start()
+    client = CloudAPIClient(server.url, 'pilot@example.com', refresh_token=server.refresh_token,
+                            use_stored_tokens=False)
+
+It implements just enough of each route to be useful, counts requests and connections, and can
+inject failures and delays and expire access tokens on demand. Like the real servers it reads
+chunked uploads, gzip compressed or not, and gzips replies for clients that accept it. Run
+several to stand in for a fleet of vehicles.
+"""
+
+import base64
+import gzip
+import io
+import json
+import socket
+import threading
+import time
+import zlib
+
+try:
+    # python 2
+    from BaseHTTPServer import BaseHTTPRequestHandler
+    from BaseHTTPServer import HTTPServer
+    from SocketServer import ThreadingMixIn
+except ImportError:
+    # python 3
+    from http.server import BaseHTTPRequestHandler
+    from http.server import HTTPServer
+    from socketserver import ThreadingMixIn
+
+from .update_util import CODE_HEADER
+
+# Application error codes used by the API.
+CODE_OK = 0
+CODE_EXPIRED_TOKEN = 3100
+CODE_INVALID_TOKEN = 3300
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class StandInServer(object):
+    """
+    Serve the cloud and vehicle routes on a local port from a background thread.
+
+    Args:
+        cloud_config (bytes): the encoded cloud config to hand out.
+        login_code (int): the code that auth/authenticate accepts.
+        port (int): local port, a free port by default.
+        access_token_lifetime (float): seconds until an access token expires.
+    """
+
+    def __init__(self, cloud_config=b'stand-in cloud config', login_code=123456, port=0,
+                 access_token_lifetime=3600):
+        self.cloud_config = cloud_config
+        self.login_code = login_code
+        self.access_token_lifetime = access_token_lifetime
+        self.refresh_token = 'refresh-token'
+        self.access_token = None
+        self.access_token_expiry = None
+        self._token_number = 0
+        self.lock = threading.Lock()
+
+        # Request counts by route, connections accepted, and what the vehicle routes received.
+        self.requests = {}
+        self.connections = 0
+        self.uploads = []
+        self.skills_refreshes = 0
+
+        # Failures to inject: route -> list of HTTP statuses, or None to drop the connection.
+        self.failures = {}
+        # Seconds to wait before answering each route, to emulate a slow link.
+        self.delays = {}
+        # Content encodings accepted for uploads, clear it to emulate an older vehicle.
+        self.accept_encodings = set(['gzip'])
+        # Whether to gzip replies to clients that accept it.
+        self.compress_replies = True
+
+        self._httpd = _ThreadingHTTPServer(('127.0.0.1', port), self._handler_class())
+        self.url = 'http://127.0.0.1:{}'.format(self._httpd.server_address[1])
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *_):
+        self.stop()
+
+    def fail(self, route, statuses):
+        """ Fail the next requests to `route` with these HTTP statuses, None drops them. """
+        with self.lock:
+            self.failures.setdefault(route, []).extend(statuses)
+
+    def expire_access_token(self):
+        """ Make the current access token fail with CODE_EXPIRED_TOKEN. """
+        with self.lock:
+            self.access_token = None
+
+    def _issue_access_token(self):
+        # Shaped like a JWT, so clients can read the expiry from its claims.
+        self._token_number += 1
+        self.access_token_expiry = time.time() + self.access_token_lifetime
+        claims = json.dumps({'sub': 'access-token-{}'.format(self._token_number),
+                             'exp': self.access_token_expiry})
+        self.access_token = 'stand-in.{}.unsigned'.format(
+            base64.urlsafe_b64encode(claims.encode('utf-8')).decode('utf-8').rstrip('='))
+        return self.access_token
+
+    def _route(self, route, token, body):
+        """ Return (code, content type, reply) for a request. """
+        if route == 'auth/login':
+            return CODE_OK, 'application/json', {}
+        if route == 'auth/authenticate':
+            request = json.loads(body.decode('utf-8'))
+            if request.get('login_code') != self.login_code:
+                return CODE_INVALID_TOKEN, 'application/json', {}
+            return CODE_OK, 'application/json', {'access_token': self._issue_access_token(),
+                                                 'refresh_token': self.refresh_token}
+        if route == 'auth/refresh':
+            if token != self.refresh_token:
+                return CODE_INVALID_TOKEN, 'application/json', {}
+            return CODE_OK, 'application/json', {'access_token': self._issue_access_token()}
+        if route == 'cloud_config':
+            if token is None or token != self.access_token \
+                    or time.time() >= self.access_token_expiry:
+                return CODE_EXPIRED_TOKEN, 'application/json', {}
+            return CODE_OK, 'application/x-protobuf', self.cloud_config
+        if route == 'api/authentication':
+            return CODE_OK, 'application/json', {'accessToken': 'vehicle-token',
+                                                 'accessLevel': 'PILOT'}
+        if route == 'api/update_cloud_config':
+            self.uploads.append(body)
+            return CODE_OK, 'application/json', {}
+        if route == 'api/cloud_config_skills_refresh':
+            self.skills_refreshes += 1
+            return CODE_OK, 'application/json', {}
+        return None
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                BaseHTTPRequestHandler.setup(self)
+                with server.lock:
+                    server.connections += 1
+
+            def log_message(self, *_):
+                pass
+
+            def do_GET(self):
+                self._handle()
+
+            def do_POST(self):
+                self._handle()
+
+            def _handle(self):
+                route = self.path.split('?')[0].strip('/')
+                if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+                    body = self._read_chunked()
+                else:
+                    length = int(self.headers.get('Content-Length') or 0)
+                    body = self.rfile.read(length) if length else b''
+                encoding = self.headers.get('Content-Encoding', 'identity').lower()
+                if encoding != 'identity':
+                    if encoding not in server.accept_encodings:
+                        self._reply(415, CODE_OK, 'application/json', b'{}',
+                                    {'Accept-Encoding': ', '.join(server.accept_encodings)
+                                                        or 'identity'})
+                        return
+                    body = zlib.decompress(body, 16 + zlib.MAX_WBITS)
+                authorization = self.headers.get('Authorization') or ''
+                token = authorization[len('Bearer '):] if authorization else None
+
+                with server.lock:
+                    server.requests[route] = server.requests.get(route, 0) + 1
+                    failures = server.failures.get(route)
+                    failure = failures.pop(0) if failures else 0
+                    if failure == 0:
+                        result = server._route(route, token, body)
+                delay = server.delays.get(route)
+                if delay:
+                    time.sleep(delay)
+                if failure is None:
+                    self.close_connection = True
+                    return
+                if failure:
+                    self._reply(failure, CODE_OK, 'application/json', b'{}')
+                    return
+                if result is None:
+                    self._reply(404, CODE_OK, 'application/json', b'{}')
+                    return
+
+                code, content_type, reply = result
+                if content_type == 'application/json':
+                    reply = json.dumps({'data': reply}).encode('utf-8')
+                headers = {}
+                if server.compress_replies and 'gzip' in self.headers.get('Accept-Encoding', ''):
+                    compressed = io.BytesIO()
+                    with gzip.GzipFile(fileobj=compressed, mode='wb') as gzip_file:
+                        gzip_file.write(reply)
+                    reply = compressed.getvalue()
+                    headers['Content-Encoding'] = 'gzip'
+                self._reply(200, code, content_type, reply, headers)
+
+            def _read_chunked(self):
+                chunks = []
+                while True:
+                    size = int(self.rfile.readline().split(b';')[0], 16)
+                    if size == 0:
+                        # Skip any trailers up to the blank line.
+                        while self.rfile.readline().strip():
+                            pass
+                        return b''.join(chunks)
+                    chunks.append(self.rfile.read(size))
+                    self.rfile.readline()
+
+            def _reply(self, status, code, content_type, data, headers=None):
+                self.send_response(status)
+                self.send_header(CODE_HEADER, str(code))
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                try:
+                    self.wfile.write(data)
+                except socket.error:
+                    # The client gave up waiting, e.g. after a delay longer than its timeout.
+                    self.close_connection = True
+
+        return Handler
@@ -5,14 +5,28 @@ via cloud config. For use by external parties without any internal skydio depend
 
 import argparse
 import base64
+import hashlib
 import os
 import logging
 import json
+import random
 import socket
 import sys
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import contextmanager
 from functools import wraps
 
+try:
+    import fcntl
+except ImportError:
+    # Windows, where the store is only locked within the process.
+    fcntl = None
+
 import requests
+from requests.adapters import HTTPAdapter
 
 LOGGER_NAME = "CloudAPIClient"
 CLOUD_API_HOME_DIR = os.path.expanduser("~/.skydio_cloud_api")
@@ -20,6 +34,13 @@ CODE_HEADER = "X-Api-Status-Code"
 DIRECT_PROTO_RESPONSE_MESSAGE_HEADER = "X-use-direct-message-proto-response"
 DEFAULT_CLOUD_URL = "https://api.skydio.com"
 
+# POST routes which only read data, and so are safe to retry. All GET routes are retried.
+IDEMPOTENT_POST_ROUTES = frozenset(['cloud_config', 'auth/refresh'])
+# HTTP statuses that indicate a transient server or proxy failure.
+RETRY_STATUS_CODES = frozenset([502, 503, 504])
+# Cloud configs are streamed through disk in chunks of this many bytes.
+CHUNK_SIZE = 64 * 1024
+
 
 class CloudAPIException(Exception):
 
@@ -42,16 +63,22 @@ class CloudAPIException(Exception):
 def _refresh_if_needed(func):
     """
     Decorator that calls refresh() and retries request if response indicates expired access token
+
+    Concurrent requests that fail with the same expired token share a single refresh.
     """
     @wraps(func)
     def wrap(self, *pargs, **kwargs):
         skip_auto_refresh = kwargs.pop('skip_auto_refresh', False)
+        if not skip_auto_refresh and not kwargs.get('skip_token_check') \
+                and self.tokens.expiring():
+            # Refresh now rather than pay for a request that would fail.
+            self._refresh_once(self.access_token)
+        expired_token = self.access_token
         try:
             return func(self, *pargs, **kwargs)
         except CloudAPIException as err:
             if not skip_auto_refresh and err.code == 3100:
-                self.log.debug("Refreshing access token...")
-                self.refresh()
+                self._refresh_once(expired_token)
                 return func(self, *pargs, **kwargs)
             raise
     return wrap
@@ -61,34 +88,301 @@ def _dirname_for_url(url):
     return base64.urlsafe_b64encode(url.encode('utf-8')).decode('utf-8')
 
 
+@contextmanager
+def _file_lock(path):
+    """
+    Hold an exclusive lock on `path`.lock, so processes sharing the ~/.skydio_cloud_api store
+    take turns to change it
+    """
+    dirpath = os.path.dirname(path)
+    if not os.path.isdir(dirpath):
+        try:
+            os.makedirs(dirpath)
+        except OSError:
+            # Made by another process in the meantime.
+            if not os.path.isdir(dirpath):
+                raise
+    with open(path + '.lock', 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _refresh_token_path(user_email, url):
+    return os.path.join(CLOUD_API_HOME_DIR, _dirname_for_url(url), user_email)
+
+
 def _store_local_refresh_token(user_email, token, url):
-    dirpath = os.path.join(CLOUD_API_HOME_DIR, _dirname_for_url(url))
+    path = _refresh_token_path(user_email, url)
+    with _file_lock(path):
+        _atomic_write(path, token.encode('utf-8'))
+
+
+def _local_refresh_token(user_email, url):
+    path = _refresh_token_path(user_email, url)
+    if os.path.isfile(path):
+        with open(path, 'r') as refresh_file:
+            return refresh_file.read()
+
+    return None
+
+
+def _remove_local_refresh_token(user_email, url, token=None):
+    """
+    Remove the stored refresh token, only if it is still `token` when one is given
+    """
+    path = _refresh_token_path(user_email, url)
+    with _file_lock(path):
+        if os.path.isfile(path) and token in (None, _local_refresh_token(user_email, url)):
+            os.remove(path)
+
+
+def _token_expiry(token):
+    """
+    The expiry time of a JWT access token, or None if the token is not a JWT with an exp claim
+    """
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload.encode('ascii')).decode('utf-8'))
+        return float(claims['exp'])
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def _atomic_write(path, data):
+    """
+    Write a file by renaming a complete temporary file over it, so readers never see part of it
+    """
+    dirpath = os.path.dirname(path)
     if not os.path.isdir(dirpath):
         os.makedirs(dirpath)
+    handle, tmp_path = tempfile.mkstemp(dir=dirpath, prefix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as tmp_file:
+            tmp_file.write(data)
+        getattr(os, 'replace', os.rename)(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
 
-    with open(os.path.join(dirpath, user_email), 'w') as refresh_file:
-        refresh_file.write(token)
 
+def _format_bytes(count):
+    for unit in ('B', 'kB', 'MB'):
+        if count < 1000:
+            return '{:.0f} B'.format(count) if unit == 'B' else '{:.1f} {}'.format(count, unit)
+        count /= 1000.0
+    return '{:.1f} GB'.format(count)
 
-def _local_refresh_token(user_email, url):
-    dirpath = os.path.join(CLOUD_API_HOME_DIR, _dirname_for_url(url))
 
-    if os.path.isdir(dirpath):
-        candidate = os.path.join(dirpath, user_email)
-        if os.path.isfile(candidate):
-            with open(candidate, 'r') as refresh_file:
-                return refresh_file.read()
+class TransferMeter(object):
+    """
+    Count the bytes of a transfer and report them to progress(done, total, rate) as they move,
+    with total None if unknown and rate in bytes per second.
+    """
 
-    return None
+    def __init__(self, total=None, progress=None):
+        self.total = total
+        self.done = 0
+        self.progress = progress
+        self.start_time = time.time()
+
+    @property
+    def elapsed(self):
+        return time.time() - self.start_time
 
+    @property
+    def rate(self):
+        elapsed = self.elapsed
+        return self.done / elapsed if elapsed > 0 else 0.0
 
-def _remove_local_refresh_token(user_email, url):
-    dirpath = os.path.join(CLOUD_API_HOME_DIR, _dirname_for_url(url))
+    def update(self, done):
+        self.done = done
+        if self.progress is not None:
+            self.progress(self.done, self.total, self.rate)
 
-    if os.path.isdir(dirpath):
-        candidate = os.path.join(dirpath, user_email)
-        if os.path.isfile(candidate):
-            os.remove(candidate)
+    def add(self, count):
+        self.update(self.done + count)
+
+    def describe(self):
+        return '{} in {:.1f}s, {}/s'.format(_format_bytes(self.done), self.elapsed,
+                                            _format_bytes(self.rate))
+
+
+def progress_printer(label, stream=None):
+    """
+    Return a progress callback that redraws one line on a terminal, and does nothing otherwise
+    """
+    stream = stream or sys.stderr
+    if not (hasattr(stream, 'isatty') and stream.isatty()):
+        return None
+
+    def progress(done, total, rate):
+        line = '{} {}'.format(label, _format_bytes(done))
+        if total:
+            line += ' of {} ({:.0f}%)'.format(_format_bytes(total), 100.0 * done / total)
+        stream.write('\r\x1b[2K{}, {}/s'.format(line, _format_bytes(rate)))
+        if total and done >= total:
+            stream.write('\n')
+        stream.flush()
+    return progress
+
+
+class _UploadBody(object):
+    """
+    Iterate over a file in chunks, gzip compressed if asked, so it can be sent with chunked
+    transfer encoding without reading it all into memory.
+    """
+
+    def __init__(self, path, compress=False, meter=None):
+        self.path = path
+        self.compress = compress
+        self.meter = meter
+        # Bytes handed to the connection, after compression.
+        self.sent = 0
+
+    def __iter__(self):
+        encoder = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if self.compress else None
+        with open(self.path, 'rb') as source:
+            while True:
+                chunk = source.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if self.meter is not None:
+                    self.meter.add(len(chunk))
+                if encoder is not None:
+                    chunk = encoder.compress(chunk)
+                # An empty chunk would end a chunked transfer early.
+                if chunk:
+                    self.sent += len(chunk)
+                    yield chunk
+        if encoder is not None:
+            chunk = encoder.flush()
+            self.sent += len(chunk)
+            yield chunk
+
+
+class CloudConfigCache(object):
+    """
+    Content-addressed store of the cloud configs fetched for a user, and the hash of the config
+    each vehicle last received from this computer.
+
+    Files live under ~/.skydio_cloud_api/<cloud url>/cloud_configs/<user_email>/:
+        <sha256>.pb      a fetched cloud config
+        vehicles.json    {vehicle: sha256 of the config it last received}
+        skillsets.json   {vehicle: {module: sha256} of the local skillset it last received}
+    """
+
+    # Serializes updates of vehicles.json and skillsets.json by concurrent uploads, along with
+    # a file lock against other processes.
+    _vehicles_lock = threading.Lock()
+
+    def __init__(self, user_email, cloud_url=DEFAULT_CLOUD_URL, home_dir=None):
+        self.dirpath = os.path.join(home_dir or CLOUD_API_HOME_DIR, _dirname_for_url(cloud_url),
+                                    'cloud_configs', user_email)
+        self._vehicles_path = os.path.join(self.dirpath, 'vehicles.json')
+        self._skillsets_path = os.path.join(self.dirpath, 'skillsets.json')
+
+    def path(self, digest):
+        return os.path.join(self.dirpath, '{}.pb'.format(digest))
+
+    def store(self, cconfig):
+        """
+        Store an encoded cloud config and return its hash
+        """
+        return self.store_chunks([cconfig])
+
+    def store_chunks(self, chunks):
+        """
+        Store an encoded cloud config given as an iterable of chunks and return its hash.
+
+        The chunks are hashed as they are written to a temporary file, which is then renamed into
+        place, so the config is never held in memory.
+        """
+        if not os.path.isdir(self.dirpath):
+            os.makedirs(self.dirpath)
+        handle, tmp_path = tempfile.mkstemp(dir=self.dirpath, prefix='.tmp')
+        sha = hashlib.sha256()
+        try:
+            with os.fdopen(handle, 'wb') as tmp_file:
+                for chunk in chunks:
+                    sha.update(chunk)
+                    tmp_file.write(chunk)
+            digest = sha.hexdigest()
+            getattr(os, 'replace', os.rename)(tmp_path, self.path(digest))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return digest
+
+    def load(self, digest):
+        """
+        Return a stored cloud config, or None if it is not in the cache
+        """
+        if not os.path.isfile(self.path(digest)):
+            return None
+        with open(self.path(digest), 'rb') as config_file:
+            return config_file.read()
+
+    @staticmethod
+    def _load_json(path):
+        if not os.path.isfile(path):
+            return {}
+        with open(path, 'r') as json_file:
+            return json.load(json_file)
+
+    @staticmethod
+    def _update_json(path, key, value):
+        data = CloudConfigCache._load_json(path)
+        if value is None and key not in data:
+            return
+        if value is None:
+            del data[key]
+        else:
+            data[key] = value
+        _atomic_write(path, json.dumps(data, indent=2, sort_keys=True).encode('utf-8'))
+
+    def vehicles(self):
+        return self._load_json(self._vehicles_path)
+
+    def vehicle_digest(self, vehicle):
+        """
+        Hash of the cloud config the vehicle last received, or None if unknown
+        """
+        return self.vehicles().get(vehicle)
+
+    def vehicle_skillset(self, vehicle):
+        """
+        {module: sha256} of the local skillset the vehicle last received, or None if unknown
+        """
+        return self._load_json(self._skillsets_path).get(vehicle)
+
+    def record_vehicle(self, vehicle, digest, skillset=None):
+        with self._vehicles_lock, _file_lock(self._vehicles_path):
+            self._update_json(self._vehicles_path, vehicle, digest)
+            self._update_json(self._skillsets_path, vehicle, skillset)
+
+    def forget_vehicle(self, vehicle):
+        with self._vehicles_lock, _file_lock(self._vehicles_path):
+            self._update_json(self._vehicles_path, vehicle, None)
+            self._update_json(self._skillsets_path, vehicle, None)
+
+    def prune(self, keep=5):
+        """
+        Remove all but the newest `keep` configs, except those a vehicle last received
+        """
+        if not os.path.isdir(self.dirpath):
+            return
+        in_use = set(self.vehicles().values())
+        paths = [os.path.join(self.dirpath, name) for name in os.listdir(self.dirpath)
+                 if name.endswith('.pb') and name[:-3] not in in_use]
+        paths.sort(key=os.path.getmtime, reverse=True)
+        for path in paths[keep:]:
+            os.remove(path)
 
 
 class AttrDict(dict):
@@ -107,29 +401,162 @@ class AttrDict(dict):
             return item
 
 
+class TokenManager(object):
+    """
+    The tokens of one user on one Cloud API url, shared by every CloudAPIClient for them in the
+    process.
+
+    The refresh token is read from the store once, and the access token is kept in memory with
+    its expiry. While any client is open, the access token is refreshed in the background
+    shortly before it expires, so requests don't fail with an expired token first.
+    """
+    # Refresh this many seconds before the access token expires, or at half its remaining
+    # lifetime if that is sooner.
+    REFRESH_MARGIN = 60
+
+    _managers = {}
+    _managers_lock = threading.Lock()
+
+    def __init__(self, url, user_email, use_stored_tokens=True):
+        self.url = url
+        self.user_email = user_email
+        self.log = logging.getLogger(LOGGER_NAME)
+        self.access_token = None
+        self.expires_at = None
+        self.refresh_token = _local_refresh_token(user_email, url) if use_stored_tokens else None
+        # Held for the duration of a refresh, so concurrent clients share one.
+        self.refresh_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._timer = None
+        self._clients = []
+
+    @classmethod
+    def shared(cls, url, user_email, use_stored_tokens=True):
+        """
+        Return the TokenManager for this user and url, creating it on first use
+        """
+        key = (url.rstrip('/'), user_email)
+        with cls._managers_lock:
+            manager = cls._managers.get(key)
+            if manager is None:
+                manager = cls._managers[key] = cls(url, user_email, use_stored_tokens)
+            return manager
+
+    def set_access_token(self, token, expires_in=None):
+        """
+        Keep a new access token, with its expiry from the token itself or `expires_in` seconds
+        """
+        expires_at = _token_expiry(token) if token else None
+        if expires_at is None and token and expires_in:
+            expires_at = time.time() + float(expires_in)
+        with self._lock:
+            self.access_token = token
+            self.expires_at = expires_at
+        self._schedule()
+
+    def expiring(self):
+        """
+        Whether the access token is due to be refreshed
+        """
+        with self._lock:
+            return (self.access_token is not None and self.expires_at is not None
+                    and time.time() >= self._refresh_time())
+
+    def open(self, client):
+        with self._lock:
+            self._clients.append(client)
+        self._schedule()
+
+    def close(self, client):
+        with self._lock:
+            if client in self._clients:
+                self._clients.remove(client)
+            if not self._clients and self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _refresh_time(self):
+        remaining = self.expires_at - time.time()
+        return self.expires_at - min(self.REFRESH_MARGIN, remaining / 2.0)
+
+    def _schedule(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._clients or self.expires_at is None or self.refresh_token is None:
+                return
+            delay = max(self._refresh_time() - time.time(), 0.0)
+            self._timer = threading.Timer(delay, self._background_refresh,
+                                          args=(self.access_token,))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _background_refresh(self, expired_token):
+        with self._lock:
+            if not self._clients:
+                return
+            # Refresh with the most recently opened client.
+            client = self._clients[-1]
+        try:
+            client._refresh_once(expired_token)  # pylint: disable=protected-access
+        except (CloudAPIException, requests.RequestException) as err:
+            # The next request will try again.
+            self.log.debug("Background refresh of the access token failed: {}".format(err))
+
+
 class CloudAPIClient(object):
     """
     A base client which sets the correct headers to interact with the API and parses application
     errors appropriately
+
+    Clients for the same user and url share their tokens through a TokenManager.
     """
     BASE_HEADERS = {'Content-Type': 'application/json'}
     LOGGING_CONFIGURED = False
 
     def __init__(self, url, user_email, access_token=None, refresh_token=None,
-                 use_stored_tokens=True):
+                 use_stored_tokens=True, pool_size=10, max_retries=3, retry_backoff=0.25,
+                 token_manager=None):
         self.url = url
         self.log = logging.getLogger(LOGGER_NAME)
         self._use_stored_tokens = use_stored_tokens
 
+        # One keep-alive session per client, so requests reuse connections to the API.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
         self.user_email = user_email
-        self.access_token = access_token
-        self.refresh_token = refresh_token
-        if not self.refresh_token and self._use_stored_tokens:
-            self.refresh_token = _local_refresh_token(user_email, url)
+        self.tokens = token_manager or TokenManager.shared(url, user_email, use_stored_tokens)
+        self.tokens.open(self)
+        if refresh_token:
+            self.refresh_token = refresh_token
+        if access_token:
+            self.access_token = access_token
 
         self.device_id = 'python_client_{}'.format(socket.gethostname())
         self.client_key = "python_client"
 
+    @property
+    def access_token(self):
+        return self.tokens.access_token
+
+    @access_token.setter
+    def access_token(self, token):
+        self.tokens.set_access_token(token)
+
+    @property
+    def refresh_token(self):
+        return self.tokens.refresh_token
+
+    @refresh_token.setter
+    def refresh_token(self, token):
+        self.tokens.refresh_token = token
+
     def login_interactive(self):
         """
         Check if we have the required auth tokens, else call login and prompt the user to enter
@@ -163,8 +590,8 @@ class CloudAPIClient(object):
                                                 "device_id": self.device_id,
                                                 "client_key": self.client_key},
                           skip_token_check=True)
-        self.access_token = reply.access_token
         self.refresh_token = reply.refresh_token
+        self.tokens.set_access_token(reply.access_token, reply.get('expires_in'))
 
         if self._use_stored_tokens:
             _store_local_refresh_token(self.user_email, self.refresh_token, self.url)
@@ -177,15 +604,35 @@ class CloudAPIClient(object):
         try:
             reply = self.post('auth/refresh', skip_token_check=True,  # pylint: disable=unexpected-keyword-arg
                               use_refresh_token=True, skip_auto_refresh=True)
-            self.access_token = reply.access_token
+            self.tokens.set_access_token(reply.access_token, reply.get('expires_in'))
         except CloudAPIException as err:
             if err.code in (3100, 3300):
                 if self._use_stored_tokens:
-                    if _local_refresh_token(self.user_email, self.url) == self.refresh_token:
-                        # the refresh token expired, delete any cached entry so we re-auth
-                        _remove_local_refresh_token(self.user_email, self.url)
+                    # the refresh token expired, delete any cached entry so we re-auth
+                    _remove_local_refresh_token(self.user_email, self.url, self.refresh_token)
             raise
 
+    def _refresh_once(self, expired_token):
+        """
+        Refresh the access token, unless another thread already replaced `expired_token`.
+
+        Callers that arrive while a refresh is in flight wait for it and reuse its result, across
+        all the clients sharing this client's tokens.
+        """
+        with self.tokens.refresh_lock:
+            if self.access_token != expired_token:
+                return
+            self.log.debug("Refreshing access token...")
+            self.refresh()
+
+    def close(self):
+        """
+        Close the pooled connections, and stop refreshing the access token in the background if
+        no other client for this user is open
+        """
+        self.session.close()
+        self.tokens.close(self)
+
     @classmethod
     def log_to_stdout(cls, debug=True):
         if cls.LOGGING_CONFIGURED:
@@ -203,9 +650,39 @@ class CloudAPIClient(object):
     def _endpoint(self, route):
         return "{}/{}".format(self.url.rstrip('/'), route.lstrip('/'))
 
+    def _request(self, method, route, idempotent, **kwargs):
+        """
+        Send a request on the session, retrying idempotent requests after transient failures
+        with exponential backoff and full jitter.
+        """
+        attempts = 1 + (self.max_retries if idempotent else 0)
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            try:
+                res = self.session.request(method, url=self._endpoint(route), **kwargs)
+                if res.status_code not in RETRY_STATUS_CODES or last_attempt:
+                    return res
+                # Release the connection of a streamed reply before trying again.
+                res.close()
+                reason = 'HTTP {}'.format(res.status_code)
+            except (requests.ConnectionError, requests.Timeout) as err:
+                if last_attempt:
+                    raise
+                reason = err.__class__.__name__
+            delay = random.uniform(0, self.retry_backoff * 2 ** attempt)
+            self.log.debug('{} {} failed ({}), retrying in {:.2f}s'.format(
+                method.upper(), route, reason, delay))
+            time.sleep(delay)
+
     @_refresh_if_needed
     def post(self, route, data=None, timeout=3, skip_token_check=False, use_refresh_token=False,
-             send_proto_data=False):
+             send_proto_data=False, idempotent=None, stream=False):
+        """
+        POST to a route and return the reply data.
+
+        With stream=True a protobuf reply is returned as the unread requests.Response, for the
+        caller to read with iter_content() and close.
+        """
         headers = dict()
         headers.update(self.BASE_HEADERS)
 
@@ -227,8 +704,11 @@ class CloudAPIClient(object):
         else:
             headers['Content-Type'] = 'application/json'
             data = json.dumps(data)
-        res = requests.post(url=endpoint, data=data, timeout=timeout, headers=headers)
-        return self._handle_response('post', route, res)
+        if idempotent is None:
+            idempotent = route in IDEMPOTENT_POST_ROUTES
+        res = self._request('post', route, idempotent, data=data, timeout=timeout,
+                            headers=headers, stream=stream)
+        return self._handle_response('post', route, res, stream=stream)
 
     @_refresh_if_needed
     def get(self, route, params=None, timeout=3, skip_token_check=False):
@@ -243,10 +723,10 @@ class CloudAPIClient(object):
 
         endpoint = self._endpoint(route)
         self.log.debug('GET {}'.format(endpoint))
-        res = requests.get(url=endpoint, params=params, timeout=timeout, headers=headers)
+        res = self._request('get', route, True, params=params, timeout=timeout, headers=headers)
         return self._handle_response('get', route, res)
 
-    def _handle_response(self, method, route, res):
+    def _handle_response(self, method, route, res, stream=False):
         assert isinstance(res, requests.Response)
 
         # The API should respond with a 200 status code for all requests and application-level
@@ -256,11 +736,13 @@ class CloudAPIClient(object):
         try:
             res.raise_for_status()
         except requests.HTTPError as err:
-            raise CloudAPIException(method, route, error=err.message, code=res.status_code)
+            res.close()
+            raise CloudAPIException(method, route, error=str(err), code=res.status_code)
 
         # Check for any errors
         error_code = int(res.headers[CODE_HEADER])
         if error_code != 0:
+            res.close()
             raise CloudAPIException(method, route, code=error_code)
 
         if res.headers['Content-Type'] == 'application/json':
@@ -268,7 +750,7 @@ class CloudAPIClient(object):
                 reply = res.json()
             except ValueError as err:
                 raise CloudAPIException(method, route,
-                                        error="Couldn't decode json: {}".format(err.message))
+                                        error="Couldn't decode json: {}".format(err))
 
             # convert to attribute dict
             reply = AttrDict(**reply)
@@ -276,21 +758,22 @@ class CloudAPIClient(object):
             return reply.data
 
         elif res.headers['Content-Type'] == 'application/x-protobuf':
+            if stream:
+                return res
             return res.content
 
 
-def update_cloud_config_on_vehicle(user_email, vehicle_url, vehicle_access_token,
-                                   cloud_url=DEFAULT_CLOUD_URL):
+def fetch_cloud_config(user_email, cloud_url=DEFAULT_CLOUD_URL, progress=None):
     """
-    Retrieve the cloud config (which includes skillsets) for the given user_email from the
-    Skydio Cloud API and upload to the vehicle.
+    Log in and download the encoded cloud config for the given user_email into the cache.
 
-    If this is the first time running this script on this computer an interactive prompt
-    will be shown to get the login_code sent to the user_email. After that it should persist.
+    The config is streamed to disk in chunks, gzip compressed on the wire if the server offers
+    it, so memory use does not grow with the size of the skillsets.
 
-    This function is dumber than what the Mobile App would do since it does not cache
-    any parts of the cloud config or decode the message such that we can determine if
-    it's necessary to send to the vehicle. We just send the full config to the vehicle every time.
+    Args:
+        progress (callable): called with (bytes received, total or None, bytes per second).
+
+    Returns the hash of the cloud config and the CloudConfigCache it was stored in.
     """
     if not cloud_url:
         cloud_url = DEFAULT_CLOUD_URL
@@ -301,15 +784,90 @@ def update_cloud_config_on_vehicle(user_email, vehicle_url, vehicle_access_token
     client.login_interactive()
 
     # Get the encoded cloud config from the api server
-    cconfig = client.post('cloud_config', '', timeout=5, send_proto_data=True)
+    res = client.post('cloud_config', '', timeout=5, send_proto_data=True, stream=True)
+    length = res.headers.get('Content-Length')
+    meter = TransferMeter(int(length) if length else None, progress)
+
+    def chunks():
+        for chunk in res.iter_content(CHUNK_SIZE):
+            # Count the bytes on the wire, which are compressed if the server chose to.
+            meter.update(res.raw.tell())
+            yield chunk
+
+    cache = CloudConfigCache(user_email, cloud_url)
+    try:
+        digest = cache.store_chunks(chunks())
+    finally:
+        res.close()
+        client.close()
+    client.log.info("Downloaded cloud config {} ({})".format(digest[:12], meter.describe()))
+    return digest, cache
+
+
+def push_cloud_config(vehicle_url, vehicle_access_token, digest, cache, vehicle_id=None,
+                      force=False, timeout=3, compress=False, progress=None, skillset_dir=None):
+    """
+    Upload a cached cloud config to a vehicle and restart its skills. With a vehicle_id, the
+    upload is skipped if the cache shows that vehicle already has the config.
+
+    The config is streamed from disk with chunked transfer encoding, so `timeout` bounds each
+    wait on the connection rather than the whole upload. With compress=True it is sent gzip
+    compressed, and sent again uncompressed if the vehicle replies that it does not accept
+    gzip (415 Unsupported Media Type).
+
+    With skillset_dir, the local skillset is compared module by module with the one the vehicle
+    last received, and the skills that changed are logged. The skills are restarted after every
+    upload regardless, since an upload means the config differs from the one last sent, and
+    the skills only read their settings when they start.
+
+    Args:
+        vehicle_id (str): identifies the vehicle in the cache, e.g. its serial number. Without
+            it the config is always uploaded, since every R1 reached over its own WiFi has the
+            same url.
+        progress (callable): called with (bytes sent, total, bytes per second).
+        skillset_dir (str): the local skillset the cloud config was built from.
+
+    Returns True if the config was uploaded, False if the upload was skipped.
+    """
+    log = logging.getLogger(LOGGER_NAME)
+    vehicle = vehicle_id or vehicle_url
+    delta = None
+    if skillset_dir:
+        from .skillset_delta import SkillsetDelta
+        base = cache.vehicle_skillset(vehicle_id) if vehicle_id else None
+        delta = SkillsetDelta.between(base, skillset_dir)
+        log.info("Vehicle {}: {}".format(vehicle, delta.describe()))
+    if not force and vehicle_id and cache.vehicle_digest(vehicle_id) == digest:
+        if delta is not None and not delta.empty:
+            log.warning("Cloud config {} does not include the local skillset changes yet, "
+                        "is the skillset synced to the cloud?".format(digest[:12]))
+        log.info("Vehicle {} already has cloud config {}, skipping upload".format(
+            vehicle, digest[:12]))
+        return False
+    path = cache.path(digest)
+    if not os.path.isfile(path):
+        raise IOError("Cloud config {} is not in the cache".format(digest[:12]))
+    if vehicle_id:
+        # Until the upload succeeds we no longer know what the vehicle has.
+        cache.forget_vehicle(vehicle_id)
 
     # Send the encoded cloud config to the vehicle
-    res = requests.post(url="{}/api/update_cloud_config".format(vehicle_url),
-                        data=cconfig,
-                        headers={"Authorization": "Bearer {}".format(vehicle_access_token),
-                                 "Accept": "application/json",
-                                 "Content-Type": "application/x-protobuf"},
-                        timeout=3)
+    while True:
+        meter = TransferMeter(os.path.getsize(path), progress)
+        body = _UploadBody(path, compress=compress, meter=meter)
+        headers = {"Authorization": "Bearer {}".format(vehicle_access_token),
+                   "Accept": "application/json",
+                   "Content-Type": "application/x-protobuf"}
+        if compress:
+            headers["Content-Encoding"] = "gzip"
+        res = requests.post(url="{}/api/update_cloud_config".format(vehicle_url),
+                            data=body, headers=headers, timeout=timeout)
+        if compress and res.status_code == 415:
+            log.debug("Vehicle {} does not accept gzip ({}), sending uncompressed".format(
+                vehicle, res.headers.get('Accept-Encoding', 'no Accept-Encoding')))
+            compress = False
+            continue
+        break
     # Raise an exception if we errored in sending the cloud config
     res.raise_for_status()
 
@@ -322,6 +880,48 @@ def update_cloud_config_on_vehicle(user_email, vehicle_url, vehicle_access_token
                            "Content-Type": "application/json"},
                   timeout=20)
 
+    if vehicle_id:
+        cache.record_vehicle(vehicle_id, digest, delta.new if delta is not None else None)
+    sent = meter.describe()
+    if compress:
+        sent += ', {} compressed'.format(_format_bytes(body.sent))
+    log.info("Sent cloud config {} to vehicle {} ({})".format(digest[:12], vehicle, sent))
+    return True
+
+
+def update_cloud_config_on_vehicle(user_email, vehicle_url, vehicle_access_token,
+                                   cloud_url=DEFAULT_CLOUD_URL, vehicle_id=None, force=False,
+                                   compress=False, progress=False, skillset_dir=None):
+    """
+    Retrieve the cloud config (which includes skillsets) for the given user_email from the
+    Skydio Cloud API and upload to the vehicle.
+
+    If this is the first time running this script on this computer an interactive prompt
+    will be shown to get the login_code sent to the user_email. After that it should persist.
+
+    Fetched configs are stored in a CloudConfigCache along with the hash each vehicle last
+    received, by vehicle_id. If a vehicle_id is given and that vehicle already has this exact
+    config, neither the upload nor the skills restart is done. Without a vehicle_id the config
+    is always uploaded, since the url is the same for every R1 reached over its own WiFi. The
+    cache only knows about uploads from this computer, so pass force=True after the config was
+    changed some other way, e.g. from a phone.
+
+    The config is streamed through disk both ways, see fetch_cloud_config and
+    push_cloud_config. Pass compress=True to gzip the upload, and progress=True to show the
+    progress of each transfer on a terminal. Pass skillset_dir, the local skillset being
+    edited, to report which skills changed.
+
+    Returns the hash of the cloud config.
+    """
+    digest, cache = fetch_cloud_config(
+        user_email, cloud_url, progress=progress_printer('Downloading') if progress else None)
+    push_cloud_config(vehicle_url, vehicle_access_token, digest, cache,
+                      vehicle_id=vehicle_id, force=force, compress=compress,
+                      progress=progress_printer('Uploading') if progress else None,
+                      skillset_dir=skillset_dir)
+    cache.prune()
+    return digest
+
 
 def main():
     parser = argparse.ArgumentParser(description="Update the skillsets on a vehicle from the cloud")
@@ -332,8 +932,19 @@ def main():
     parser.add_argument('access_token', type=str, help='A PILOT access_token for the vehicle')
     parser.add_argument('--skydio-api-url', type=str, default=DEFAULT_CLOUD_URL,
                         help='Override the skydio api url')
+    parser.add_argument('--vehicle-id', type=str,
+                        help='Identifies the vehicle in the cache of uploaded configs, e.g. its '
+                             'serial number. Without it the config is always uploaded')
+    parser.add_argument('--force', action='store_true',
+                        help='Upload the config even if the vehicle should already have it')
+    parser.add_argument('--compress', action='store_true',
+                        help='Gzip the upload, if the vehicle accepts it')
+    parser.add_argument('--skillset', type=str, metavar='DIR',
+                        help='The local skillset, to report which skills changed')
 
     args = parser.parse_args()
 
     update_cloud_config_on_vehicle(args.user_email, args.vehicle_url, args.access_token,
-                                   cloud_url=args.skydio_api_url)
+                                   cloud_url=args.skydio_api_url, vehicle_id=args.vehicle_id,
+                                   force=args.force, compress=args.compress, progress=True,
+                                   skillset_dir=args.skillset)
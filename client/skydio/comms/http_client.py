@@ -105,7 +105,8 @@ class HTTPClient(object):
         self.access_token = response.get('accessToken')
         fmt_out("Received access token:\n{}\n", self.access_token)
 
-    def update_skillsets(self, user_email, api_url=None):
+    def update_skillsets(self, user_email, api_url=None, force=False, compress=False,
+                         vehicle_id=None):
         """
         Update the skillsets available on the vehicle without needing a Skydio Mobile App to do so.
 
@@ -121,14 +122,24 @@ class HTTPClient(object):
             user_email (str): The user to download skillsets for, this should match the email
                     used on the Developer Console and on Mobile Apps
             api_url (str): [optional] Override the Skydio Cloud API url to use
+            force (bool): [optional] Upload even if the vehicle should already have this config
+            compress (bool): [optional] Gzip the upload, if the vehicle accepts it
+            vehicle_id (str): [optional] Identifies the vehicle, e.g. its serial number, so that
+                    the upload is skipped if it already has this config. Without it the config
+                    is always uploaded
 
+        Returns:
+            str: the hash of the cloud config on the vehicle
         """
         from skydio.cloud.update_util import update_cloud_config_on_vehicle
 
         return update_cloud_config_on_vehicle(user_email=user_email,
                                               vehicle_url=self.baseurl,
                                               vehicle_access_token=self.access_token,
-                                              cloud_url=api_url)
+                                              cloud_url=api_url,
+                                              vehicle_id=vehicle_id,
+                                              force=force,
+                                              compress=compress)
 
     def request_json(self, endpoint, json_data=None, timeout=20):
         """ Send a GET or POST request to the vehicle and get a parsed JSON response.
@@ -0,0 +1,211 @@
+"""
+Latency measurement
+
+Trackers that turn send, receive and display timestamps into latency histograms:
+
+    CommandTracker      command round trip, from CustomRpcRequest.utime to the status echo
+    MotionTracker       command-to-motion, from the first non-zero command to measured speed
+    FrameAgeTracker     age of a video frame when it is received and when it is displayed
+
+All times are in seconds from time.time(), so every tracker can be fed from the same clock.
+"""
+# Prep for python3
+from __future__ import absolute_import
+from __future__ import print_function
+
+import bisect
+from collections import OrderedDict
+import math
+
+from skydio.streaming.rtp import TIMESTAMP_MOD
+from skydio.streaming.rtp import Unwrapper
+from skydio.streaming.rtp import VIDEO_CLOCK_RATE
+
+# Histogram bucket upper edges in seconds: 1ms to 2s, roughly logarithmic.
+DEFAULT_BUCKETS = (0.001, 0.002, 0.005, 0.010, 0.020, 0.030, 0.050, 0.075, 0.100, 0.150,
+                   0.200, 0.300, 0.500, 0.750, 1.0, 2.0)
+
+
+class LatencyHistogram(object):
+    """
+    Collect latency samples and summarize them.
+
+    Samples are kept, so percentiles are exact. A harness run collects a few thousand at most.
+    """
+
+    def __init__(self, name, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.samples = []
+
+    def __len__(self):
+        return len(self.samples)
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+
+    def percentile(self, percent):
+        """ The given percentile of the samples, or None if there are none. """
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        rank = int(math.ceil(percent / 100.0 * len(ordered))) - 1
+        return ordered[min(max(rank, 0), len(ordered) - 1)]
+
+    def summary(self):
+        if not self.samples:
+            return {'count': 0}
+        return {
+            'count': len(self.samples),
+            'min': min(self.samples),
+            'mean': sum(self.samples) / len(self.samples),
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'max': max(self.samples),
+        }
+
+    def format(self, width=40):
+        """ Render the summary and an ascii histogram, in milliseconds. """
+        summary = self.summary()
+        if not summary['count']:
+            return '{}: no samples'.format(self.name)
+        lines = ['{}: {} samples, min {:.1f} mean {:.1f} p50 {:.1f} p90 {:.1f} p99 {:.1f} '
+                 'max {:.1f} ms'.format(self.name, summary['count'],
+                                        *[summary[key] * 1e3 for key in
+                                          ('min', 'mean', 'p50', 'p90', 'p99', 'max')])]
+        peak = max(self.counts)
+        first = next(i for i, count in enumerate(self.counts) if count)
+        last = max(i for i, count in enumerate(self.counts) if count)
+        for i in range(first, last + 1):
+            if i < len(self.buckets):
+                label = '<= {:6.0f} ms'.format(self.buckets[i] * 1e3)
+            else:
+                label = ' > {:6.0f} ms'.format(self.buckets[-1] * 1e3)
+            bar = '#' * int(round(width * self.counts[i] / float(peak)))
+            lines.append('  {} {:6d} {}'.format(label, self.counts[i], bar))
+        return '\n'.join(lines)
+
+
+class CommandTracker(object):
+    """
+    Measure command round trips through the RemoteControl status echo.
+
+    The skill publishes the `seq` of the last command it applied in every status. The first
+    status echoing a sequence number completes that command's round trip, which therefore
+    includes the skill's update period. Commands superseded before they were echoed are
+    counted but not sampled.
+    """
+
+    def __init__(self, histogram=None):
+        self.histogram = histogram or LatencyHistogram('command rtt')
+        self.sent = {}
+        self.last_echo = None
+        self.superseded = 0
+
+    def stamp(self, seq, utime):
+        """ Record that command `seq` was sent with CustomRpcRequest.utime `utime`. """
+        self.sent[seq] = utime / 1e6
+
+    def echo(self, seq, receive_time):
+        """ Record a status echoing command `seq`. Returns the round trip, or None. """
+        if seq is None or seq == self.last_echo:
+            return None
+        self.last_echo = seq
+        send_time = self.sent.pop(seq, None)
+        for older in [key for key in self.sent if key < seq]:
+            del self.sent[older]
+            self.superseded += 1
+        if send_time is None:
+            return None
+        rtt = receive_time - send_time
+        self.histogram.add(rtt)
+        return rtt
+
+
+class MotionTracker(object):
+    """
+    Measure the delay from commanding motion to the vehicle reporting it.
+
+    A measurement starts when the commanded velocity goes from zero to non-zero, and ends
+    at the first status whose speed reaches `threshold` of the commanded speed. Commands
+    must return to zero before the next measurement starts.
+    """
+
+    def __init__(self, threshold=0.5, histogram=None):
+        self.threshold = threshold
+        self.histogram = histogram or LatencyHistogram('command to motion')
+        self.start_time = None
+        self.target_speed = 0.0
+
+    def command(self, velocity, send_time):
+        """ Record a velocity command [vx, vy, vz] sent at send_time. """
+        speed = math.sqrt(sum(v * v for v in velocity))
+        if speed == 0:
+            self.start_time = None
+        elif self.target_speed == 0:
+            self.start_time = send_time
+        self.target_speed = speed
+
+    def status(self, speed, receive_time):
+        """ Record a reported speed. Returns the delay if this completes a measurement. """
+        if self.start_time is None or speed < self.threshold * self.target_speed:
+            return None
+        delay = receive_time - self.start_time
+        self.start_time = None
+        self.histogram.add(delay)
+        return delay
+
+
+class FrameAgeTracker(object):
+    """
+    Measure how old video frames are when they are received and when they are displayed.
+
+    The capture time of a frame is recovered from its RTP timestamp. With `wall_clock`
+    set, timestamps are taken to be wall time in clock-rate units, as sent by the stand-in
+    vehicle, and ages are absolute. Otherwise ages are relative to the fastest frame seen,
+    which still shows how much delay the receive and display path adds on top of the
+    network's best case.
+    """
+
+    def __init__(self, wall_clock=False, clock_rate=VIDEO_CLOCK_RATE):
+        self.wall_clock = wall_clock
+        self.clock_rate = float(clock_rate)
+        self.received = LatencyHistogram('frame age at receive')
+        self.displayed = LatencyHistogram('frame age at display')
+        self._unwrapper = Unwrapper(TIMESTAMP_MOD)
+        self._min_offset = None
+        self._receive_times = OrderedDict()
+
+    def capture_time(self, rtp_timestamp, near_time):
+        """ Estimated capture time of a frame, in seconds. """
+        if self.wall_clock:
+            period = TIMESTAMP_MOD / self.clock_rate
+            media_time = rtp_timestamp / self.clock_rate
+            return media_time + round((near_time - media_time) / period) * period
+        media_time = self._unwrapper.unwrap(rtp_timestamp) / self.clock_rate
+        offset = near_time - media_time
+        if self._min_offset is None or offset < self._min_offset:
+            self._min_offset = offset
+        return media_time + self._min_offset
+
+    def receive(self, rtp_timestamp, receive_time):
+        """ Record that the last packet of a frame was received. """
+        age = receive_time - self.capture_time(rtp_timestamp, receive_time)
+        self._receive_times[rtp_timestamp] = receive_time
+        self.received.add(age)
+        return age
+
+    def display(self, rtp_timestamp, display_time):
+        """ Record that a frame was displayed. Frames received before it were skipped. """
+        receive_time = display_time
+        while self._receive_times:
+            timestamp, time_received = self._receive_times.popitem(last=False)
+            if timestamp == rtp_timestamp:
+                receive_time = time_received
+                break
+        age = display_time - self.capture_time(rtp_timestamp, receive_time)
+        self.displayed.add(age)
+        return age
@@ -0,0 +1,195 @@
+"""
+Session logs
+
+Record what a pilot did, the command axes read from the gamepad or keyboard and every payload
+sent to the vehicle, into a compact binary log. Replay it later to drive a UDPLink with the
+original timing, or as fast as possible, without a human or a controller.
+
+Log layout:
+    8 byte header: magic b'SKSL', version, 3 reserved bytes
+    records: 8 byte time offset from the start of the session, 1 byte record type, then
+        COMMAND     1 byte source, 5 float32 axes
+        SKILL_KEY   2 byte key id, 2 byte length, utf-8 skill key (defines a key id)
+        PAYLOAD     2 byte key id, 4 byte length, payload bytes
+"""
+# Prep for python3
+from __future__ import absolute_import
+from __future__ import print_function
+
+from collections import namedtuple
+import json
+import struct
+import time
+
+LOG_MAGIC = b'SKSL'
+LOG_VERSION = 1
+LOG_HEADER = struct.Struct('<4sB3x')
+RECORD_HEADER = struct.Struct('<dB')
+
+RECORD_COMMAND = 1
+RECORD_SKILL_KEY = 2
+RECORD_PAYLOAD = 3
+COMMAND = struct.Struct('<B5f')
+SKILL_KEY = struct.Struct('<HH')
+PAYLOAD = struct.Struct('<HI')
+
+SOURCE_KEYBOARD = 0
+SOURCE_GAMEPAD = 1
+SOURCE_NAMES = {SOURCE_KEYBOARD: 'keyboard', SOURCE_GAMEPAD: 'gamepad'}
+
+CommandRecord = namedtuple('CommandRecord', ['time', 'source', 'axes'])
+PayloadRecord = namedtuple('PayloadRecord', ['time', 'skill_key', 'data'])
+
+
+class SessionRecorder(object):
+    """
+    Append command axes and sent payloads to a session log.
+
+    Args:
+        path (str): the log file to create.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'wb')
+        self.file.write(LOG_HEADER.pack(LOG_MAGIC, LOG_VERSION))
+        self.start_time = time.time()
+        self.key_ids = {}
+        self.records = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def record_command(self, axes, source=SOURCE_GAMEPAD, now=None):
+        """ Record the command axes (velx, vely, velz, yaw_rate, pitch_rate). """
+        self._write(RECORD_COMMAND, COMMAND.pack(source, *axes), now)
+
+    def record_payload(self, skill_key, data, now=None):
+        """ Record a payload sent to a skill. """
+        key_id = self.key_ids.get(skill_key)
+        if key_id is None:
+            key_id = self.key_ids[skill_key] = len(self.key_ids)
+            encoded = skill_key.encode('utf-8')
+            self._write(RECORD_SKILL_KEY, SKILL_KEY.pack(key_id, len(encoded)) + encoded, now)
+        self._write(RECORD_PAYLOAD, PAYLOAD.pack(key_id, len(data)) + data, now)
+
+    def close(self):
+        self.file.close()
+
+    def _write(self, record_type, body, now):
+        if now is None:
+            now = time.time()
+        self.file.write(RECORD_HEADER.pack(now - self.start_time, record_type) + body)
+        self.records += 1
+
+
+class RecordingLink(object):
+    """
+    Wrap a UDPLink so that every payload it sends is also recorded.
+
+    Args:
+        link (UDPLink): the link to send with.
+        recorder (SessionRecorder): where to record the payloads.
+    """
+
+    def __init__(self, link, recorder):
+        self.link = link
+        self.recorder = recorder
+
+    def __getattr__(self, name):
+        return getattr(self.link, name)
+
+    def send_json(self, skill_key, json_obj):
+        return self.send_rpc_data(skill_key, json.dumps(json_obj).encode('utf-8'))
+
+    def send_rpc_data(self, skill_key, data):
+        utime = self.link.send_rpc_data(skill_key, data)
+        self.recorder.record_payload(skill_key, data, now=utime / 1e6)
+        return utime
+
+
+def read_session(path):
+    """ Yield the CommandRecords and PayloadRecords of a session log, in order. """
+    with open(path, 'rb') as log_file:
+        data = log_file.read()
+    if len(data) < LOG_HEADER.size:
+        raise ValueError('Session log too short: {}'.format(path))
+    magic, version = LOG_HEADER.unpack_from(data)
+    if magic != LOG_MAGIC or version != LOG_VERSION:
+        raise ValueError('Not a session log: {}'.format(path))
+
+    keys = {}
+    offset = LOG_HEADER.size
+    while offset + RECORD_HEADER.size <= len(data):
+        record_time, record_type = RECORD_HEADER.unpack_from(data, offset)
+        offset += RECORD_HEADER.size
+        if record_type == RECORD_COMMAND:
+            if offset + COMMAND.size > len(data):
+                break
+            fields = COMMAND.unpack_from(data, offset)
+            offset += COMMAND.size
+            yield CommandRecord(record_time, fields[0], fields[1:])
+        elif record_type == RECORD_SKILL_KEY:
+            if offset + SKILL_KEY.size > len(data):
+                break
+            key_id, size = SKILL_KEY.unpack_from(data, offset)
+            offset += SKILL_KEY.size
+            keys[key_id] = data[offset:offset + size].decode('utf-8')
+            offset += size
+        elif record_type == RECORD_PAYLOAD:
+            if offset + PAYLOAD.size > len(data):
+                break
+            key_id, size = PAYLOAD.unpack_from(data, offset)
+            offset += PAYLOAD.size
+            if offset + size > len(data):
+                # Truncated by a recorder that was killed.
+                break
+            yield PayloadRecord(record_time, keys[key_id], data[offset:offset + size])
+            offset += size
+        else:
+            raise ValueError('Unknown record type {} at offset {}'.format(
+                record_type, offset - RECORD_HEADER.size))
+
+
+def replay_session(path, link, speed=1.0, skill_key=None):
+    """
+    Send the payloads of a session log through a link.
+
+    Args:
+        path (str): the session log.
+        link (UDPLink): the link to send with.
+        speed (float): playback speed relative to the original timing, or None to send as
+            fast as possible. Playback starts at the first payload.
+        skill_key (str): send to this skill instead of the recorded one.
+
+    Returns:
+        dict: the number of payloads sent, the time taken, and for timed playback the mean
+            and worst lateness compared to the original timing, in seconds.
+    """
+    payloads = [record for record in read_session(path) if isinstance(record, PayloadRecord)]
+    # Skip the idle time before the first payload, e.g. waiting for takeoff.
+    first = payloads[0].time if payloads else 0.0
+    start = time.time()
+    total_lateness = 0.0
+    worst_lateness = 0.0
+    for record in payloads:
+        if speed is not None:
+            due = start + (record.time - first) / speed
+            wait = due - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            lateness = max(time.time() - due, 0.0)
+            total_lateness += lateness
+            worst_lateness = max(worst_lateness, lateness)
+        link.send_rpc_data(skill_key or record.skill_key, record.data)
+    elapsed = time.time() - start
+
+    stats = {'sent': len(payloads), 'elapsed': elapsed,
+             'rate': len(payloads) / elapsed if elapsed > 0 else 0.0}
+    if speed is not None and payloads:
+        stats['mean_lateness'] = total_lateness / len(payloads)
+        stats['max_lateness'] = worst_lateness
+    return stats
@@ -0,0 +1,199 @@
+"""
+Stand-in vehicle
+
+A local process that speaks enough of the vehicle's UDP link to exercise a client without an
+R1: it acknowledges subscriptions, runs a model of the RemoteControl skill that echoes
+commands in its status, and sends a synthetic RTP video stream whose timestamps are wall
+clock time, so frame ages can be measured exactly.
+"""
+# Prep for python3
+from __future__ import absolute_import
+from __future__ import print_function
+
+import heapq
+import json
+import math
+import socket
+import threading
+import time
+
+from skydio.streaming.rtp import TIMESTAMP_MOD
+from skydio.streaming.rtp import VIDEO_CLOCK_RATE
+from skydio.streaming.synthetic import SyntheticRtpSource
+from skydio.types import custom_comms_pb2
+from skydio.types import skybus_pb2
+from skydio.types.multipart_msg_t import multipart_msg_t
+
+# Matches COMMAND_TIMEOUT in the RemoteControl skill.
+COMMAND_TIMEOUT = 1.0
+
+
+class StandInVehicle(object):
+    """
+    Answer a UDPLink like the vehicle running the RemoteControl skill.
+
+    The modelled vehicle's speed approaches the commanded speed with a first-order lag, and
+    commands only take effect on the skill's next update, like on the real vehicle.
+
+    Args:
+        port (int): local UDP port for the link, a free port by default.
+        host (str): address to bind.
+        skill_key (str): skill key reported in the status messages.
+        update_rate (float): skill updates (and status messages) per second.
+        response_time (float): time constant of the speed response, in seconds.
+        video_port (int): if given, send a synthetic RTP stream to this local port.
+        fps (float): video frame rate.
+        network (NetworkEmulator): optional impairments applied to the video packets.
+    """
+
+    def __init__(self, port=0, host='127.0.0.1', skill_key='stand_in.remote.RemoteControl',
+                 update_rate=15.0, response_time=0.3, video_port=None, fps=15.0, network=None):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.settimeout(0.01)
+        self.sock.bind((host, port))
+        self.address = self.sock.getsockname()
+        self.skill_key = skill_key
+        self.update_rate = update_rate
+        self.response_time = response_time
+        self.video_port = video_port
+        self.fps = fps
+        self.network = network
+
+        self.client_address = None
+        self.command = None  # (receive time, velocity, seq)
+        self.velocity = [0.0, 0.0, 0.0]
+        self.position = [0.0, 0.0, 0.0]
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._status_id = 0
+        self._running = False
+        self._threads = []
+
+    def start(self):
+        self._running = True
+        targets = [self._link_loop, self._update_loop]
+        if self.video_port is not None:
+            targets.append(self._video_loop)
+        for target in targets:
+            thread = threading.Thread(target=target)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        self._running = False
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self.sock.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *_):
+        self.stop()
+
+    def _link_loop(self):
+        while self._running:
+            try:
+                data, address = self.sock.recvfrom(65536)
+            except socket.timeout:
+                continue
+            msg = multipart_msg_t.decode(data)
+            if msg.channel == 'PHONE_UDP_SUBSCRIPTION_LIST_PB':
+                subscriptions = skybus_pb2.SubscribedChannelList.FromString(msg.chunk_data)
+                ack = skybus_pb2.SubscriptionAck()
+                ack.utime = int(time.time() * 1e6)
+                ack.nonce = subscriptions.nonce
+                with self._lock:
+                    self.client_address = address
+                self._send(ack, 'PHONE_UDP_SUBSCRIPTION_ACK_PB', address)
+            elif msg.channel == 'CUSTOM_SKILL_RPC_REQUEST_PB':
+                request = custom_comms_pb2.CustomRpcRequest.FromString(msg.chunk_data)
+                self.requests += 1
+                self._handle_rpc(request.data, time.time())
+
+    def _handle_rpc(self, message, now):
+        data = json.loads(message.decode('utf-8'))
+        if 'move' in data:
+            with self._lock:
+                self.command = (now, [float(v) for v in data['move'][:3]], data.get('seq'))
+
+    def _update_loop(self):
+        period = 1.0 / self.update_rate
+        next_update = time.time()
+        while self._running:
+            next_update += period
+            time.sleep(max(next_update - time.time(), 0))
+            with self._lock:
+                status = self._update(time.time(), period)
+                address = self.client_address
+            if address is not None:
+                self._send(status, 'CUSTOM_SKILL_STATUS_PB', address)
+
+    def _update(self, now, dt):
+        if self.command is None or now - self.command[0] > COMMAND_TIMEOUT:
+            desired = [0.0, 0.0, 0.0]
+        else:
+            desired = self.command[1]
+        alpha = 1.0 - math.exp(-dt / self.response_time)
+        for axis in range(3):
+            self.velocity[axis] += alpha * (desired[axis] - self.velocity[axis])
+            self.position[axis] += self.velocity[axis] * dt
+
+        status = custom_comms_pb2.CustomSkillStatus()
+        status.utime = int(now * 1e6)
+        status.version = 1
+        status.skill_key = self.skill_key
+        status.data = json.dumps({
+            'speed': math.sqrt(sum(v * v for v in self.velocity)),
+            'position': self.position,
+            'command_seq': self.command[2] if self.command else None,
+        }).encode('utf-8')
+        return status
+
+    def _send(self, proto, channel, address):
+        msg = multipart_msg_t()
+        msg.id = self._status_id
+        self._status_id += 1
+        msg.chunk_data = proto.SerializeToString()
+        msg.channel = channel
+        msg.chunk_size = len(msg.chunk_data)
+        msg.chunk_count = 1
+        msg.chunk_index = 0
+        msg.total_size = msg.chunk_size
+        try:
+            self.sock.sendto(msg.encode(), address)
+        except socket.error:
+            # The socket is closed while stopping.
+            pass
+
+    def _video_loop(self):
+        start = time.time()
+        source = SyntheticRtpSource(
+            fps=self.fps, start_timestamp=int(start * VIDEO_CLOCK_RATE) % TIMESTAMP_MOD)
+        video_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        pending = []
+        count = 0
+        next_frame = start
+        try:
+            while self._running:
+                now = time.time()
+                if now >= next_frame:
+                    for packet in source.next_frame():
+                        arrival = now
+                        if self.network is not None:
+                            arrival = self.network.transit(now)
+                            if arrival is None:
+                                continue
+                        heapq.heappush(pending, (arrival, count, packet))
+                        count += 1
+                    next_frame = start + source.frame_index / source.fps
+                while pending and pending[0][0] <= now:
+                    video_sock.sendto(heapq.heappop(pending)[2].data,
+                                      ('127.0.0.1', self.video_port))
+                wake = next_frame if not pending else min(next_frame, pending[0][0])
+                time.sleep(min(max(wake - time.time(), 0), 0.01))
+        finally:
+            video_sock.close()
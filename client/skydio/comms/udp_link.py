@@ -69,8 +69,8 @@ class UDPLink(object):
             time.sleep(0.5)
 
     def send_json(self, skill_key, json_obj):
-        """ Send json data to the skill. """
-        self.send_rpc_data(skill_key, json.dumps(json_obj).encode('utf-8'))
+        """ Send json data to the skill. Returns the utime the request was stamped with. """
+        return self.send_rpc_data(skill_key, json.dumps(json_obj).encode('utf-8'))
 
     def send_rpc_data(self, skill_key, data):
         self.request.data = data
@@ -78,6 +78,7 @@ class UDPLink(object):
         self.request.skill_key = skill_key
         self.request.utime = int(time.time() * 1e6)
         self.send_proto(self.request, 'CUSTOM_SKILL_RPC_REQUEST_PB')
+        return self.request.utime
 
     def send_proto(self, proto, channel):
         data = proto.SerializeToString()
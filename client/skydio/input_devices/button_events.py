@@ -0,0 +1,154 @@
+"""
+Gamepad button events
+
+Detect button edges as gamepad event frames arrive, so no press is missed between polls, and
+call subscribers from a dispatcher thread:
+
+    PRESS           the button went down
+    RELEASE         the button came up
+    LONG_PRESS      the button has been held for `long_press` seconds, sent while still held
+    DOUBLE_PRESS    the button went down a second time within `double_press` seconds
+
+A double press also sends its PRESS events, so single presses are never delayed.
+"""
+# Prep for python3
+from __future__ import absolute_import
+from __future__ import print_function
+
+from collections import defaultdict
+from collections import namedtuple
+import threading
+import time
+import traceback
+
+try:
+    # python 2
+    from Queue import Empty
+    from Queue import Queue
+except ImportError:
+    # Python 3
+    from queue import Empty
+    from queue import Queue
+
+PRESS = 'press'
+RELEASE = 'release'
+LONG_PRESS = 'long_press'
+DOUBLE_PRESS = 'double_press'
+
+ButtonEvent = namedtuple('ButtonEvent', ['kind', 'button', 'timestamp'])
+
+
+class ButtonEventBus(object):
+    """
+    Turn button states into edge events and dispatch them to subscribers.
+
+    Feed it every frame of changes with process(). Buttons are the codes named BTN_*.
+
+    Args:
+        long_press (float): seconds a button must be held to send LONG_PRESS.
+        double_press (float): most seconds between two presses that make a DOUBLE_PRESS.
+    """
+
+    def __init__(self, long_press=0.8, double_press=0.3):
+        self.long_press = long_press
+        self.double_press = double_press
+        self._subscribers = defaultdict(list)
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._queue = Queue()
+        self._pressed = {}  # button -> (timestamp, local time) of presses awaiting LONG_PRESS
+        self._last_press = {}
+        self._states = {}
+        self._thread = None
+
+    def subscribe(self, button, kind, callback):
+        """
+        Call callback(event) on the dispatcher thread for every `kind` event of `button`.
+
+        Pass None as the button or kind to subscribe to all of them.
+        """
+        with self._lock:
+            self._subscribers[(button, kind)].append(callback)
+        self._start()
+
+    def unsubscribe(self, button, kind, callback):
+        with self._lock:
+            self._subscribers[(button, kind)].remove(callback)
+
+    def listen(self):
+        """ Return a Queue that receives every event, for consumers with their own loop. """
+        queue = Queue()
+        with self._lock:
+            self._listeners.append(queue)
+        self._start()
+        return queue
+
+    def process(self, timestamp, changes):
+        """ Detect edges in one frame of {code name: value} changes. """
+        for button, value in changes.items():
+            if not button.startswith('BTN_'):
+                continue
+            pressed = bool(value)
+            if pressed == self._states.get(button, False):
+                continue
+            self._states[button] = pressed
+            if self._thread is None:
+                # Nobody is listening yet.
+                continue
+            self._queue.put((PRESS if pressed else RELEASE, button, timestamp, time.time()))
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._dispatch_loop)
+                self._thread.daemon = True
+                self._thread.start()
+
+    def _dispatch_loop(self):
+        while True:
+            # Wake up in time to send the next LONG_PRESS.
+            timeout = None
+            if self._pressed:
+                first = min(local for _, local in self._pressed.values())
+                timeout = max(first + self.long_press - time.time(), 0.0)
+            try:
+                kind, button, timestamp, local_time = self._queue.get(timeout=timeout)
+            except Empty:
+                self._send_long_presses()
+                continue
+
+            self._send(ButtonEvent(kind, button, timestamp))
+            if kind == PRESS:
+                self._pressed[button] = (timestamp, local_time)
+                last = self._last_press.get(button)
+                if last is not None and timestamp - last <= self.double_press:
+                    self._send(ButtonEvent(DOUBLE_PRESS, button, timestamp))
+                    # A third press starts a new double press.
+                    timestamp = None
+                self._last_press[button] = timestamp
+            else:
+                self._pressed.pop(button, None)
+            self._send_long_presses()
+
+    def _send_long_presses(self):
+        now = time.time()
+        for button, (timestamp, local_time) in list(self._pressed.items()):
+            if now - local_time >= self.long_press:
+                del self._pressed[button]
+                self._send(ButtonEvent(LONG_PRESS, button, timestamp + self.long_press))
+
+    def _send(self, event):
+        with self._lock:
+            callbacks = (self._subscribers.get((event.button, event.kind), [])
+                         + self._subscribers.get((event.button, None), [])
+                         + self._subscribers.get((None, event.kind), [])
+                         + self._subscribers.get((None, None), []))
+            listeners = list(self._listeners)
+        for queue in listeners:
+            queue.put(event)
+        for callback in callbacks:
+            try:
+                callback(event)
+            except Exception:  # pylint: disable=broad-except
+                # A broken callback must not stop events reaching the others.
+                traceback.print_exc()
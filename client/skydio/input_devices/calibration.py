@@ -0,0 +1,251 @@
+"""
+Gamepad calibration
+
+A CalibrationProfile turns raw gamepad codes into the five command axes
+    (velx, vely, velz, yaw_rate, pitch_rate)
+with array operations over all axes at once: normalization by the learned center and range of
+each axis, a radial deadzone per stick, an expo response curve, mixing into command axes and
+scaling into command units.
+
+Profiles are learned with calibrate() and stored as JSON, one file per controller holding any
+number of named profiles.
+"""
+# Prep for python3
+from __future__ import absolute_import
+from __future__ import print_function
+
+import json
+import os
+import re
+import time
+
+import numpy as np
+
+COMMAND_AXES = ('velx', 'vely', 'velz', 'yaw_rate', 'pitch_rate')
+
+# Default location of the stored profiles.
+PROFILE_DIRECTORY = os.path.join(os.path.expanduser('~'), '.skydio', 'gamepads')
+
+
+class CalibrationProfile(object):
+    """
+    Calibration of a gamepad's axes, and how they map onto command axes.
+
+    Args:
+        name (str): profile name.
+        codes (list): event code names of the raw axes, e.g. 'ABS_X'.
+        minimums (list): lowest raw value of each axis.
+        maximums (list): highest raw value of each axis.
+        centers (list): raw value of each axis at rest. Triggers rest at their minimum.
+        sticks (list): pairs of indexes into `codes` that form a two axis stick, which share a
+            radial deadzone. Other axes get a deadzone of their own.
+        mix (list): one row per command axis, with the weight of each normalized raw axis.
+        deadzone (float): fraction of the range around the center that reads as zero.
+        expo (float): 0 for a linear response, up to 1 for a cubic one with fine control
+            around the center.
+        scales (list): multiplier of each command axis, in command units.
+    """
+
+    def __init__(self, name, codes, minimums, maximums, centers, sticks, mix, deadzone=0.05,
+                 expo=0.0, scales=(1.0, 1.0, 1.0, 1.0, 1.0)):
+        self.name = name
+        self.codes = list(codes)
+        self.minimums = np.asarray(minimums, dtype=float)
+        self.maximums = np.asarray(maximums, dtype=float)
+        self.centers = np.asarray(centers, dtype=float)
+        self.sticks = np.asarray(sticks, dtype=int).reshape(-1, 2)
+        self.mix = np.asarray(mix, dtype=float)
+        self.deadzone = float(deadzone)
+        self.expo = float(expo)
+        self.scales = np.asarray(scales, dtype=float)
+
+        # Axes that are not part of a stick get a deadzone of their own.
+        single = np.ones(len(self.codes), dtype=bool)
+        single[self.sticks.ravel()] = False
+        self._singles = np.flatnonzero(single)
+        # Half ranges on either side of the center, never zero.
+        self._negative_range = np.maximum(self.centers - self.minimums, 1.0)
+        self._positive_range = np.maximum(self.maximums - self.centers, 1.0)
+
+    def raw(self, codes):
+        """ The raw values of the profile's axes from a dict of code values. """
+        return np.array([codes.get(code, center) for code, center
+                         in zip(self.codes, self.centers)], dtype=float)
+
+    def normalize(self, raw):
+        """
+        Map raw values to [-1, 1], with 0 at the center, applying the deadzone and expo.
+
+        Works on a single sample, or on an (N, axes) array of samples.
+        """
+        offset = np.asarray(raw, dtype=float) - self.centers
+        values = np.where(offset < 0, offset / self._negative_range,
+                          offset / self._positive_range)
+        values = np.clip(values, -1.0, 1.0)
+
+        # Radial deadzone for sticks, rescaled so the output still starts at 0 and ends at 1.
+        magnitudes = np.empty_like(values)
+        stick_values = values[..., self.sticks]
+        stick_magnitudes = np.sqrt((stick_values ** 2).sum(axis=-1))
+        magnitudes[..., self.sticks[:, 0]] = stick_magnitudes
+        magnitudes[..., self.sticks[:, 1]] = stick_magnitudes
+        magnitudes[..., self._singles] = np.abs(values[..., self._singles])
+        gain = np.clip(magnitudes - self.deadzone, 0.0, None) / (1.0 - self.deadzone)
+        values = values * np.divide(gain, magnitudes, out=np.zeros_like(values),
+                                    where=magnitudes > 0)
+        values = np.clip(values, -1.0, 1.0)
+
+        return (1.0 - self.expo) * values + self.expo * values ** 3
+
+    def command(self, codes):
+        """ The normalized command axes, each in [-1, 1], from a dict of code values. """
+        return self.mix.dot(self.normalize(self.raw(codes)))
+
+    def scale(self, command):
+        """ Scale normalized command axes into command units. """
+        return np.asarray(command, dtype=float) * self.scales
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'codes': self.codes,
+            'minimums': self.minimums.tolist(),
+            'maximums': self.maximums.tolist(),
+            'centers': self.centers.tolist(),
+            'sticks': self.sticks.tolist(),
+            'mix': self.mix.tolist(),
+            'deadzone': self.deadzone,
+            'expo': self.expo,
+            'scales': self.scales.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def copy(self, **changes):
+        data = self.to_dict()
+        data.update(changes)
+        return self.from_dict(data)
+
+
+def f310_profile():
+    """
+    The layout of a Logitech Gamepad F310, which other XInput gamepads share.
+
+    Vehicle +X (pitch) is out the front, and corresponds to up on the right stick.
+    Vehicle +Y (roll) is out the left, and corresponds to left on the right stick.
+    Vehicle +Z (altitude) is out the top, and corresponds to up on the left stick.
+    Vehicle +yaw is counter-clockwise, and corresponds to left on the left stick.
+    Gimbal +pitch is looking down. Hold left trigger to look up, and right trigger to look down.
+    """
+    codes = ['ABS_X', 'ABS_Y', 'ABS_RX', 'ABS_RY', 'ABS_Z', 'ABS_RZ']
+    mix = [
+        [0, 0, 0, -1, 0, 0],  # velx: up on the right stick
+        [0, 0, -1, 0, 0, 0],  # vely: left on the right stick
+        [0, -1, 0, 0, 0, 0],  # velz: up on the left stick
+        [-1, 0, 0, 0, 0, 0],  # yaw_rate: left on the left stick
+        [0, 0, 0, 0, -1, 1],  # pitch_rate: right trigger minus left trigger
+    ]
+    return CalibrationProfile(
+        name='default',
+        codes=codes,
+        minimums=[-32768, -32768, -32768, -32768, 0, 0],
+        maximums=[32767, 32767, 32767, 32767, 255, 255],
+        centers=[0, 0, 0, 0, 0, 0],
+        sticks=[[0, 1], [2, 3]],
+        mix=mix,
+        deadzone=0.05,
+        scales=[
+            10,  # x-velocity [m/s]
+            10,  # y-velocity [m/s]
+            10,  # z-velocity [m/s]
+            1,  # yaw-rate [rad/s]
+            1,  # pitch-rate [rad/s]
+        ])
+
+
+def calibrate(gamepad, base=None, name='default', rest_time=2.0, move_time=8.0,
+              sample_rate=100.0):
+    """
+    Learn the centers and ranges of a gamepad's axes from a short capture.
+
+    Leave the sticks and triggers alone while the centers are measured, then move every stick
+    around its full circle and press every trigger all the way.
+
+    Args:
+        gamepad (Gamepad): the gamepad to calibrate.
+        base (CalibrationProfile): layout and response settings to keep, the F310 by default.
+        name (str): name of the new profile.
+        rest_time (float): seconds to measure the centers for.
+        move_time (float): seconds to measure the ranges for.
+        sample_rate (float): samples per second.
+
+    Returns:
+        CalibrationProfile: the calibrated profile.
+    """
+    base = base or f310_profile()
+
+    def capture(seconds):
+        samples = []
+        end = time.time() + seconds
+        while time.time() < end:
+            samples.append(base.raw(gamepad.state.codes))
+            time.sleep(1.0 / sample_rate)
+        return np.array(samples)
+
+    print('Calibrating: leave the sticks and triggers at rest...')
+    rest = capture(rest_time)
+    print('Now move both sticks around their full range and press both triggers fully...')
+    moving = np.vstack([rest, capture(move_time)])
+
+    centers = np.median(rest, axis=0)
+    minimums = moving.min(axis=0)
+    maximums = moving.max(axis=0)
+    # Axes that were never moved keep their base range rather than a useless empty one.
+    unmoved = maximums - minimums < 1.0
+    minimums[unmoved] = base.minimums[unmoved]
+    maximums[unmoved] = base.maximums[unmoved]
+    return base.copy(name=name, centers=centers.tolist(), minimums=minimums.tolist(),
+                     maximums=maximums.tolist())
+
+
+def _profile_path(controller, directory):
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', controller or 'gamepad').strip('_').lower()
+    return os.path.join(directory or PROFILE_DIRECTORY, slug + '.json')
+
+
+def list_profiles(controller, directory=None):
+    """ Names of the profiles stored for a controller. """
+    path = _profile_path(controller, directory)
+    if not os.path.exists(path):
+        return []
+    with open(path) as profile_file:
+        return sorted(json.load(profile_file))
+
+
+def load_profile(controller, name='default', directory=None):
+    """ Load a named profile for a controller, or None if it has not been stored. """
+    path = _profile_path(controller, directory)
+    if not os.path.exists(path):
+        return None
+    with open(path) as profile_file:
+        profiles = json.load(profile_file)
+    if name not in profiles:
+        return None
+    return CalibrationProfile.from_dict(profiles[name])
+
+
+def save_profile(profile, controller, directory=None):
+    """ Store a profile for a controller, replacing any profile with the same name. """
+    path = _profile_path(controller, directory)
+    profiles = {}
+    if os.path.exists(path):
+        with open(path) as profile_file:
+            profiles = json.load(profile_file)
+    profiles[profile.name] = profile.to_dict()
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    with open(path, 'w') as profile_file:
+        json.dump(profiles, profile_file, indent=2, sort_keys=True)
+    return path
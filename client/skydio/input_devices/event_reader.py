@@ -0,0 +1,273 @@
+"""
+Gamepad event readers
+
+Read gamepad events in frames: every event up to the next synchronization event, so one frame
+holds all the axes and buttons that changed together. Readers block until a frame arrives,
+so an idle gamepad costs no CPU.
+
+EvdevReader reads a Linux /dev/input/event* device directly and needs no extra packages.
+InputsReader wraps the `inputs` package, for other platforms.
+
+If the kernel's event buffer overflows it reports SYN_DROPPED, and the events up to the next
+synchronization are lost, like a stick returning to center. EvdevReader then reads the current
+value of every axis and button from the device and returns them as one frame, so no deflection
+stays latched.
+"""
+# Prep for python3
+from __future__ import absolute_import
+from __future__ import print_function
+
+import errno
+import glob
+import os
+import re
+import select
+import struct
+import time
+
+try:
+    import fcntl
+except ImportError:
+    # Not on Windows, where the `inputs` package is used instead.
+    fcntl = None
+
+# struct input_event from linux/input.h: a timeval, then type, code and value.
+INPUT_EVENT = struct.Struct('llHHi')
+
+EV_SYN = 0x00
+EV_KEY = 0x01
+EV_ABS = 0x03
+SYN_REPORT = 0
+SYN_DROPPED = 3
+# Number of axis and key codes, from linux/input-event-codes.h.
+ABS_CNT = 0x40
+KEY_CNT = 0x300
+# struct input_absinfo from linux/input.h: value, minimum, maximum, fuzz, flat, resolution.
+INPUT_ABSINFO = struct.Struct('6i')
+
+# Names of the codes gamepads use, matching the names used by the `inputs` package.
+EVENT_CODES = {
+    (EV_ABS, 0x00): 'ABS_X',
+    (EV_ABS, 0x01): 'ABS_Y',
+    (EV_ABS, 0x02): 'ABS_Z',
+    (EV_ABS, 0x03): 'ABS_RX',
+    (EV_ABS, 0x04): 'ABS_RY',
+    (EV_ABS, 0x05): 'ABS_RZ',
+    (EV_ABS, 0x10): 'ABS_HAT0X',
+    (EV_ABS, 0x11): 'ABS_HAT0Y',
+    (EV_KEY, 0x130): 'BTN_SOUTH',
+    (EV_KEY, 0x131): 'BTN_EAST',
+    (EV_KEY, 0x133): 'BTN_NORTH',
+    (EV_KEY, 0x134): 'BTN_WEST',
+    (EV_KEY, 0x136): 'BTN_TL',
+    (EV_KEY, 0x137): 'BTN_TR',
+    (EV_KEY, 0x138): 'BTN_TL2',
+    (EV_KEY, 0x139): 'BTN_TR2',
+    (EV_KEY, 0x13a): 'BTN_SELECT',
+    (EV_KEY, 0x13b): 'BTN_START',
+    (EV_KEY, 0x13c): 'BTN_MODE',
+    (EV_KEY, 0x13d): 'BTN_THUMBL',
+    (EV_KEY, 0x13e): 'BTN_THUMBR',
+}
+EVENT_TYPE_NAMES = {EV_KEY: 'BTN', EV_ABS: 'ABS'}
+
+
+def event_name(event_type, code):
+    """ The name of an event code, e.g. 'ABS_X', or 'ABS_0x28' for codes not in the table. """
+    name = EVENT_CODES.get((event_type, code))
+    if name is None:
+        name = '{}_{:#x}'.format(EVENT_TYPE_NAMES.get(event_type, event_type), code)
+    return name
+
+
+def _eviocg(number, size):
+    """ An evdev ioctl request reading size bytes, _IOR('E', number, size) in linux/input.h. """
+    return (2 << 30) | (size << 16) | (ord('E') << 8) | number
+
+
+def _eviocgbit(event_type, size):
+    return _eviocg(0x20 + event_type, size)
+
+
+def _eviocgkey(size):
+    return _eviocg(0x18, size)
+
+
+def _eviocgabs(axis):
+    return _eviocg(0x40 + axis, INPUT_ABSINFO.size)
+
+
+def _bits(data):
+    """ The indices of the bits set in a little endian bitmask. """
+    data = bytearray(data)
+    return [index for index in range(len(data) * 8) if data[index // 8] >> (index % 8) & 1]
+
+
+def find_gamepad_devices():
+    """
+    Return the /dev/input/event* paths of the connected joysticks and gamepads.
+
+    These are the event devices the kernel also exposes as a /dev/input/js* joystick.
+    """
+    paths = sorted(glob.glob('/dev/input/by-id/*-event-joystick'))
+    if paths:
+        return [os.path.realpath(path) for path in paths]
+    try:
+        with open('/proc/bus/input/devices') as devices_file:
+            devices = devices_file.read()
+    except IOError:
+        return []
+    paths = []
+    for handlers in re.findall(r'^H: Handlers=(.*)$', devices, re.MULTILINE):
+        names = handlers.split()
+        if any(name.startswith('js') for name in names):
+            paths.extend('/dev/input/' + name for name in names if name.startswith('event'))
+    return paths
+
+
+def device_name(path):
+    """ The name the kernel reports for an event device, e.g. 'Logitech Gamepad F310'. """
+    name_path = '/sys/class/input/{}/device/name'.format(os.path.basename(path))
+    try:
+        with open(name_path) as name_file:
+            return name_file.read().strip()
+    except IOError:
+        return os.path.basename(path)
+
+
+class EvdevReader(object):
+    """
+    Read event frames from a Linux event device.
+
+    Args:
+        path (str): the /dev/input/event* device, the first gamepad found by default.
+    """
+
+    def __init__(self, path=None):
+        if path is None:
+            paths = find_gamepad_devices()
+            if not paths:
+                raise IOError('No gamepad event devices found')
+            path = paths[0]
+        self.path = path
+        self.name = device_name(path)
+        self.fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+        self._buffer = b''
+        self._changes = {}
+        self._dropped = False
+        # The axes and buttons seen so far, to reset if the device state cannot be read.
+        self._seen = {}
+
+    def read(self, timeout=None):
+        """
+        Wait for events and return the complete frames read.
+
+        Args:
+            timeout (float): longest time to wait in seconds, forever by default.
+
+        Returns:
+            list: (timestamp, {code name: value}) tuples, one per frame, where the timestamp is
+                the kernel time of the frame's synchronization event. After events were
+                dropped, a frame holds every axis and button instead, see device_state().
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            self._buffer += os.read(self.fd, INPUT_EVENT.size * 64)
+        except OSError as error:
+            if error.errno in (errno.EAGAIN, errno.EINTR):
+                return []
+            raise
+
+        frames = []
+        count = len(self._buffer) // INPUT_EVENT.size
+        for i in range(count):
+            seconds, microseconds, event_type, code, value = INPUT_EVENT.unpack_from(
+                self._buffer, i * INPUT_EVENT.size)
+            if event_type == EV_SYN:
+                if code == SYN_REPORT:
+                    timestamp = seconds + microseconds * 1e-6
+                    if not self._dropped:
+                        frames.append((timestamp, self._changes))
+                    else:
+                        # Events up to here are incomplete, so read the whole state instead.
+                        frames.append((timestamp, self._resync()))
+                    self._changes = {}
+                    self._dropped = False
+                elif code == SYN_DROPPED:
+                    # The kernel buffer overflowed, so this frame is incomplete.
+                    self._dropped = True
+            elif event_type in (EV_KEY, EV_ABS):
+                name = event_name(event_type, code)
+                self._changes[name] = value
+                self._seen[name] = event_type
+        self._buffer = self._buffer[count * INPUT_EVENT.size:]
+        return frames
+
+    def _ioctl(self, request, size):
+        return fcntl.ioctl(self.fd, request, b'\0' * size)
+
+    def device_state(self):
+        """
+        The current value of every axis and button of the device, read from the kernel.
+
+        Raises IOError if the device cannot be queried.
+        """
+        if fcntl is None:
+            raise IOError('Cannot query {} without fcntl'.format(self.path))
+        state = {}
+        for axis in _bits(self._ioctl(_eviocgbit(EV_ABS, ABS_CNT // 8), ABS_CNT // 8)):
+            absinfo = self._ioctl(_eviocgabs(axis), INPUT_ABSINFO.size)
+            state[event_name(EV_ABS, axis)] = INPUT_ABSINFO.unpack(absinfo)[0]
+        pressed = set(_bits(self._ioctl(_eviocgkey(KEY_CNT // 8), KEY_CNT // 8)))
+        for key in _bits(self._ioctl(_eviocgbit(EV_KEY, KEY_CNT // 8), KEY_CNT // 8)):
+            state[event_name(EV_KEY, key)] = int(key in pressed)
+        return state
+
+    def _resync(self):
+        """
+        The frame that replaces dropped events: the device state, or if it cannot be read,
+        every button seen released and every axis seen None, which reads as at rest.
+        """
+        try:
+            return self.device_state()
+        except (IOError, OSError):
+            return dict((name, 0 if event_type == EV_KEY else None)
+                        for name, event_type in self._seen.items())
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class InputsReader(object):
+    """
+    Read event frames through the `inputs` package.
+
+    `inputs` only offers blocking reads, so the timeout is ignored.
+
+    Args:
+        device: an `inputs` gamepad, the first one by default.
+    """
+
+    def __init__(self, device=None):
+        import inputs
+        self.device = device or inputs.devices.gamepads[0]
+        self.name = self.device.name
+        self._changes = {}
+
+    def read(self, timeout=None):
+        """ Block for events and return the complete frames read, like EvdevReader.read. """
+        frames = []
+        for event in self.device.read():
+            if event.ev_type == 'Sync':
+                frames.append((event.timestamp or time.time(), self._changes))
+                self._changes = {}
+            elif event.ev_type in ('Absolute', 'Key'):
+                self._changes[event.code] = event.state
+        return frames
+
+    def close(self):
+        pass
@@ -1,33 +1,69 @@
+from __future__ import absolute_import
 from __future__ import print_function
-from collections import defaultdict
+from collections import namedtuple
+import sys
 import threading
-import time
+
+from skydio.input_devices.button_events import ButtonEventBus
+from skydio.input_devices.calibration import f310_profile
+from skydio.input_devices.event_reader import EvdevReader
+from skydio.input_devices.event_reader import InputsReader
+from skydio.input_devices.event_reader import find_gamepad_devices
 
 try:
     import inputs
 except ImportError:
-    print('Unable to import the `inputs` module. See https://pypi.org/project/inputs/')
     inputs = None
+    if not sys.platform.startswith('linux'):
+        print('Unable to import the `inputs` module. See https://pypi.org/project/inputs/')
+
+# The state of every axis and button after one frame of events. `codes` maps event code names
+# to values and is never modified once published, `timestamp` is the time of the frame's events
+# and `frame` counts the frames applied so far.
+GamepadState = namedtuple('GamepadState', ['timestamp', 'frame', 'codes'])
 
 
 class Gamepad(object):
     """
     Continuously track the state of a gamepad using a thread.
+
+    The thread blocks on the device until a frame of events arrives, applies the whole frame
+    and then publishes a new GamepadState. Readers take `state` once and see every axis from
+    the same frame.
+
+    Button presses are sent to subscribers of `events`, a ButtonEventBus:
+
+        gamepad.events.subscribe('BTN_START', LONG_PRESS, lambda event: ...)
+
+    Args:
+        reader: an event reader, by default an EvdevReader on Linux or an InputsReader.
+        profile (CalibrationProfile): how to map the axes, the F310 layout by default.
     """
 
-    def __init__(self):
-        self.codes = defaultdict(int)
+    def __init__(self, reader=None, profile=None):
+        self.reader = reader or self._default_reader()
+        self.profile = profile or f310_profile()
+        self.events = ButtonEventBus()
+        self.state = GamepadState(None, 0, {})
+        self._running = True
 
         def update_loop():
-            while True:
-                self.update()
-                time.sleep(0.0001)
+            while self._running:
+                self.update(timeout=0.5)
         self.thread = threading.Thread(target=update_loop)
         self.thread.setDaemon(True)
         self.thread.start()
 
+    @staticmethod
+    def _default_reader():
+        if find_gamepad_devices():
+            return EvdevReader()
+        return InputsReader()
+
     @staticmethod
     def available():
+        if find_gamepad_devices():
+            return True
         if inputs is None:
             return False
         if len(inputs.devices.gamepads) == 0:
@@ -35,64 +71,60 @@ class Gamepad(object):
             return False
         return True
 
-    def update(self):
+    @property
+    def codes(self):
+        """ The latest value of every event code seen. """
+        return self.state.codes
+
+    def update(self, timeout=None):
         """
         Process events from the gamepad.
-        This blocks until there is an event.
+        This blocks until there is a frame of events, or the timeout passes.
         """
-        events = inputs.get_gamepad()
-        for event in events:
-            if event.ev_type == 'Sync':
-                continue
+        frames = self.reader.read(timeout)
+        if not frames:
+            return
+        state = self.state
+        codes = dict(state.codes)
+        for timestamp, changes in frames:
             # Uncomment to print the values of the events for debugging.
-            # print(event.ev_type, event.code, event.state)
-            self.codes[event.code] = event.state
-            # TODO: callbacks for button presses
+            # print(changes)
+            codes.update(changes)
+            for code in [code for code, value in changes.items() if value is None]:
+                # Unknown after the reader dropped events, so read as at rest.
+                del codes[code]
+            self.events.process(timestamp, changes)
+        # Publish the new state with a single assignment, so readers never see a partial frame.
+        self.state = GamepadState(frames[-1][0], state.frame + len(frames), codes)
+
+    def close(self):
+        self._running = False
+        # An InputsReader cannot be interrupted, so don't wait on it forever.
+        self.thread.join(1.0)
+        self.reader.close()
+
+    @property
+    def name(self):
+        """ The name of the controller, used to look up its calibration profiles. """
+        return self.reader.name
 
     def get_command(self):
         """
-        Return a tuple of gamepad axis values:
+        Return a tuple of gamepad axis values, each in [-1, 1]:
             (velx, vely, velz, yaw_rate, pitch_rate)
-        """
 
-        # NOTE: these values come from testing with a Logitech Gamepad F310.
-        # Other gamepads may have different layouts and maximums.
-        max_hat = 32768.0
-
-        # Vehicle +X (pitch) is out the front, and corresponds to up on the right stick.
-        velx = clamp(-1.0 * self.codes['ABS_RY'] / max_hat)
-
-        # Vehicle +Y (roll) is out the left, and corresponds to left on the right stick.
-        vely = clamp(-1.0 * self.codes['ABS_RX'] / max_hat)
-
-        # Vehicle +Z (altitude) is out the top, and corresponds to up on the left stick.
-        velz = clamp(-1.0 * self.codes['ABS_Y'] / max_hat)
-
-        # Vehicle +yaw is counter-clockwise, and corresponds to left on the left stick.
-        yaw_rate = clamp(-1.0 * self.codes['ABS_X'] / max_hat)
-
-        # Gimbal +pitch is looking down, -pitch looks up and zero is straight ahead.
-        # Pitch is controlled with left and right triggers on the gamepad.
-        # Hold left trigger to look up. Hold right trigger to look down.
-        pitch_rate = (self.codes['ABS_RZ'] - self.codes['ABS_Z']) / 255.0
-
-        return (velx, vely, velz, yaw_rate, pitch_rate)
-
-
-def clamp(val, tol=0.05):
-    if abs(val) < tol:
-        val = 0.0
-    return val
+        See calibration.f310_profile for the default layout. Use profile.scale() to convert the
+        values into command units.
+        """
+        return tuple(self.profile.command(self.state.codes))
 
 
 def print_all_codes():
-    """ Print details from every event emitted by the gamepad. """
+    """ Print details from every event frame emitted by the gamepad. """
+    reader = Gamepad._default_reader()
     while True:
-        events = inputs.get_gamepad()
-        for event in events:
-            if event.ev_type == 'Sync':
-                continue
-            print(event.ev_type, event.code, event.state)
+        for timestamp, changes in reader.read():
+            print('{:.6f}'.format(timestamp), changes)
 
 
 if __name__ == '__main__':
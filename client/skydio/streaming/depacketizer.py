@@ -0,0 +1,319 @@
+"""
+RTP depacketizers
+
+Assemble the payloads of the vehicle's RTP streams into whole frames:
+    - JPEG (RFC 2435): complete JFIF images, with the headers rebuilt from the RTP JPEG header.
+    - H.264 (RFC 6184): access units as an Annex B byte stream.
+
+Feed packets in sequence order, e.g. from a JitterBuffer.
+"""
+# Prep for python3
+from __future__ import absolute_import
+from __future__ import print_function
+
+from collections import namedtuple
+import struct
+
+from skydio.streaming.rtp import PAYLOAD_TYPE_H264
+from skydio.streaming.rtp import PAYLOAD_TYPE_JPEG
+from skydio.streaming.rtp import SEQ_MOD
+
+# An assembled frame. `keyframe` is True if it can be decoded on its own.
+Frame = namedtuple('Frame', ['timestamp', 'data', 'keyframe'])
+
+
+class Depacketizer(object):
+    """
+    Base class that groups packets by timestamp and detects sequence gaps.
+
+    Subclasses implement `_add_payload` and `_finish`.
+    """
+
+    def __init__(self):
+        self.frames = 0
+        self.dropped_frames = 0
+        self._timestamp = None
+        self._next_seq = None
+        self._damaged = False
+
+    def push(self, packet):
+        """
+        Add the next packet.
+
+        Returns:
+            list: Frames completed by this packet, usually empty or one.
+        """
+        completed = []
+        if self._timestamp is not None and packet.timestamp != self._timestamp:
+            # The marker bit of the previous frame was lost, close it out anyway.
+            self._damaged = True
+            self._emit(completed)
+
+        if self._next_seq is not None and packet.sequence != self._next_seq:
+            self._damaged = True
+        self._next_seq = (packet.sequence + 1) % SEQ_MOD
+
+        self._timestamp = packet.timestamp
+        self._add_payload(packet.payload)
+        if packet.marker:
+            self._emit(completed)
+        return completed
+
+    def _emit(self, completed):
+        frame = self._finish(self._timestamp, self._damaged)
+        if frame is None:
+            self.dropped_frames += 1
+        else:
+            self.frames += 1
+            completed.append(frame)
+        self._timestamp = None
+        self._damaged = False
+
+    def _add_payload(self, payload):
+        raise NotImplementedError('subclass me')
+
+    def _finish(self, timestamp, damaged):
+        raise NotImplementedError('subclass me')
+
+
+class H264Depacketizer(Depacketizer):
+    """
+    Reassemble RFC 6184 packets (single NAL, STAP-A and FU-A) into Annex B access units.
+
+    Access units with missing packets are still returned, since a decoder can conceal the
+    damage, but they are never marked as keyframes.
+    """
+
+    START_CODE = b'\x00\x00\x00\x01'
+    NAL_IDR = 5
+    NAL_STAP_A = 24
+    NAL_FU_A = 28
+
+    def __init__(self):
+        super(H264Depacketizer, self).__init__()
+        self._buffer = bytearray()
+        self._keyframe = False
+        self._in_fragment = False
+
+    def _add_payload(self, payload):
+        payload = payload.tobytes()
+        if not payload:
+            return
+        nal_type = bytearray(payload[:1])[0] & 0x1f
+
+        if nal_type < self.NAL_STAP_A:
+            self._add_nal(payload)
+
+        elif nal_type == self.NAL_STAP_A:
+            offset = 1
+            while offset + 2 <= len(payload):
+                size, = struct.unpack_from('!H', payload, offset)
+                offset += 2
+                self._add_nal(payload[offset:offset + size])
+                offset += size
+
+        elif nal_type == self.NAL_FU_A and len(payload) > 2:
+            indicator, header = bytearray(payload[:2])
+            if header & 0x80:
+                # Start of a fragmented NAL unit, rebuild its header byte.
+                self._add_nal(struct.pack('!B', (indicator & 0xe0) | (header & 0x1f)))
+                self._in_fragment = True
+            elif not self._in_fragment:
+                # The start of this fragment was lost.
+                self._damaged = True
+                return
+            self._buffer += payload[2:]
+            if header & 0x40:
+                self._in_fragment = False
+
+    def _add_nal(self, nal):
+        if nal and bytearray(nal[:1])[0] & 0x1f == self.NAL_IDR:
+            self._keyframe = True
+        self._buffer += self.START_CODE
+        self._buffer += nal
+
+    def _finish(self, timestamp, damaged):
+        data = bytes(self._buffer)
+        keyframe = self._keyframe and not damaged
+        self._buffer = bytearray()
+        self._keyframe = False
+        self._in_fragment = False
+        if not data:
+            return None
+        return Frame(timestamp, data, keyframe)
+
+
+class JpegDepacketizer(Depacketizer):
+    """
+    Reassemble RFC 2435 packets into complete JPEG images.
+
+    RTP/JPEG strips the JPEG headers, so they are rebuilt from the type, quality factor and
+    dimensions carried in each packet. Images with missing packets are dropped.
+    """
+
+    def __init__(self):
+        super(JpegDepacketizer, self).__init__()
+        self._scan = bytearray()
+        self._header = None
+        self._expected_offset = 0
+
+    def _add_payload(self, payload):
+        payload = payload.tobytes()
+        if len(payload) < 8:
+            self._damaged = True
+            return
+        offset = struct.unpack('!I', payload[:4])[0] & 0xffffff
+        jpeg_type, quality, width, height = bytearray(payload[4:8])
+        position = 8
+
+        restart_interval = 0
+        if 64 <= jpeg_type <= 127:
+            restart_interval, = struct.unpack_from('!H', payload, position)
+            position += 4
+
+        tables = None
+        if quality >= 128 and offset == 0:
+            _, precision, length = struct.unpack_from('!BBH', payload, position)
+            position += 4
+            tables = payload[position:position + length]
+            position += length
+
+        if offset == 0:
+            # Offsets alone determine completeness, so a gap before this packet belonged to
+            # the previous image. 16 bit quantization tables are not supported.
+            self._damaged = bool(tables is not None and precision != 0)
+            self._header = make_jpeg_header(jpeg_type, quality, width, height,
+                                            tables=tables, restart_interval=restart_interval)
+            self._scan = bytearray()
+        elif offset != self._expected_offset:
+            self._damaged = True
+        data = payload[position:]
+        self._scan += data
+        self._expected_offset = offset + len(data)
+
+    def _finish(self, timestamp, damaged):
+        header, scan = self._header, self._scan
+        self._header = None
+        self._scan = bytearray()
+        self._expected_offset = 0
+        if damaged or header is None:
+            return None
+        if scan[-2:] != b'\xff\xd9':
+            scan += b'\xff\xd9'
+        return Frame(timestamp, header + bytes(scan), True)
+
+
+def create_depacketizer(payload_type):
+    """ Return a depacketizer for the payload type of a stream. """
+    if payload_type == PAYLOAD_TYPE_JPEG:
+        return JpegDepacketizer()
+    elif payload_type == PAYLOAD_TYPE_H264:
+        return H264Depacketizer()
+    raise ValueError('No depacketizer for payload type {}'.format(payload_type))
+
+
+# Tables from RFC 2435 Appendix A and the JPEG standard (ITU T.81 Annex K), in zigzag order.
+JPEG_LUMA_QUANTIZER = (
+    16, 11, 12, 14, 12, 10, 16, 14, 13, 14, 18, 17, 16, 19, 24, 40,
+    26, 24, 22, 22, 24, 49, 35, 37, 29, 40, 58, 51, 61, 60, 57, 51,
+    56, 55, 64, 72, 92, 78, 64, 68, 87, 69, 55, 56, 80, 109, 81, 87,
+    95, 98, 103, 104, 103, 62, 77, 113, 121, 112, 100, 120, 92, 101, 103, 99,
+)
+JPEG_CHROMA_QUANTIZER = (
+    17, 18, 18, 24, 21, 24, 47, 26, 26, 47, 99, 66, 56, 66, 99, 99,
+) + (99,) * 48
+
+LUM_DC_CODELENS = (0, 1, 5, 1, 1, 1, 1, 1, 1, 0, 0, 0, 0, 0, 0, 0)
+LUM_DC_SYMBOLS = tuple(range(12))
+LUM_AC_CODELENS = (0, 2, 1, 3, 3, 2, 4, 3, 5, 5, 4, 4, 0, 0, 1, 0x7d)
+LUM_AC_SYMBOLS = (
+    0x01, 0x02, 0x03, 0x00, 0x04, 0x11, 0x05, 0x12, 0x21, 0x31, 0x41, 0x06, 0x13, 0x51, 0x61,
+    0x07, 0x22, 0x71, 0x14, 0x32, 0x81, 0x91, 0xa1, 0x08, 0x23, 0x42, 0xb1, 0xc1, 0x15, 0x52,
+    0xd1, 0xf0, 0x24, 0x33, 0x62, 0x72, 0x82, 0x09, 0x0a, 0x16, 0x17, 0x18, 0x19, 0x1a, 0x25,
+    0x26, 0x27, 0x28, 0x29, 0x2a, 0x34, 0x35, 0x36, 0x37, 0x38, 0x39, 0x3a, 0x43, 0x44, 0x45,
+    0x46, 0x47, 0x48, 0x49, 0x4a, 0x53, 0x54, 0x55, 0x56, 0x57, 0x58, 0x59, 0x5a, 0x63, 0x64,
+    0x65, 0x66, 0x67, 0x68, 0x69, 0x6a, 0x73, 0x74, 0x75, 0x76, 0x77, 0x78, 0x79, 0x7a, 0x83,
+    0x84, 0x85, 0x86, 0x87, 0x88, 0x89, 0x8a, 0x92, 0x93, 0x94, 0x95, 0x96, 0x97, 0x98, 0x99,
+    0x9a, 0xa2, 0xa3, 0xa4, 0xa5, 0xa6, 0xa7, 0xa8, 0xa9, 0xaa, 0xb2, 0xb3, 0xb4, 0xb5, 0xb6,
+    0xb7, 0xb8, 0xb9, 0xba, 0xc2, 0xc3, 0xc4, 0xc5, 0xc6, 0xc7, 0xc8, 0xc9, 0xca, 0xd2, 0xd3,
+    0xd4, 0xd5, 0xd6, 0xd7, 0xd8, 0xd9, 0xda, 0xe1, 0xe2, 0xe3, 0xe4, 0xe5, 0xe6, 0xe7, 0xe8,
+    0xe9, 0xea, 0xf1, 0xf2, 0xf3, 0xf4, 0xf5, 0xf6, 0xf7, 0xf8, 0xf9, 0xfa,
+)
+CHM_DC_CODELENS = (0, 3, 1, 1, 1, 1, 1, 1, 1, 1, 1, 0, 0, 0, 0, 0)
+CHM_DC_SYMBOLS = tuple(range(12))
+CHM_AC_CODELENS = (0, 2, 1, 2, 4, 4, 3, 4, 7, 5, 4, 4, 0, 1, 2, 0x77)
+CHM_AC_SYMBOLS = (
+    0x00, 0x01, 0x02, 0x03, 0x11, 0x04, 0x05, 0x21, 0x31, 0x06, 0x12, 0x41, 0x51, 0x07, 0x61,
+    0x71, 0x13, 0x22, 0x32, 0x81, 0x08, 0x14, 0x42, 0x91, 0xa1, 0xb1, 0xc1, 0x09, 0x23, 0x33,
+    0x52, 0xf0, 0x15, 0x62, 0x72, 0xd1, 0x0a, 0x16, 0x24, 0x34, 0xe1, 0x25, 0xf1, 0x17, 0x18,
+    0x19, 0x1a, 0x26, 0x27, 0x28, 0x29, 0x2a, 0x35, 0x36, 0x37, 0x38, 0x39, 0x3a, 0x43, 0x44,
+    0x45, 0x46, 0x47, 0x48, 0x49, 0x4a, 0x53, 0x54, 0x55, 0x56, 0x57, 0x58, 0x59, 0x5a, 0x63,
+    0x64, 0x65, 0x66, 0x67, 0x68, 0x69, 0x6a, 0x73, 0x74, 0x75, 0x76, 0x77, 0x78, 0x79, 0x7a,
+    0x82, 0x83, 0x84, 0x85, 0x86, 0x87, 0x88, 0x89, 0x8a, 0x92, 0x93, 0x94, 0x95, 0x96, 0x97,
+    0x98, 0x99, 0x9a, 0xa2, 0xa3, 0xa4, 0xa5, 0xa6, 0xa7, 0xa8, 0xa9, 0xaa, 0xb2, 0xb3, 0xb4,
+    0xb5, 0xb6, 0xb7, 0xb8, 0xb9, 0xba, 0xc2, 0xc3, 0xc4, 0xc5, 0xc6, 0xc7, 0xc8, 0xc9, 0xca,
+    0xd2, 0xd3, 0xd4, 0xd5, 0xd6, 0xd7, 0xd8, 0xd9, 0xda, 0xe2, 0xe3, 0xe4, 0xe5, 0xe6, 0xe7,
+    0xe8, 0xe9, 0xea, 0xf2, 0xf3, 0xf4, 0xf5, 0xf6, 0xf7, 0xf8, 0xf9, 0xfa,
+)
+
+_header_cache = {}
+
+
+def make_quantization_tables(quality):
+    """ Scale the standard tables for a quality factor 1-99, as in RFC 2435 Appendix A. """
+    factor = min(max(quality, 1), 99)
+    scale = 5000 // factor if factor < 50 else 200 - factor * 2
+    luma = bytearray(min(max((q * scale + 50) // 100, 1), 255) for q in JPEG_LUMA_QUANTIZER)
+    chroma = bytearray(min(max((q * scale + 50) // 100, 1), 255) for q in JPEG_CHROMA_QUANTIZER)
+    return bytes(luma + chroma)
+
+
+def make_jpeg_header(jpeg_type, quality, width, height, tables=None, restart_interval=0):
+    """
+    Build the JPEG headers (SOI through SOS) for an RTP/JPEG frame, as in RFC 2435 Appendix B.
+
+    Args:
+        jpeg_type (int): the RTP/JPEG type, 0/64 for 4:2:2 and 1/65 for 4:2:0.
+        quality (int): the RTP/JPEG Q value, 128+ means `tables` are sent in-band.
+        width (int): the image width in 8 pixel blocks.
+        height (int): the image height in 8 pixel blocks.
+        tables (bytes): in-band quantization tables, 64 bytes for luma then chroma.
+        restart_interval (int): MCUs between restart markers, 0 for none.
+    """
+    key = (jpeg_type, quality, width, height, tables, restart_interval)
+    header = _header_cache.get(key)
+    if header is not None:
+        return header
+
+    if tables is None:
+        tables = make_quantization_tables(quality)
+    luma = tables[:64]
+    chroma = tables[64:128] if len(tables) >= 128 else luma
+
+    out = bytearray(b'\xff\xd8')
+    for table_id, table in enumerate((luma, chroma)):
+        out += struct.pack('!HHB', 0xffdb, 67, table_id) + table
+
+    if restart_interval:
+        out += struct.pack('!HHH', 0xffdd, 4, restart_interval)
+
+    luma_sampling = 0x21 if (jpeg_type & 0x3f) == 0 else 0x22
+    out += struct.pack('!HHBHHB', 0xffc0, 17, 8, height * 8, width * 8, 3)
+    out += struct.pack('!BBBBBBBBB', 1, luma_sampling, 0, 2, 0x11, 1, 3, 0x11, 1)
+
+    for table_class, table_id, codelens, symbols in (
+            (0, 0, LUM_DC_CODELENS, LUM_DC_SYMBOLS),
+            (1, 0, LUM_AC_CODELENS, LUM_AC_SYMBOLS),
+            (0, 1, CHM_DC_CODELENS, CHM_DC_SYMBOLS),
+            (1, 1, CHM_AC_CODELENS, CHM_AC_SYMBOLS)):
+        out += struct.pack('!HHB', 0xffc4, 3 + len(codelens) + len(symbols),
+                           (table_class << 4) | table_id)
+        out += bytearray(codelens) + bytearray(symbols)
+
+    out += struct.pack('!HHB', 0xffda, 12, 3)
+    out += struct.pack('!BBBBBBBBB', 1, 0x00, 2, 0x11, 3, 0x11, 0, 63, 0)
+
+    header = bytes(out)
+    if len(_header_cache) < 64:
+        _header_cache[key] = header
+    return header
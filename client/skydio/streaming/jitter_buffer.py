@@ -0,0 +1,219 @@
+"""
+RTP jitter buffer
+
+Reorder RTP packets by sequence number and release them on a smooth playout schedule,
+so that the JPEG or H.264 depacketizer downstream sees an in-order stream with steady timing.
+"""
+# Prep for python3
+from __future__ import absolute_import
+from __future__ import print_function
+
+import heapq
+import threading
+import time
+
+from skydio.streaming.rtp import SEQ_MOD
+from skydio.streaming.rtp import TIMESTAMP_MOD
+from skydio.streaming.rtp import Unwrapper
+from skydio.streaming.rtp import VIDEO_CLOCK_RATE
+
+
+class JitterBuffer(object):
+    """
+    Hold RTP packets until their playout time, then release them in sequence order.
+
+    Each packet's playout time is its media timestamp mapped onto the local clock via the
+    fastest transit time seen so far, plus the current target latency. A packet that arrives
+    after a later packet has already been played out is dropped as late. Missing packets are
+    skipped (and counted as lost) once the packet after them is due.
+
+    When `adaptive` is set, the target latency tracks the RFC 3550 inter-arrival jitter
+    estimate: it grows immediately when jitter rises or a packet arrives late, and decays
+    slowly back down when the network calms.
+
+    All methods are thread-safe, so a socket thread can push while a display thread pops.
+
+    Args:
+        target_latency (float): initial delay in seconds between the earliest possible
+            arrival of a packet and its release.
+        min_latency (float): lower bound for the adaptive target.
+        max_latency (float): upper bound for the adaptive target.
+        adaptive (bool): adjust the target from measured jitter and late arrivals.
+        jitter_multiplier (float): target latency as a multiple of the jitter estimate.
+        clock_rate (int): RTP timestamp clock in Hz.
+        max_packets (int): when more packets than this are held, release the oldest early.
+    """
+
+    # How quickly the target decays toward the jitter-derived value, per released packet.
+    DECAY = 0.002
+
+    def __init__(self, target_latency=0.1, min_latency=0.02, max_latency=0.5, adaptive=True,
+                 jitter_multiplier=4.0, clock_rate=VIDEO_CLOCK_RATE, max_packets=2048):
+        self.min_latency = min_latency
+        self.max_latency = max_latency
+        self.adaptive = adaptive
+        self.jitter_multiplier = jitter_multiplier
+        self.clock_rate = float(clock_rate)
+        self.max_packets = max_packets
+        self._initial_latency = target_latency
+        self._lock = threading.Lock()
+        self._reset()
+
+    def reset(self):
+        """ Drop all held packets and statistics, e.g. when the stream restarts. """
+        with self._lock:
+            self._reset()
+
+    def _reset(self):
+        self.target_latency = self._initial_latency
+        self.jitter = 0.0
+        self._heap = []
+        self._held = {}
+        self._ssrc = None
+        self._seq = Unwrapper(SEQ_MOD)
+        self._timestamps = Unwrapper(TIMESTAMP_MOD)
+        self._next_seq = None
+        self._min_transit = None
+        self._last_arrival = None
+        self._last_media_time = None
+        self.received = 0
+        self.released = 0
+        self.late_drops = 0
+        self.duplicates = 0
+        self.reordered = 0
+        self.lost = 0
+        self.overflows = 0
+        self.last_playout_delay = 0.0
+
+    def push(self, packet, arrival_time=None):
+        """
+        Add a received packet.
+
+        Returns:
+            bool: False if the packet was dropped as late or duplicate.
+        """
+        if arrival_time is None:
+            arrival_time = time.time()
+        with self._lock:
+            if self._ssrc is not None and packet.ssrc != self._ssrc:
+                # A new stream source, the old sequence space is meaningless.
+                self._reset()
+            self._ssrc = packet.ssrc
+            self.received += 1
+
+            seq = self._seq.unwrap(packet.sequence)
+            media_time = self._timestamps.unwrap(packet.timestamp) / self.clock_rate
+            self._update_jitter(arrival_time, media_time)
+
+            if self._next_seq is not None and seq < self._next_seq:
+                self.late_drops += 1
+                if self.adaptive and self._min_transit is not None:
+                    lateness = arrival_time - self._playout_time(media_time)
+                    self._set_target(self.target_latency + max(lateness, 0.0))
+                return False
+            if seq in self._held:
+                self.duplicates += 1
+                return False
+            if seq < self._seq.highest:
+                self.reordered += 1
+
+            transit = arrival_time - media_time
+            if self._min_transit is None or transit < self._min_transit:
+                self._min_transit = transit
+
+            self._held[seq] = (packet, arrival_time, media_time)
+            heapq.heappush(self._heap, seq)
+            return True
+
+    def pop(self, now=None, force=False):
+        """
+        Release every packet whose playout time has passed.
+
+        Args:
+            now (float): the current local time, defaults to time.time().
+            force (bool): release everything held, regardless of playout time.
+
+        Returns:
+            list: RtpPackets in sequence order.
+        """
+        if now is None:
+            now = time.time()
+        ready = []
+        with self._lock:
+            while self._heap:
+                seq = self._heap[0]
+                packet, arrival_time, media_time = self._held[seq]
+                overflow = len(self._heap) > self.max_packets
+                if not (force or overflow) and self._playout_time(media_time) > now:
+                    break
+                if overflow:
+                    self.overflows += 1
+                heapq.heappop(self._heap)
+                del self._held[seq]
+                if self._next_seq is not None and seq > self._next_seq:
+                    self.lost += seq - self._next_seq
+                self._next_seq = seq + 1
+                self.released += 1
+                self.last_playout_delay = now - arrival_time
+                ready.append(packet)
+                self._decay_target()
+        return ready
+
+    def next_deadline(self):
+        """ Local time at which the next held packet is due, or None if empty. """
+        with self._lock:
+            if not self._heap:
+                return None
+            _, _, media_time = self._held[self._heap[0]]
+            return self._playout_time(media_time)
+
+    def flush(self):
+        """ Release every held packet immediately, in order. """
+        return self.pop(force=True)
+
+    @property
+    def depth(self):
+        """ Number of packets currently held. """
+        return len(self._heap)
+
+    def stats(self):
+        """ A snapshot of the buffer's counters and current delays, in seconds. """
+        with self._lock:
+            return {
+                'target_latency': self.target_latency,
+                'last_playout_delay': self.last_playout_delay,
+                'jitter': self.jitter,
+                'depth': len(self._heap),
+                'received': self.received,
+                'released': self.released,
+                'late_drops': self.late_drops,
+                'duplicates': self.duplicates,
+                'reordered': self.reordered,
+                'lost': self.lost,
+                'overflows': self.overflows,
+            }
+
+    def _playout_time(self, media_time):
+        return media_time + self._min_transit + self.target_latency
+
+    def _update_jitter(self, arrival_time, media_time):
+        # RFC 3550 section 6.4.1 interarrival jitter, in seconds.
+        if self._last_arrival is not None:
+            delta = (arrival_time - self._last_arrival) - (media_time - self._last_media_time)
+            self.jitter += (abs(delta) - self.jitter) / 16.0
+        self._last_arrival = arrival_time
+        self._last_media_time = media_time
+        if self.adaptive:
+            desired = self.jitter * self.jitter_multiplier
+            if desired > self.target_latency:
+                self._set_target(desired)
+
+    def _decay_target(self):
+        if not self.adaptive:
+            return
+        desired = max(self.jitter * self.jitter_multiplier, self.min_latency)
+        if desired < self.target_latency:
+            self._set_target(self.target_latency + (desired - self.target_latency) * self.DECAY)
+
+    def _set_target(self, latency):
+        self.target_latency = min(max(latency, self.min_latency), self.max_latency)
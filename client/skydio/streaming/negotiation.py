@@ -0,0 +1,156 @@
+"""
+Stream negotiation
+
+Describe the video stream you want once, and derive everything that has to agree about it:
+the `streamSettings` sent to the vehicle, a matching SDP description for OpenCV/ffmpeg, and an
+estimate of the bandwidth it costs. Ports are picked from the free local ports, so several
+streams and vehicles can share one host.
+
+The vehicle cannot be told a size or frame rate, so each codec has the fixed format the vehicle
+produces for it.
+"""
+# Prep for python3
+from __future__ import absolute_import
+from __future__ import print_function
+
+import os
+import socket
+import tempfile
+
+from skydio.streaming.rtp import PAYLOAD_TYPE_H264
+from skydio.streaming.rtp import PAYLOAD_TYPE_JPEG
+from skydio.streaming.rtp import VIDEO_CLOCK_RATE
+
+# The h264 stream comes straight from the camera encoder, so its format is fixed.
+H264_WIDTH = 1280
+H264_HEIGHT = 720
+H264_FPS = 15.0
+
+# NATIVE images are converted to a small jpeg stream on the vehicle, see JPEG_RTP.
+JPEG_WIDTH = 360
+JPEG_HEIGHT = 240
+JPEG_FPS = 7.5
+
+# Rough compressed sizes, used for bandwidth estimates only.
+JPEG_BITS_PER_PIXEL = 1.5
+H264_BITS_PER_PIXEL = 0.1
+
+# IPv4 + UDP + RTP headers, and the payload size of a typical RTP video packet.
+PACKET_OVERHEAD_BYTES = 20 + 8 + 12
+PACKET_PAYLOAD_BYTES = 1400
+
+
+def find_free_port(host=''):
+    """
+    Return a UDP port that is currently free on this host.
+
+    The port is released before returning, so bind it promptly.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+    finally:
+        sock.close()
+
+
+class StreamOffer(object):
+    """
+    A negotiated stream: what to ask the vehicle for and how to receive it.
+
+    Create these with negotiate_stream().
+    """
+
+    def __init__(self, codec, width, height, fps, port, host):
+        self.codec = codec
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.port = port
+        self.host = host
+
+    @property
+    def payload_type(self):
+        return PAYLOAD_TYPE_H264 if self.codec == 'h264' else PAYLOAD_TYPE_JPEG
+
+    @property
+    def stream_settings(self):
+        """ The `streamSettings` for HTTPClient(stream_settings=...). """
+        source = 'h264' if self.codec == 'h264' else 'NATIVE'
+        return {'source': source, 'port': self.port}
+
+    @property
+    def bandwidth(self):
+        """ Estimated network cost of the stream in bits per second, headers included. """
+        bits_per_pixel = H264_BITS_PER_PIXEL if self.codec == 'h264' else JPEG_BITS_PER_PIXEL
+        payload_bytes_per_frame = self.width * self.height * bits_per_pixel / 8.0
+        packets_per_frame = -(-payload_bytes_per_frame // PACKET_PAYLOAD_BYTES)
+        frame_bytes = payload_bytes_per_frame + packets_per_frame * PACKET_OVERHEAD_BYTES
+        return int(frame_bytes * 8 * self.fps)
+
+    @property
+    def sdp(self):
+        """ An SDP description of the stream, for OpenCV, ffmpeg or VLC. """
+        encoding = 'H264' if self.codec == 'h264' else 'JPEG'
+        lines = [
+            'v=0',
+            'o=- 0 0 IN IP4 {}'.format(self.host),
+            's=Skydio R1 {}'.format(self.codec),
+            'c=IN IP4 {}'.format(self.host),
+            't=0 0',
+            'm=video {} RTP/AVP {}'.format(self.port, self.payload_type),
+            'b=AS:{}'.format(-(-self.bandwidth // 1000)),
+            'a=rtpmap:{} {}/{}'.format(self.payload_type, encoding, VIDEO_CLOCK_RATE),
+            'a=framerate:{:g}'.format(self.fps),
+            'a=framesize:{} {}-{}'.format(self.payload_type, self.width, self.height),
+        ]
+        return '\n'.join(lines) + '\n'
+
+    def write_sdp(self, path=None):
+        """
+        Write the SDP description to a file, since OpenCV only opens SDP from a path.
+
+        Args:
+            path (str): where to write, a new temporary file by default.
+
+        Returns:
+            str: the path written.
+        """
+        if path is None:
+            handle, path = tempfile.mkstemp(prefix='skydio_{}_'.format(self.port), suffix='.sdp')
+            os.close(handle)
+        with open(path, 'w') as sdp_file:
+            sdp_file.write(self.sdp)
+        return path
+
+    def describe(self):
+        return '{} {}x{} @ {:g}fps on {}:{}, ~{:.2f} Mbit/s'.format(
+            self.codec, self.width, self.height, self.fps, self.host, self.port,
+            self.bandwidth / 1e6)
+
+    def __repr__(self):
+        return 'StreamOffer({})'.format(self.describe())
+
+
+def negotiate_stream(codec='jpeg', port=None, host='127.0.0.1'):
+    """
+    Build a StreamOffer for the desired stream.
+
+    Args:
+        codec (str): 'jpeg' for the NATIVE source or 'h264' for the camera stream.
+        port (int): local port to receive on, a free port by default.
+        host (str): local address the stream is received on.
+
+    Raises:
+        ValueError: for an unknown codec.
+    """
+    if codec == 'h264':
+        width, height, fps = H264_WIDTH, H264_HEIGHT, H264_FPS
+    elif codec == 'jpeg':
+        width, height, fps = JPEG_WIDTH, JPEG_HEIGHT, JPEG_FPS
+    else:
+        raise ValueError('Unknown stream codec {}'.format(codec))
+
+    if port is None:
+        port = find_free_port()
+    return StreamOffer(codec, width, height, fps, port, host)
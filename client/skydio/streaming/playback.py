@@ -0,0 +1,293 @@
+"""
+Playback of recorded streams
+
+Random access to recordings written by StreamRecorder. Segment files are memory-mapped and
+records are returned as memoryviews into the mapping, so scanning a long recording does not
+copy or load whole files. Independent JPEG frames can be decoded in parallel by a process pool.
+
+    reader = RecordingReader('flight1')
+    start = reader.seek(reader.start_time + 60)
+    for entry, data in reader.range(start, start + 100):
+        ...
+"""
+# Prep for python3
+from __future__ import absolute_import
+from __future__ import print_function
+
+import argparse
+import mmap
+import multiprocessing
+import os
+
+from skydio.streaming.depacketizer import create_depacketizer
+from skydio.streaming.recorder import FLAG_KEYFRAME
+from skydio.streaming.recorder import KIND_H264
+from skydio.streaming.recorder import KIND_JPEG
+from skydio.streaming.recorder import KIND_NAMES
+from skydio.streaming.recorder import KIND_PACKETS
+from skydio.streaming.recorder import RecordingIndex
+from skydio.streaming.rtp import PAYLOAD_TYPE_JPEG
+from skydio.streaming.rtp import RtpPacket
+
+
+def _map_file(path):
+    with open(path, 'rb') as segment_file:
+        size = os.fstat(segment_file.fileno()).st_size
+        if size == 0:
+            return None
+        return mmap.mmap(segment_file.fileno(), size, access=mmap.ACCESS_READ)
+
+
+class RecordingReader(object):
+    """
+    Read records from a recording directory without copying them.
+
+    The memoryviews returned by this reader point into the segment mappings. Release them
+    (or let them go out of scope) before calling close().
+
+    Args:
+        directory (str): the recording directory.
+        prefix (str): the segment file name prefix used when recording.
+    """
+
+    def __init__(self, directory, prefix='stream'):
+        self.index = RecordingIndex(directory, prefix)
+        self.kind = self.index.kind
+        self._maps = {}
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, position):
+        return self.read(position)
+
+    def __iter__(self):
+        return self.range(0, len(self))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    @property
+    def start_time(self):
+        return self.index.start_time
+
+    @property
+    def end_time(self):
+        return self.index.end_time
+
+    @property
+    def frame_kind(self):
+        """ The kind of frames returned by frames(), KIND_JPEG or KIND_H264. """
+        if self.kind != KIND_PACKETS or not len(self):
+            return self.kind
+        payload_type = RtpPacket.parse(self.read(0)).payload_type
+        return KIND_JPEG if payload_type == PAYLOAD_TYPE_JPEG else KIND_H264
+
+    def read(self, position):
+        """ Return a memoryview of one record. """
+        segment, entry = self.index.locate(position)
+        segment_index = self.index.segments[segment]
+        offset = segment_index.offsets[entry]
+        size = segment_index.sizes[entry]
+        return self._segment_view(segment, offset + size)[offset:offset + size]
+
+    def entry(self, position):
+        """ Return the IndexEntry of one record. """
+        return self.index.entry(position)
+
+    def seek(self, wall_time):
+        """ Position of the last record at or before wall_time, clamped to the recording. """
+        return min(max(self.index.find(wall_time), 0), len(self) - 1)
+
+    def keyframe_before(self, position):
+        """ Position of the nearest keyframe at or before `position`, or None. """
+        while position >= 0:
+            if self.index.entry(position).flags & FLAG_KEYFRAME:
+                return position
+            position -= 1
+        return None
+
+    def range(self, start, stop, step=1):
+        """ Yield (IndexEntry, memoryview) for record positions start <= i < stop. """
+        for position in range(max(start, 0), min(stop, len(self)), step):
+            yield self.index.entry(position), self.read(position)
+
+    def time_range(self, start_time, end_time, step=1):
+        """ Yield (IndexEntry, memoryview) for records with start_time <= wall_time < end_time. """
+        start = self.index.find(start_time)
+        if start < 0 or self.index.entry(start).wall_time < start_time:
+            start += 1
+        stop = self.index.find(end_time)
+        if stop >= 0 and self.index.entry(stop).wall_time < end_time:
+            stop += 1
+        return self.range(start, stop, step)
+
+    def scrub(self, wall_times):
+        """
+        Yield (IndexEntry, memoryview) for the record shown at each of the given times.
+
+        For H.264 recordings the nearest preceding keyframe is returned, since that is the
+        closest frame that can be decoded on its own.
+        """
+        for wall_time in wall_times:
+            position = self.seek(wall_time)
+            if self.kind != KIND_JPEG:
+                position = self.keyframe_before(position)
+                if position is None:
+                    continue
+            yield self.index.entry(position), self.read(position)
+
+    def frames(self, start=0, stop=None):
+        """
+        Yield (IndexEntry, frame bytes) tuples.
+
+        Frame recordings are returned as stored. Packet recordings are run through the matching
+        depacketizer first, which copies the data; the entry is that of the final packet.
+        """
+        if stop is None:
+            stop = len(self)
+        if self.kind != KIND_PACKETS:
+            for entry, data in self.range(start, stop):
+                yield entry, data
+            return
+
+        depacketizer = None
+        for entry, data in self.range(start, stop):
+            packet = RtpPacket.parse(data)
+            if depacketizer is None:
+                depacketizer = create_depacketizer(packet.payload_type)
+            for frame in depacketizer.push(packet):
+                yield entry, frame.data
+
+    def jpeg_locations(self, positions):
+        """ Return (segment path, offset, size) for each record, for use in other processes. """
+        locations = []
+        for position in positions:
+            segment, entry = self.index.locate(position)
+            segment_index = self.index.segments[segment]
+            locations.append((self.index.segment_path(segment),
+                              segment_index.offsets[entry],
+                              segment_index.sizes[entry]))
+        return locations
+
+    def map_jpeg(self, func, positions=None, processes=None, chunksize=16):
+        """
+        Decode JPEG frames in a process pool and apply func to each image.
+
+        Each worker maps the segment files itself, so only the (small) locations are sent to
+        the workers and only func's results are sent back. Return an image from func to get
+        the decoded frames, or a summary value to keep the traffic down.
+
+        Args:
+            func (callable): a picklable, module-level function taking a BGR numpy image.
+            positions (iterable): record positions to decode, default all.
+            processes (int): pool size, default the number of CPUs.
+            chunksize (int): frames handed to a worker at a time.
+
+        Returns:
+            list: func's result for each position, in order.
+        """
+        if self.kind != KIND_JPEG:
+            raise ValueError('map_jpeg needs a JPEG frame recording, not {}'
+                             .format(KIND_NAMES.get(self.kind)))
+        if positions is None:
+            positions = range(len(self))
+        tasks = [(func, location) for location in self.jpeg_locations(positions)]
+        pool = multiprocessing.Pool(processes)
+        try:
+            return pool.map(_decode_and_apply, tasks, chunksize)
+        finally:
+            pool.close()
+            pool.join()
+
+    def decode_jpeg(self, positions=None, processes=None):
+        """ Decode JPEG frames in parallel and return them as BGR numpy images. """
+        return self.map_jpeg(_identity, positions, processes)
+
+    def close(self):
+        for segment_map in self._maps.values():
+            try:
+                segment_map.close()
+            except BufferError:
+                # A memoryview is still alive, the mapping is released when it is collected.
+                pass
+        self._maps = {}
+
+    def _segment_view(self, segment, end):
+        segment_map = self._maps.get(segment)
+        if segment_map is None or len(segment_map) < end:
+            # Not mapped yet, or the recording has grown since it was mapped. An old mapping is
+            # dropped rather than closed, since views into it may still be in use.
+            segment_map = _map_file(self.index.segment_path(segment))
+            if segment_map is None or len(segment_map) < end:
+                raise IOError('Segment {} is shorter than its index'.format(segment))
+            self._maps[segment] = segment_map
+        return memoryview(segment_map)
+
+
+# Per-process segment mappings used by the decode workers.
+_worker_maps = {}
+
+
+def _identity(image):
+    return image
+
+
+def _decode_and_apply(task):
+    import cv2
+    import numpy
+
+    func, (path, offset, size) = task
+    segment_map = _worker_maps.get(path)
+    if segment_map is None or len(segment_map) < offset + size:
+        segment_map = _map_file(path)
+        _worker_maps[path] = segment_map
+    data = numpy.frombuffer(segment_map, dtype=numpy.uint8, count=size, offset=offset)
+    return func(cv2.imdecode(data, cv2.IMREAD_COLOR))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect or export a stream recording.')
+    parser.add_argument('directory', help='the recording directory')
+    parser.add_argument('--prefix', default='stream',
+                        help='the segment file name prefix used when recording')
+    parser.add_argument('--export', metavar='DIR',
+                        help='write the frames to DIR as individual files')
+    parser.add_argument('--start', type=float, default=0.0,
+                        help='seconds from the start of the recording to begin exporting')
+    parser.add_argument('--duration', type=float, default=float('inf'),
+                        help='seconds of the recording to export')
+    args = parser.parse_args()
+
+    with RecordingReader(args.directory, args.prefix) as reader:
+        if not len(reader):
+            print('Empty recording')
+            return
+        print('{} records of {} over {:.1f}s in {} segments'.format(
+            len(reader), KIND_NAMES.get(reader.kind), reader.end_time - reader.start_time,
+            len(reader.index.segments)))
+        if not args.export:
+            return
+
+        if not os.path.isdir(args.export):
+            os.makedirs(args.export)
+        start_time = reader.start_time + args.start
+        start = reader.seek(start_time)
+        stop = len(reader)
+        if args.duration != float('inf'):
+            stop = reader.seek(start_time + args.duration) + 1
+        extension = '.jpg' if reader.frame_kind == KIND_JPEG else '.h264'
+        count = 0
+        for entry, data in reader.frames(start, stop):
+            name = '{:.3f}{}'.format(entry.wall_time, extension)
+            with open(os.path.join(args.export, name), 'wb') as frame_file:
+                frame_file.write(data)
+            count += 1
+        print('Exported {} frames to {}'.format(count, args.export))
+
+
+if __name__ == '__main__':
+    main()
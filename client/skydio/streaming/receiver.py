@@ -0,0 +1,96 @@
+"""
+RTP receiver
+
+Read RTP packets from a UDP port, optionally through a JitterBuffer.
+"""
+# Prep for python3
+from __future__ import absolute_import
+from __future__ import print_function
+
+import socket
+import time
+
+from skydio.streaming.rtp import RtpPacket
+
+# Large enough for any single UDP datagram.
+MAX_DATAGRAM_SIZE = 65536
+
+
+class RtpReceiver(object):
+    """
+    Receive an RTP stream on a local UDP port.
+
+    Args:
+        port (int): local port to bind, e.g. the port requested in HTTPClient stream_settings.
+        jitter_buffer (JitterBuffer): if given, packets are released on its playout schedule
+            instead of as soon as they arrive.
+        host (str): local address to bind.
+        poll_interval (float): longest time to block on the socket, in seconds.
+        recv_buffer_size (int): requested kernel receive buffer size, to absorb bursts.
+    """
+
+    def __init__(self, port, jitter_buffer=None, host='', poll_interval=0.05,
+                 recv_buffer_size=4 * 1024 * 1024):
+        self.jitter_buffer = jitter_buffer
+        self.poll_interval = poll_interval
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, recv_buffer_size)
+        except socket.error:
+            pass
+        self.sock.bind((host, port))
+        self.port = self.sock.getsockname()[1]
+        self.invalid = 0
+        self.running = True
+
+    def read(self):
+        """
+        Wait for packets and return the ones that are ready.
+
+        Returns:
+            list: (arrival_time, RtpPacket) tuples. Without a jitter buffer, the arrival time is
+            when the datagram was read; with one, it is when the packet was released.
+        """
+        timeout = self.poll_interval
+        if self.jitter_buffer is not None:
+            deadline = self.jitter_buffer.next_deadline()
+            if deadline is not None:
+                # A zero timeout would make the socket non-blocking, so wait at least 1ms.
+                timeout = min(timeout, max(deadline - time.time(), 0.001))
+        self.sock.settimeout(timeout)
+
+        ready = []
+        try:
+            data = self.sock.recv(MAX_DATAGRAM_SIZE)
+        except socket.timeout:
+            data = None
+        now = time.time()
+        if data:
+            try:
+                packet = RtpPacket.parse(data)
+            except ValueError:
+                self.invalid += 1
+                packet = None
+            if packet is not None:
+                if self.jitter_buffer is None:
+                    ready.append((now, packet))
+                else:
+                    self.jitter_buffer.push(packet, now)
+
+        if self.jitter_buffer is not None:
+            now = time.time()
+            ready.extend((now, packet) for packet in self.jitter_buffer.pop(now))
+        return ready
+
+    def packets(self):
+        """ Yield (time, RtpPacket) tuples until stop() is called. """
+        while self.running:
+            for item in self.read():
+                yield item
+
+    def stop(self):
+        self.running = False
+
+    def close(self):
+        self.running = False
+        self.sock.close()
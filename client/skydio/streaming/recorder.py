@@ -0,0 +1,345 @@
+"""
+Segmented stream recorder
+
+Archive an RTP stream without decoding it. Records (raw RTP packets, or frames assembled by a
+depacketizer) are appended to fixed-size segment files. Each segment has a sidecar index with
+the offset, size, RTP timestamp and wall time of every record, so playback can seek by time
+with a binary search.
+
+Layout of a recording directory:
+    <prefix>_000000.seg     concatenated records
+    <prefix>_000000.idx     8 byte header, then one 21 byte entry per record
+    <prefix>_000001.seg     ...
+"""
+# Prep for python3
+from __future__ import absolute_import
+from __future__ import print_function
+
+from bisect import bisect_right
+from collections import namedtuple
+import os
+import re
+import struct
+import threading
+import time
+
+try:
+    # python 2
+    from Queue import Queue
+except ImportError:
+    # Python 3
+    from queue import Queue
+
+INDEX_MAGIC = b'SKRI'
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct('<4sBBH')
+INDEX_ENTRY = struct.Struct('<dIIIB')
+
+SEGMENT_SUFFIX = '.seg'
+INDEX_SUFFIX = '.idx'
+
+# What each record in a recording contains.
+KIND_PACKETS = 0  # whole RTP datagrams, headers included
+KIND_JPEG = 1  # complete JPEG images
+KIND_H264 = 2  # Annex B access units
+KIND_NAMES = {KIND_PACKETS: 'packets', KIND_JPEG: 'jpeg', KIND_H264: 'h264'}
+
+FLAG_KEYFRAME = 0x01
+
+IndexEntry = namedtuple('IndexEntry', ['wall_time', 'offset', 'size', 'rtp_timestamp', 'flags'])
+
+
+def segment_paths(directory, prefix, number):
+    """ Return the (segment, index) file paths for a segment number. """
+    base = os.path.join(directory, '{}_{:06d}'.format(prefix, number))
+    return base + SEGMENT_SUFFIX, base + INDEX_SUFFIX
+
+
+def list_segments(directory, prefix='stream'):
+    """ Return the segment numbers of a recording, in order. """
+    pattern = re.compile(r'^{}_(\d{{6}}){}$'.format(re.escape(prefix), re.escape(INDEX_SUFFIX)))
+    numbers = []
+    for name in os.listdir(directory):
+        match = pattern.match(name)
+        if match:
+            numbers.append(int(match.group(1)))
+    return sorted(numbers)
+
+
+class StreamRecorder(object):
+    """
+    Append records to fixed-size segment files with buffered, batched writes.
+
+    Records are collected in memory and handed to a writer thread in batches of about
+    `batch_size` bytes, so the receive loop never blocks on the disk unless the disk falls
+    behind by more than `max_pending_batches`. A record never straddles two segments.
+
+    Args:
+        directory (str): where to write the recording, created if missing.
+        kind (int): KIND_PACKETS, KIND_JPEG or KIND_H264.
+        prefix (str): file name prefix for the segments.
+        segment_size (int): maximum bytes per segment file.
+        batch_size (int): bytes to collect before handing a batch to the writer.
+        flush_interval (float): while records arrive, hand a batch to the writer at least
+            this often, in seconds.
+        max_pending_batches (int): batches queued for the writer before write() blocks.
+    """
+
+    def __init__(self, directory, kind=KIND_PACKETS, prefix='stream',
+                 segment_size=64 * 1024 * 1024, batch_size=256 * 1024, flush_interval=1.0,
+                 max_pending_batches=64):
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.directory = directory
+        self.kind = kind
+        self.prefix = prefix
+        self.segment_size = segment_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        existing = list_segments(directory, prefix)
+        self.segment_number = existing[-1] + 1 if existing else 0
+        self.segment_offset = 0
+
+        self._data = bytearray()
+        self._index = bytearray()
+        self._batch_start = None
+        self._lock = threading.Lock()
+        self._queue = Queue(maxsize=max_pending_batches)
+        self._writer = threading.Thread(target=self._write_loop)
+        self._writer.daemon = True
+        self._writer.start()
+        self._error = None
+
+        self.records = 0
+        self.bytes_written = 0
+        self.segments = 0
+        self.batches = 0
+
+    def write(self, data, rtp_timestamp, wall_time=None, keyframe=True):
+        """ Append one record. """
+        if self._error is not None:
+            raise self._error
+        size = len(data)
+        if size > self.segment_size:
+            raise ValueError('Record of {} bytes exceeds the segment size'.format(size))
+        if wall_time is None:
+            wall_time = time.time()
+
+        with self._lock:
+            if self.segment_offset + size > self.segment_size:
+                self._roll_segment()
+            if self._batch_start is None:
+                self._batch_start = wall_time
+            self._data += data
+            self._index += INDEX_ENTRY.pack(wall_time, self.segment_offset, size, rtp_timestamp,
+                                            FLAG_KEYFRAME if keyframe else 0)
+            self.segment_offset += size
+            self.records += 1
+            self.bytes_written += size
+
+            if (len(self._data) >= self.batch_size
+                    or wall_time - self._batch_start >= self.flush_interval):
+                self._submit(close=False)
+
+    def write_packet(self, packet, wall_time=None):
+        """ Record a whole RTP packet. """
+        self.write(packet.data, packet.timestamp, wall_time)
+
+    def write_frame(self, frame, wall_time=None):
+        """ Record a Frame from a depacketizer. """
+        self.write(frame.data, frame.timestamp, wall_time, keyframe=frame.keyframe)
+
+    def flush(self):
+        """ Hand any buffered records to the writer and wait until they are on disk. """
+        with self._lock:
+            self._submit(close=False)
+        self._queue.join()
+        if self._error is not None:
+            raise self._error
+
+    def close(self):
+        """ Write everything out and stop the writer thread. """
+        with self._lock:
+            self._submit(close=True)
+            self._queue.put(None)
+        self._writer.join()
+        if self._error is not None:
+            raise self._error
+
+    def stats(self):
+        return {
+            'records': self.records,
+            'bytes': self.bytes_written,
+            'segments': self.segments + (1 if self.segment_offset else 0),
+            'batches': self.batches,
+            'pending_batches': self._queue.qsize(),
+        }
+
+    def _roll_segment(self):
+        self._submit(close=True)
+        self.segment_number += 1
+        self.segment_offset = 0
+        self.segments += 1
+
+    def _submit(self, close):
+        if not self._data and not close:
+            return
+        self._queue.put((self.segment_number, bytes(self._data), bytes(self._index), close))
+        self._data = bytearray()
+        self._index = bytearray()
+        self._batch_start = None
+        self.batches += 1
+
+    def _write_loop(self):
+        files = None
+        number = None
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                batch_number, data, index, close = item
+                if self._error is not None:
+                    continue
+                if batch_number != number:
+                    self._close_files(files)
+                    files = None
+                    number = batch_number
+                if files is None and (data or index):
+                    files = self._open_files(number)
+                if files is not None:
+                    segment_file, index_file = files
+                    # Data first, so an index entry never points past the end of the segment.
+                    segment_file.write(data)
+                    segment_file.flush()
+                    index_file.write(index)
+                    index_file.flush()
+                if close:
+                    self._close_files(files)
+                    files = None
+            except (IOError, OSError) as error:
+                self._error = error
+            finally:
+                self._queue.task_done()
+
+    def _open_files(self, number):
+        segment_path, index_path = segment_paths(self.directory, self.prefix, number)
+        segment_file = open(segment_path, 'ab')
+        index_file = open(index_path, 'ab')
+        if index_file.tell() == 0:
+            index_file.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, self.kind, 0))
+        return segment_file, index_file
+
+    @staticmethod
+    def _close_files(files):
+        if files is not None:
+            for handle in files:
+                handle.close()
+
+
+class SegmentIndex(object):
+    """
+    The parsed sidecar index of one segment.
+
+    A truncated final entry, e.g. from a recorder that was killed, is ignored.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as index_file:
+            raw = index_file.read()
+        if len(raw) < INDEX_HEADER.size:
+            raise ValueError('Index file too short: {}'.format(path))
+        magic, version, self.kind, _ = INDEX_HEADER.unpack_from(raw)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise ValueError('Not a stream index: {}'.format(path))
+
+        count = (len(raw) - INDEX_HEADER.size) // INDEX_ENTRY.size
+        entries = [INDEX_ENTRY.unpack_from(raw, INDEX_HEADER.size + i * INDEX_ENTRY.size)
+                   for i in range(count)]
+        self.path = path
+        self.wall_times = [entry[0] for entry in entries]
+        self.offsets = [entry[1] for entry in entries]
+        self.sizes = [entry[2] for entry in entries]
+        self.rtp_timestamps = [entry[3] for entry in entries]
+        self.flags = [entry[4] for entry in entries]
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def entry(self, i):
+        return IndexEntry(self.wall_times[i], self.offsets[i], self.sizes[i],
+                          self.rtp_timestamps[i], self.flags[i])
+
+    def find(self, wall_time):
+        """ Index of the last record at or before wall_time, or -1 if there is none. """
+        return bisect_right(self.wall_times, wall_time) - 1
+
+    @property
+    def start_time(self):
+        return self.wall_times[0] if self.wall_times else None
+
+    @property
+    def end_time(self):
+        return self.wall_times[-1] if self.wall_times else None
+
+    @property
+    def data_size(self):
+        """ Bytes of the segment covered by this index. """
+        if not self.offsets:
+            return 0
+        return self.offsets[-1] + self.sizes[-1]
+
+
+class RecordingIndex(object):
+    """
+    The indexes of every segment of a recording, searchable by wall time in O(log n).
+    """
+
+    def __init__(self, directory, prefix='stream'):
+        self.directory = directory
+        self.prefix = prefix
+        self.segment_numbers = []
+        self.segments = []
+        for number in list_segments(directory, prefix):
+            index = SegmentIndex(segment_paths(directory, prefix, number)[1])
+            if len(index):
+                self.segment_numbers.append(number)
+                self.segments.append(index)
+        self.kind = self.segments[0].kind if self.segments else None
+        self._start_times = [segment.start_time for segment in self.segments]
+        self._counts = [0]
+        for segment in self.segments:
+            self._counts.append(self._counts[-1] + len(segment))
+
+    def __len__(self):
+        return self._counts[-1]
+
+    def locate(self, position):
+        """ Map a record number across the whole recording to (segment, entry) positions. """
+        if not 0 <= position < len(self):
+            raise IndexError('record {} out of range'.format(position))
+        segment = bisect_right(self._counts, position) - 1
+        return segment, position - self._counts[segment]
+
+    def find(self, wall_time):
+        """ Record number of the last record at or before wall_time, or -1 if none. """
+        segment = bisect_right(self._start_times, wall_time) - 1
+        if segment < 0:
+            return -1
+        return self._counts[segment] + self.segments[segment].find(wall_time)
+
+    def entry(self, position):
+        segment, entry = self.locate(position)
+        return self.segments[segment].entry(entry)
+
+    def segment_path(self, segment):
+        return segment_paths(self.directory, self.prefix, self.segment_numbers[segment])[0]
+
+    @property
+    def start_time(self):
+        return self._start_times[0] if self.segments else None
+
+    @property
+    def end_time(self):
+        return self.segments[-1].end_time if self.segments else None
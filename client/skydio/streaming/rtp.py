@@ -0,0 +1,121 @@
+"""
+RTP packet helpers
+
+Parse and build the fixed RTP header (RFC 3550) used by the vehicle's JPEG and H.264 streams.
+"""
+# Prep for python3
+from __future__ import absolute_import
+from __future__ import print_function
+
+import struct
+
+RTP_VERSION = 2
+RTP_HEADER = struct.Struct('!BBHII')
+
+# Static payload type for JPEG and the dynamic one the vehicle uses for H.264.
+PAYLOAD_TYPE_JPEG = 26
+PAYLOAD_TYPE_H264 = 96
+
+# Both video streams use a 90kHz media clock.
+VIDEO_CLOCK_RATE = 90000
+
+SEQ_MOD = 1 << 16
+TIMESTAMP_MOD = 1 << 32
+
+
+class RtpPacket(object):
+    """
+    A single RTP packet.
+
+    `data` is the full datagram, so a packet can be forwarded or recorded unchanged.
+    `payload` is a memoryview into `data` with the header, csrcs, extension and padding removed.
+    """
+    __slots__ = ['data', 'payload_type', 'marker', 'sequence', 'timestamp', 'ssrc', 'payload']
+
+    def __init__(self, data, payload_type, marker, sequence, timestamp, ssrc, payload):
+        self.data = data
+        self.payload_type = payload_type
+        self.marker = marker
+        self.sequence = sequence
+        self.timestamp = timestamp
+        self.ssrc = ssrc
+        self.payload = payload
+
+    @classmethod
+    def parse(cls, data):
+        """
+        Parse a datagram into an RtpPacket.
+
+        Raises:
+            ValueError: if the datagram is not a valid RTP packet.
+        """
+        if len(data) < RTP_HEADER.size:
+            raise ValueError('RTP packet too short: {} bytes'.format(len(data)))
+        first, second, sequence, timestamp, ssrc = RTP_HEADER.unpack_from(data)
+        if first >> 6 != RTP_VERSION:
+            raise ValueError('Unsupported RTP version {}'.format(first >> 6))
+
+        start = RTP_HEADER.size + 4 * (first & 0x0f)
+        end = len(data)
+        if first & 0x10:
+            # Skip the header extension: 16 bit profile, 16 bit length in 32 bit words.
+            if end < start + 4:
+                raise ValueError('Truncated RTP header extension')
+            ext_words, = struct.unpack_from('!H', data, start + 2)
+            start += 4 + 4 * ext_words
+        if first & 0x20:
+            # The last byte of the packet is the number of padding bytes.
+            end -= bytearray(data[-1:])[0]
+        if start > end:
+            raise ValueError('Malformed RTP packet')
+
+        return cls(data=data,
+                   payload_type=second & 0x7f,
+                   marker=bool(second & 0x80),
+                   sequence=sequence,
+                   timestamp=timestamp,
+                   ssrc=ssrc,
+                   payload=memoryview(data)[start:end])
+
+    @classmethod
+    def build(cls, payload, payload_type, sequence, timestamp, ssrc, marker=False):
+        """ Create a packet with a minimal header around the given payload. """
+        header = RTP_HEADER.pack(RTP_VERSION << 6,
+                                 (0x80 if marker else 0) | (payload_type & 0x7f),
+                                 sequence % SEQ_MOD,
+                                 timestamp % TIMESTAMP_MOD,
+                                 ssrc)
+        return cls.parse(bytes(header + bytearray(payload)))
+
+    def __repr__(self):
+        return 'RtpPacket(pt={}, seq={}, ts={}, marker={}, size={})'.format(
+            self.payload_type, self.sequence, self.timestamp, self.marker, len(self.data))
+
+
+class Unwrapper(object):
+    """
+    Extend a wrapping counter (sequence numbers, timestamps) into a monotonic integer space.
+
+    Values are placed relative to the highest value seen so far, so reordered and late
+    values near a wrap boundary land on the correct side of it.
+    """
+
+    def __init__(self, modulus):
+        self.modulus = modulus
+        self.half = modulus // 2
+        self.highest = None
+
+    def unwrap(self, value):
+        if self.highest is None:
+            self.highest = value
+            return value
+        delta = (value - self.highest) % self.modulus
+        if delta >= self.half:
+            delta -= self.modulus
+        extended = self.highest + delta
+        if extended > self.highest:
+            self.highest = extended
+        return extended
+
+    def reset(self):
+        self.highest = None
@@ -0,0 +1,298 @@
+"""
+Synthetic RTP streams
+
+Generate RTP packets shaped like the vehicle's video streams, and pass them through
+an emulated network that delays, reorders and drops them. Useful for exercising the
+receive path (jitter buffer, recorder, latency tools) without a vehicle.
+
+SyntheticRtpSource fills its payloads with tags only. SyntheticJpegSource and
+SyntheticH264Source packetize frames as RFC 2435 and RFC 6184 do, and frame_data() returns the
+frame a depacketizer should rebuild from the packets.
+"""
+# Prep for python3
+from __future__ import absolute_import
+from __future__ import print_function
+
+import random
+import socket
+import struct
+import time
+
+from skydio.streaming.depacketizer import make_jpeg_header
+from skydio.streaming.rtp import PAYLOAD_TYPE_H264
+from skydio.streaming.rtp import PAYLOAD_TYPE_JPEG
+from skydio.streaming.rtp import RtpPacket
+from skydio.streaming.rtp import TIMESTAMP_MOD
+from skydio.streaming.rtp import VIDEO_CLOCK_RATE
+
+
+class SyntheticRtpSource(object):
+    """
+    Produce the packets of a constant frame rate video stream.
+
+    Every frame is split into `packets_per_frame` packets sharing one RTP timestamp, with the
+    marker bit set on the last one. The first 8 bytes of each payload carry the frame index
+    and packet index, so receivers can check ordering and completeness.
+
+    Args:
+        fps (float): frames per second.
+        packets_per_frame (int): number of RTP packets per frame.
+        payload_size (int): bytes of payload per packet, including the 8 byte tag.
+        payload_type (int): RTP payload type.
+        ssrc (int): stream identifier, random by default.
+        start_sequence (int): first sequence number, random by default to exercise wrapping.
+        start_timestamp (int): first RTP timestamp, random by default.
+    """
+
+    TAG = struct.Struct('!II')
+
+    def __init__(self, fps=15.0, packets_per_frame=4, payload_size=1000,
+                 payload_type=PAYLOAD_TYPE_JPEG, ssrc=None, start_sequence=None,
+                 start_timestamp=None, clock_rate=VIDEO_CLOCK_RATE):
+        self.fps = float(fps)
+        self.packets_per_frame = packets_per_frame
+        self.payload_size = max(payload_size, self.TAG.size)
+        self.payload_type = payload_type
+        self.clock_rate = clock_rate
+        self.ssrc = random.getrandbits(32) if ssrc is None else ssrc
+        self.sequence = random.getrandbits(16) if start_sequence is None else start_sequence
+        self.timestamp = random.getrandbits(32) if start_timestamp is None else start_timestamp
+        self.start_timestamp = self.timestamp
+        self.frame_index = 0
+
+    def frame_payloads(self, frame_index):
+        """ Return the RTP payloads of a frame. """
+        padding = b'\0' * (self.payload_size - self.TAG.size)
+        return [self.TAG.pack(frame_index, index) + padding
+                for index in range(self.packets_per_frame)]
+
+    def next_frame(self):
+        """ Return the packets of the next frame. """
+        payloads = self.frame_payloads(self.frame_index)
+        packets = []
+        for index, payload in enumerate(payloads):
+            packets.append(RtpPacket.build(payload,
+                                           payload_type=self.payload_type,
+                                           sequence=self.sequence,
+                                           timestamp=self.timestamp,
+                                           ssrc=self.ssrc,
+                                           marker=(index == len(payloads) - 1)))
+            self.sequence += 1
+        self.timestamp += int(round(self.clock_rate / self.fps))
+        self.frame_index += 1
+        return packets
+
+    def packets(self, num_frames, start_time=0.0, burst_interval=0.0005):
+        """
+        Yield (send_time, packet) tuples for `num_frames` frames.
+
+        The packets of a frame are sent `burst_interval` seconds apart, as an encoder would.
+        """
+        for frame in range(num_frames):
+            frame_time = start_time + frame / self.fps
+            for index, packet in enumerate(self.next_frame()):
+                yield frame_time + index * burst_interval, packet
+
+    def frame_index_of(self, timestamp):
+        """ Return the index of the frame an RTP timestamp of this stream belongs to. """
+        elapsed = (timestamp - self.start_timestamp) % TIMESTAMP_MOD
+        return int(round(elapsed * self.fps / self.clock_rate))
+
+    @classmethod
+    def parse_tag(cls, packet):
+        """ Return the (frame_index, packet_index) stored in a synthetic packet's payload. """
+        return cls.TAG.unpack_from(packet.payload.tobytes())
+
+
+def _filler(frame_index, size):
+    """ Bytes that differ between frames and never contain a 0xff JPEG marker prefix. """
+    return bytes(bytearray((frame_index + index) % 0xff for index in range(size)))
+
+
+class SyntheticJpegSource(SyntheticRtpSource):
+    """
+    Produce a JPEG stream packetized as in RFC 2435.
+
+    The scan data of each frame is tagged with the frame index and split into packets of at
+    most payload_size bytes, each with the RTP/JPEG header of a 4:2:0 image.
+
+    Args:
+        width (int): image width in pixels, a multiple of 8.
+        height (int): image height in pixels, a multiple of 8.
+        quality (int): the RTP/JPEG Q value, 1-99.
+        scan_size (int): bytes of scan data per frame.
+        payload_size (int): most bytes of payload per packet.
+        The other arguments are those of SyntheticRtpSource.
+    """
+
+    JPEG_TYPE = 1
+
+    def __init__(self, width=64, height=48, quality=50, scan_size=3000, payload_size=1000,
+                 **kwargs):
+        super(SyntheticJpegSource, self).__init__(payload_size=payload_size,
+                                                  payload_type=PAYLOAD_TYPE_JPEG, **kwargs)
+        self.width = width
+        self.height = height
+        self.quality = quality
+        self.scan_size = max(scan_size, self.TAG.size)
+
+    def scan(self, frame_index):
+        return self.TAG.pack(frame_index, 0) + _filler(frame_index,
+                                                       self.scan_size - self.TAG.size)
+
+    def frame_payloads(self, frame_index):
+        scan = self.scan(frame_index)
+        header = struct.pack('!BBBB', self.JPEG_TYPE, self.quality, self.width // 8,
+                             self.height // 8)
+        chunk = self.payload_size - 8
+        # The type-specific byte before the 24 bit fragment offset is 0.
+        return [struct.pack('!I', offset) + header + scan[offset:offset + chunk]
+                for offset in range(0, len(scan), chunk)]
+
+    def frame_data(self, frame_index):
+        """ Return the JPEG image of a frame, headers included. """
+        return make_jpeg_header(self.JPEG_TYPE, self.quality, self.width // 8,
+                                self.height // 8) + self.scan(frame_index) + b'\xff\xd9'
+
+
+class SyntheticH264Source(SyntheticRtpSource):
+    """
+    Produce an H.264 stream packetized as in RFC 6184.
+
+    Keyframes send their SPS and PPS together in a STAP-A packet, then an IDR slice. Other
+    frames hold one non-IDR slice. Slices larger than payload_size are split into FU-A
+    fragments, and the slices are tagged with the frame index.
+
+    Args:
+        slice_size (int): bytes of each slice NAL unit, header included.
+        keyframe_interval (int): frames from one keyframe to the next.
+        payload_size (int): most bytes of payload per packet.
+        The other arguments are those of SyntheticRtpSource.
+    """
+
+    START_CODE = b'\x00\x00\x00\x01'
+    SPS = b'\x67\x42\x00\x1f\xe9'
+    PPS = b'\x68\xce\x3c\x80'
+    NAL_STAP_A = 24
+    NAL_FU_A = 28
+
+    def __init__(self, slice_size=2500, keyframe_interval=10, payload_size=1000, **kwargs):
+        super(SyntheticH264Source, self).__init__(payload_size=payload_size,
+                                                  payload_type=PAYLOAD_TYPE_H264, **kwargs)
+        self.slice_size = max(slice_size, 1 + self.TAG.size)
+        self.keyframe_interval = keyframe_interval
+
+    def is_keyframe(self, frame_index):
+        return frame_index % self.keyframe_interval == 0
+
+    def nal_units(self, frame_index):
+        """ Return the NAL units of a frame, in decoding order. """
+        # nal_ref_idc 3 with type 5 (IDR slice), or nal_ref_idc 2 with type 1 (non-IDR slice).
+        slice_header = b'\x65' if self.is_keyframe(frame_index) else b'\x41'
+        body = self.TAG.pack(frame_index, 0) + _filler(frame_index,
+                                                       self.slice_size - 1 - self.TAG.size)
+        nals = [slice_header + body]
+        if self.is_keyframe(frame_index):
+            nals[:0] = [self.SPS, self.PPS]
+        return nals
+
+    def frame_payloads(self, frame_index):
+        nals = self.nal_units(frame_index)
+        payloads = []
+        if self.is_keyframe(frame_index):
+            parameter_sets, nals = nals[:2], nals[2:]
+            payloads.append(struct.pack('!B', 0x60 | self.NAL_STAP_A) + b''.join(
+                struct.pack('!H', len(nal)) + nal for nal in parameter_sets))
+        for nal in nals:
+            if len(nal) <= self.payload_size:
+                payloads.append(nal)
+                continue
+            header = bytearray(nal[:1])[0]
+            indicator = struct.pack('!B', (header & 0xe0) | self.NAL_FU_A)
+            chunk = self.payload_size - 2
+            starts = range(1, len(nal), chunk)
+            for start in starts:
+                flags = (0x80 if start == 1 else 0) | (0x40 if start + chunk >= len(nal) else 0)
+                payloads.append(indicator + struct.pack('!B', flags | (header & 0x1f))
+                                + nal[start:start + chunk])
+        return payloads
+
+    def frame_data(self, frame_index):
+        """ Return the Annex B access unit of a frame. """
+        return b''.join(self.START_CODE + nal for nal in self.nal_units(frame_index))
+
+
+class NetworkEmulator(object):
+    """
+    Apply delay, jitter, reordering and loss to a timed packet sequence.
+
+    Args:
+        delay (float): fixed one-way delay in seconds.
+        jitter (float): standard deviation of the random extra delay, in seconds.
+        reorder (float): probability that a packet is held back behind its successors.
+        reorder_delay (float): extra delay applied to reordered packets, in seconds.
+        loss (float): probability that a packet is dropped.
+        seed (int): seed for a reproducible run.
+    """
+
+    def __init__(self, delay=0.02, jitter=0.005, reorder=0.0, reorder_delay=0.01, loss=0.0,
+                 seed=None):
+        self.delay = delay
+        self.jitter = jitter
+        self.reorder = reorder
+        self.reorder_delay = reorder_delay
+        self.loss = loss
+        self.random = random.Random(seed)
+        self.dropped = 0
+
+    def transit(self, send_time):
+        """ Return the arrival time of a packet sent at send_time, or None if it is lost. """
+        if self.random.random() < self.loss:
+            self.dropped += 1
+            return None
+        arrival = send_time + self.delay + abs(self.random.gauss(0.0, self.jitter))
+        if self.random.random() < self.reorder:
+            arrival += self.reorder_delay
+        return arrival
+
+    def transmit(self, timed_packets):
+        """
+        Deliver (send_time, packet) tuples.
+
+        Returns:
+            list: (arrival_time, packet) tuples, sorted by arrival time.
+        """
+        arrivals = []
+        for send_time, packet in timed_packets:
+            arrival = self.transit(send_time)
+            if arrival is not None:
+                arrivals.append((arrival, packet))
+        arrivals.sort(key=lambda item: item[0])
+        return arrivals
+
+
+def send_synthetic_stream(host, port, source=None, network=None, duration=10.0):
+    """
+    Send a synthetic stream to a local UDP port in real time.
+
+    Args:
+        host (str): destination address.
+        port (int): destination port.
+        source (SyntheticRtpSource): the stream to send, a 15fps stream by default.
+        network (NetworkEmulator): optional impairments to apply before sending.
+        duration (float): seconds of video to send.
+    """
+    source = source or SyntheticRtpSource()
+    timed_packets = source.packets(int(duration * source.fps), start_time=0.0)
+    if network is not None:
+        timed_packets = network.transmit(timed_packets)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    start = time.time()
+    try:
+        for offset, packet in timed_packets:
+            wait = start + offset - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            sock.sendto(packet.data, (host, port))
+    finally:
+        sock.close()
@@ -0,0 +1,9 @@
+"""
+The client scripts run from this directory, with the skydio package importable from it.
+"""
+from __future__ import absolute_import
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,115 @@
+"""
+Run CloudAPIClient against the local stand-in Cloud API server.
+"""
+from __future__ import absolute_import
+
+import threading
+
+import pytest
+
+from skydio.cloud import update_util
+from skydio.cloud.stand_in_server import StandInServer
+from skydio.cloud.update_util import CloudAPIClient
+from skydio.cloud.update_util import CloudAPIException
+from skydio.cloud.update_util import TokenManager
+
+USER_EMAIL = 'pilot@example.com'
+RETRY_BACKOFF = 0.01
+
+
+@pytest.fixture
+def server():
+    stand_in = StandInServer().start()
+    yield stand_in
+    stand_in.stop()
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    """ The upper bound of each retry delay drawn, with the delays themselves kept short. """
+    bounds = []
+
+    def uniform(low, high):
+        bounds.append((low, high))
+        return low
+
+    monkeypatch.setattr(update_util.random, 'uniform', uniform)
+    return bounds
+
+
+def _client(server, tokens=None):
+    tokens = tokens or TokenManager(server.url, USER_EMAIL, use_stored_tokens=False)
+    return CloudAPIClient(server.url, USER_EMAIL, refresh_token=server.refresh_token,
+                          use_stored_tokens=False, retry_backoff=RETRY_BACKOFF,
+                          token_manager=tokens)
+
+
+def _cloud_config(client):
+    return client.post('cloud_config', '', send_proto_data=True)
+
+
+def test_requests_reuse_one_connection(server):
+    client = _client(server)
+    try:
+        client.refresh()
+        for _ in range(5):
+            assert _cloud_config(client) == server.cloud_config
+    finally:
+        client.close()
+    assert server.requests == {'auth/refresh': 1, 'cloud_config': 5}
+    assert server.connections == 1
+
+
+def test_transient_failures_are_retried_with_jitter(server, delays):
+    client = _client(server)
+    try:
+        client.refresh()
+        server.fail('cloud_config', [503, 502, None])
+        assert _cloud_config(client) == server.cloud_config
+    finally:
+        client.close()
+    assert server.requests['cloud_config'] == 4
+    # Full jitter: each delay is drawn from zero up to a doubling backoff.
+    assert delays == [(0, RETRY_BACKOFF), (0, 2 * RETRY_BACKOFF), (0, 4 * RETRY_BACKOFF)]
+
+
+def test_client_errors_are_not_retried(server, delays):
+    client = _client(server)
+    try:
+        client.refresh()
+        server.fail('cloud_config', [404])
+        with pytest.raises(CloudAPIException) as raised:
+            _cloud_config(client)
+    finally:
+        client.close()
+    assert raised.value.code == 404
+    assert server.requests['cloud_config'] == 1
+    assert delays == []
+
+
+def test_concurrent_callers_share_one_refresh(server):
+    tokens = TokenManager(server.url, USER_EMAIL, use_stored_tokens=False)
+    clients = [_client(server, tokens) for _ in range(8)]
+    clients[0].refresh()
+    server.expire_access_token()
+
+    start = threading.Barrier(len(clients)) if hasattr(threading, 'Barrier') else None
+    replies = []
+
+    def call(client):
+        if start is not None:
+            start.wait()
+        replies.append(_cloud_config(client))
+
+    threads = [threading.Thread(target=call, args=(client,)) for client in clients]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        for client in clients:
+            client.close()
+    assert replies == [server.cloud_config] * len(clients)
+    # One refresh to log in, and one for all the callers that found the token expired.
+    assert server.requests['auth/refresh'] == 2
@@ -0,0 +1,92 @@
+"""
+Reassemble synthetic RFC 2435 and RFC 6184 streams passed through an emulated network.
+"""
+from __future__ import absolute_import
+
+from collections import Counter
+
+from skydio.streaming.depacketizer import H264Depacketizer
+from skydio.streaming.depacketizer import JpegDepacketizer
+from skydio.streaming.jitter_buffer import JitterBuffer
+from skydio.streaming.synthetic import NetworkEmulator
+from skydio.streaming.synthetic import SyntheticH264Source
+from skydio.streaming.synthetic import SyntheticJpegSource
+
+
+def _receive(depacketizer, arrivals):
+    """ Put the packets back in order with a jitter buffer and depacketize them. """
+    buffer = JitterBuffer(target_latency=0.1, adaptive=False)
+    frames = []
+    for arrival_time, packet in arrivals:
+        for released in buffer.pop(now=arrival_time):
+            frames.extend(depacketizer.push(released))
+        buffer.push(packet, arrival_time=arrival_time)
+    for released in buffer.flush():
+        frames.extend(depacketizer.push(released))
+    assert buffer.late_drops == 0
+    return frames
+
+
+def _complete_frames(source, arrivals, num_frames):
+    """ Indexes of the frames every packet of which arrived. """
+    arrived = Counter(source.frame_index_of(packet.timestamp) for _, packet in arrivals)
+    return [index for index in range(num_frames)
+            if arrived[index] == len(source.frame_payloads(index))]
+
+
+def test_jpeg_frames_survive_reordering_and_only_complete_ones_are_kept():
+    source = SyntheticJpegSource(fps=30.0, scan_size=3500, payload_size=1000, ssrc=1,
+                                 start_sequence=65500, start_timestamp=2 ** 32 - 9000)
+    network = NetworkEmulator(delay=0.02, jitter=0.003, reorder=0.1, reorder_delay=0.015,
+                              loss=0.03, seed=11)
+    arrivals = network.transmit(source.packets(200))
+    depacketizer = JpegDepacketizer()
+
+    frames = _receive(depacketizer, arrivals)
+    indexes = [source.frame_index_of(frame.timestamp) for frame in frames]
+
+    assert network.dropped > 0
+    assert indexes == _complete_frames(source, arrivals, 200)
+    assert all(frame.data == source.frame_data(index) for frame, index in zip(frames, indexes))
+    assert all(frame.keyframe for frame in frames)
+    assert depacketizer.dropped_frames > 0
+
+
+def test_h264_fragmented_units_are_rebuilt():
+    source = SyntheticH264Source(fps=30.0, slice_size=2500, payload_size=1000,
+                                 keyframe_interval=5, ssrc=2, start_sequence=65530)
+    # Keyframes send SPS and PPS in a STAP-A, then an IDR slice in three FU-A fragments.
+    assert len(source.frame_payloads(0)) == 4
+    network = NetworkEmulator(delay=0.02, jitter=0.003, reorder=0.2, reorder_delay=0.015,
+                              seed=5)
+    arrivals = network.transmit(source.packets(50))
+
+    frames = _receive(H264Depacketizer(), arrivals)
+    indexes = [source.frame_index_of(frame.timestamp) for frame in frames]
+
+    assert indexes == list(range(50))
+    assert [frame.data for frame in frames] == [source.frame_data(index) for index in indexes]
+    assert [frame.keyframe for frame in frames] == [index % 5 == 0 for index in indexes]
+
+
+def _depacketize_without(source, num_frames, lost):
+    """ Depacketize the stream in order, leaving out the packets at the given positions. """
+    depacketizer = H264Depacketizer()
+    frames = []
+    for position, (_, packet) in enumerate(source.packets(num_frames)):
+        if position not in lost:
+            frames.extend(depacketizer.push(packet))
+    return frames
+
+
+def test_h264_lost_fragments_damage_the_unit():
+    # Packets 0-3 are the keyframe: STAP-A, then the first, middle and last FU-A fragments.
+    for lost in (2, 1):
+        source = SyntheticH264Source(slice_size=2500, payload_size=1000, ssrc=3)
+        frames = _depacketize_without(source, 2, {lost})
+        assert len(frames) == 2
+        damaged, following = frames
+        assert not damaged.keyframe
+        assert damaged.data != source.frame_data(0)
+        assert damaged.data.startswith(source.frame_data(0)[:len(source.SPS) + 4])
+        assert following.data == source.frame_data(1)
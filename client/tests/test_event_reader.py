@@ -0,0 +1,108 @@
+"""
+Read gamepad event frames from a pipe standing in for an event device.
+"""
+from __future__ import absolute_import
+
+import os
+
+import pytest
+
+from skydio.input_devices.calibration import f310_profile
+from skydio.input_devices.event_reader import EV_ABS
+from skydio.input_devices.event_reader import EV_KEY
+from skydio.input_devices.event_reader import EV_SYN
+from skydio.input_devices.event_reader import EvdevReader
+from skydio.input_devices.event_reader import INPUT_EVENT
+from skydio.input_devices.event_reader import SYN_DROPPED
+from skydio.input_devices.event_reader import SYN_REPORT
+from skydio.input_devices.gamepad import Gamepad
+
+ABS_X = 0x00
+ABS_Y = 0x01
+BTN_SOUTH = 0x130
+
+
+@pytest.fixture
+def device(tmp_path):
+    """ An EvdevReader on a pipe, and a function writing (type, code, value) events to it. """
+    path = str(tmp_path / 'event0')
+    os.mkfifo(path)
+    reader = EvdevReader(path)
+    writer = os.open(path, os.O_WRONLY)
+    seconds = [0]
+
+    def write(*events):
+        data = b''
+        for event_type, code, value in events:
+            seconds[0] += 1
+            data += INPUT_EVENT.pack(seconds[0], 0, event_type, code, value)
+        os.write(writer, data)
+
+    yield reader, write
+    os.close(writer)
+    reader.close()
+
+
+def _report():
+    return (EV_SYN, SYN_REPORT, 0)
+
+
+def test_frames_end_at_each_report(device):
+    reader, write = device
+    write((EV_ABS, ABS_X, 100), (EV_KEY, BTN_SOUTH, 1), _report(), (EV_ABS, ABS_Y, -5),
+          _report())
+    frames = reader.read(timeout=1.0)
+    assert [changes for _, changes in frames] == [{'ABS_X': 100, 'BTN_SOUTH': 1},
+                                                  {'ABS_Y': -5}]
+    assert frames[0][0] == 3.0
+
+
+def test_dropped_events_are_replaced_by_the_device_state(device, monkeypatch):
+    reader, write = device
+    monkeypatch.setattr(reader, 'device_state',
+                        lambda: {'ABS_X': 0, 'ABS_Y': 0, 'BTN_SOUTH': 0, 'BTN_EAST': 0})
+    write((EV_ABS, ABS_X, 20000), _report(),
+          # The stick returning to center is lost with the overflow.
+          (EV_SYN, SYN_DROPPED, 0), (EV_ABS, ABS_Y, 7), _report())
+    frames = reader.read(timeout=1.0)
+    assert [changes for _, changes in frames] == [
+        {'ABS_X': 20000}, {'ABS_X': 0, 'ABS_Y': 0, 'BTN_SOUTH': 0, 'BTN_EAST': 0}]
+
+
+def test_dropped_events_reset_what_was_seen_if_the_device_cannot_be_read(device):
+    reader, write = device
+    write((EV_ABS, ABS_X, 20000), (EV_KEY, BTN_SOUTH, 1), _report(), (EV_SYN, SYN_DROPPED, 0),
+          _report())
+    # A pipe cannot be queried like an event device.
+    with pytest.raises((IOError, OSError)):
+        reader.device_state()
+    frames = reader.read(timeout=1.0)
+    assert frames[1][1] == {'ABS_X': None, 'BTN_SOUTH': 0}
+
+
+class _ScriptedReader(object):
+    """ Hands out a list of frames one read at a time. """
+
+    name = 'scripted'
+
+    def __init__(self, frames):
+        self.frames = list(frames)
+
+    def read(self, timeout=None):
+        return [self.frames.pop(0)] if self.frames else []
+
+    def close(self):
+        pass
+
+
+def test_gamepad_reads_unknown_axes_as_at_rest():
+    reader = _ScriptedReader([(1.0, {'ABS_X': 32767, 'ABS_Y': -32768})])
+    gamepad = Gamepad(reader=_ScriptedReader([]), profile=f310_profile())
+    gamepad.close()
+    gamepad.reader = reader
+    gamepad.update()
+    assert any(gamepad.get_command())
+    reader.frames.append((2.0, {'ABS_X': None, 'ABS_Y': None}))
+    gamepad.update()
+    assert 'ABS_X' not in gamepad.codes
+    assert not any(gamepad.get_command())
@@ -0,0 +1,137 @@
+"""
+Deploy a cloud config to a fleet of stand-in vehicles, fetched from a stand-in Cloud API.
+"""
+from __future__ import absolute_import
+
+import json
+import sys
+import threading
+
+import pytest
+
+from skydio.cloud import fleet_deploy
+from skydio.cloud import update_util
+from skydio.cloud.stand_in_server import StandInServer
+
+USER_EMAIL = 'pilot@example.com'
+
+
+@pytest.fixture
+def cloud(tmp_path, monkeypatch):
+    """ A stand-in Cloud API, logged in to through a token store of the test's own. """
+    monkeypatch.setattr(update_util, 'CLOUD_API_HOME_DIR', str(tmp_path))
+    server = StandInServer(cloud_config=b'fleet cloud config').start()
+    # pylint: disable=protected-access
+    update_util._store_local_refresh_token(USER_EMAIL, server.refresh_token, server.url)
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def vehicles():
+    servers = []
+
+    def start(count):
+        servers.extend(StandInServer().start() for _ in range(count))
+        return servers
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+def _deploys(servers):
+    return [fleet_deploy.VehicleDeploy(server.url, vehicle_id='r1-{}'.format(number))
+            for number, server in enumerate(servers)]
+
+
+def test_uploads_run_at_most_parallel_at_once(cloud, vehicles):
+    servers = vehicles(6)
+    for server in servers:
+        server.delays['api/update_cloud_config'] = 0.1
+    deploys = _deploys(servers)
+    lock = threading.Lock()
+    active = set()
+    most_active = []
+
+    def progress(deploy):
+        with lock:
+            if deploy.state in (fleet_deploy.AUTHENTICATING, fleet_deploy.UPLOADING):
+                active.add(deploy.name)
+            else:
+                active.discard(deploy.name)
+            most_active.append(len(active))
+
+    fleet_deploy.deploy_to_fleet(USER_EMAIL, deploys, cloud_url=cloud.url, parallel=2,
+                                 progress=progress)
+    assert max(most_active) == 2
+    assert [deploy.state for deploy in deploys] == [fleet_deploy.DONE] * len(deploys)
+    for server in servers:
+        assert server.uploads == [cloud.cloud_config]
+        assert server.skills_refreshes == 1
+
+
+def test_a_failing_vehicle_only_fails_its_deploy(cloud, vehicles, monkeypatch):
+    servers = vehicles(4)
+    # One vehicle keeps failing, another hits an error nobody expected.
+    servers[1].fail('api/update_cloud_config', [500] * 3)
+    push_cloud_config = fleet_deploy.push_cloud_config
+
+    def push_or_crash(vehicle_url, *args, **kwargs):
+        if vehicle_url == servers[2].url:
+            raise KeyError('accessToken')
+        return push_cloud_config(vehicle_url, *args, **kwargs)
+
+    monkeypatch.setattr(fleet_deploy, 'push_cloud_config', push_or_crash)
+    deploys = _deploys(servers)
+    fleet_deploy.deploy_to_fleet(USER_EMAIL, deploys, cloud_url=cloud.url, parallel=1,
+                                 retries=2, retry_backoff=0.01)
+
+    assert [deploy.state for deploy in deploys] == [
+        fleet_deploy.DONE, fleet_deploy.FAILED, fleet_deploy.FAILED, fleet_deploy.DONE]
+    assert deploys[1].attempts == 3
+    assert deploys[1].error.startswith('HTTPError: 500')
+    # Unexpected errors are not retried.
+    assert deploys[2].attempts == 1
+    assert deploys[2].error == "KeyError: 'accessToken'"
+    assert [len(server.uploads) for server in servers] == [1, 0, 0, 1]
+
+
+def test_summary_records_each_vehicle(cloud, vehicles, tmp_path, monkeypatch, capsys):
+    servers = vehicles(3)
+    servers[2].fail('api/update_cloud_config', [None])
+    fleet = [{'url': server.url, 'id': 'r1-{}'.format(number)}
+             for number, server in enumerate(servers)]
+    fleet_path = tmp_path / 'fleet.json'
+    with open(str(fleet_path), 'w') as fleet_file:
+        json.dump(fleet, fleet_file)
+    summary_path = tmp_path / 'summary.json'
+    monkeypatch.setattr(sys, 'argv', [
+        'fleet_deploy', USER_EMAIL, str(fleet_path), '--skydio-api-url', cloud.url,
+        '--retries', '0', '--summary', str(summary_path)])
+
+    with pytest.raises(SystemExit) as exited:
+        fleet_deploy.main()
+    assert exited.value.code == 1
+    assert '2 vehicles updated, 0 unchanged, 1 failed' in capsys.readouterr().out
+
+    with open(str(summary_path), 'r') as summary_file:
+        summary = json.load(summary_file)
+    cache = update_util.CloudConfigCache(USER_EMAIL, cloud.url)
+    assert summary['cloud_config'] == cache.vehicle_digest('r1-0')
+    assert [(vehicle['id'], vehicle['state'], vehicle['attempts'])
+            for vehicle in summary['vehicles']] == [
+        ('r1-0', fleet_deploy.DONE, 1), ('r1-1', fleet_deploy.DONE, 1),
+        ('r1-2', fleet_deploy.FAILED, 1)]
+    assert [vehicle['digest'] for vehicle in summary['vehicles']] == \
+        [summary['cloud_config']] * 2 + [None]
+    assert summary['vehicles'][2]['error'].startswith('ConnectionError')
+
+
+def test_vehicles_with_the_config_are_unchanged(cloud, vehicles):
+    servers = vehicles(2)
+    fleet_deploy.deploy_to_fleet(USER_EMAIL, _deploys(servers), cloud_url=cloud.url)
+    deploys = _deploys(servers)
+    fleet_deploy.deploy_to_fleet(USER_EMAIL, deploys, cloud_url=cloud.url)
+    assert [deploy.state for deploy in deploys] == [fleet_deploy.UNCHANGED] * 2
+    assert [len(server.uploads) for server in servers] == [1, 1]
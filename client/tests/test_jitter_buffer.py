@@ -0,0 +1,88 @@
+"""
+Run the jitter buffer over synthetic streams passed through an emulated network.
+"""
+from __future__ import absolute_import
+
+from skydio.streaming.jitter_buffer import JitterBuffer
+from skydio.streaming.rtp import RtpPacket
+from skydio.streaming.synthetic import NetworkEmulator
+from skydio.streaming.synthetic import SyntheticRtpSource
+
+PACKETS_PER_FRAME = 4
+
+
+def _source():
+    # Start close to the end of the sequence space to exercise wrapping.
+    return SyntheticRtpSource(fps=30.0, packets_per_frame=PACKETS_PER_FRAME, payload_size=64,
+                              ssrc=1234, start_sequence=65000, start_timestamp=1000)
+
+
+def _play(buffer, arrivals):
+    """ Push the packets at their arrival times, popping as a receiver would. """
+    released = []
+    for arrival_time, packet in arrivals:
+        released.extend(buffer.pop(now=arrival_time))
+        buffer.push(packet, arrival_time=arrival_time)
+    released.extend(buffer.flush())
+    return released
+
+
+def _positions(packets):
+    """ The index of each packet in the stream as sent. """
+    positions = []
+    for packet in packets:
+        frame_index, packet_index = SyntheticRtpSource.parse_tag(packet)
+        positions.append(frame_index * PACKETS_PER_FRAME + packet_index)
+    return positions
+
+
+def test_reordering_and_loss_are_undone_in_order():
+    network = NetworkEmulator(delay=0.02, jitter=0.003, reorder=0.1, reorder_delay=0.015,
+                              loss=0.05, seed=7)
+    arrivals = network.transmit(_source().packets(300))
+    buffer = JitterBuffer(target_latency=0.1, adaptive=False)
+
+    released = _play(buffer, arrivals)
+    positions = _positions(released)
+
+    assert positions == sorted(positions)
+    assert len(set(positions)) == len(positions)
+    # The latency covers the reordering, so every packet that arrived is played out.
+    assert buffer.late_drops == 0
+    assert len(released) == len(arrivals) == buffer.received
+    assert network.dropped > 0
+    # Every packet dropped by the network between the first and last released one is lost.
+    assert buffer.lost == positions[-1] - positions[0] + 1 - len(released)
+
+
+def test_packets_later_than_the_latency_are_dropped():
+    network = NetworkEmulator(delay=0.02, jitter=0.001, reorder=0.2, reorder_delay=0.1,
+                              seed=3)
+    arrivals = network.transmit(_source().packets(300))
+    buffer = JitterBuffer(target_latency=0.02, adaptive=False)
+
+    released = _play(buffer, arrivals)
+    positions = _positions(released)
+
+    assert positions == sorted(positions)
+    assert buffer.late_drops > 0
+    assert buffer.released + buffer.late_drops == buffer.received == len(arrivals)
+    # The network dropped nothing, so the packets skipped are exactly the late ones.
+    assert buffer.lost == buffer.late_drops
+
+
+def test_late_packet_after_its_successor_played_out():
+    buffer = JitterBuffer(target_latency=0.05, adaptive=False)
+    first, second, third = (
+        RtpPacket.build(b'x', payload_type=26, sequence=sequence, timestamp=sequence * 3000,
+                        ssrc=1)
+        for sequence in (1, 2, 3))
+
+    assert buffer.push(first, arrival_time=0.0)
+    assert buffer.push(third, arrival_time=2 * 3000 / 90000.0)
+    assert [packet.sequence for packet in buffer.pop(now=1.0)] == [1, 3]
+    assert buffer.lost == 1
+
+    assert not buffer.push(second, arrival_time=1.0)
+    assert buffer.late_drops == 1
+    assert buffer.pop(now=2.0) == []
@@ -0,0 +1,138 @@
+"""
+Record synthetic streams into segments and play them back through the memory-mapped reader.
+"""
+from __future__ import absolute_import
+
+import os
+
+import pytest
+
+from skydio.streaming.depacketizer import H264Depacketizer
+from skydio.streaming.playback import RecordingReader
+from skydio.streaming.recorder import KIND_H264
+from skydio.streaming.recorder import KIND_JPEG
+from skydio.streaming.recorder import KIND_PACKETS
+from skydio.streaming.recorder import RecordingIndex
+from skydio.streaming.recorder import StreamRecorder
+from skydio.streaming.recorder import list_segments
+from skydio.streaming.recorder import segment_paths
+from skydio.streaming.synthetic import SyntheticH264Source
+from skydio.streaming.synthetic import SyntheticJpegSource
+
+SEGMENT_SIZE = 8000
+NUM_FRAMES = 20
+
+
+def _record(directory, timed_packets, **kwargs):
+    """ Record (wall time, packet) pairs, forcing small batches and segments. """
+    recorder = StreamRecorder(directory, segment_size=SEGMENT_SIZE, batch_size=2000, **kwargs)
+    try:
+        for wall_time, packet in timed_packets:
+            recorder.write_packet(packet, wall_time=wall_time)
+    finally:
+        recorder.close()
+    return recorder
+
+
+@pytest.fixture
+def jpeg_recording(tmp_path):
+    """ A packet recording of a JPEG stream, and the (wall time, packet) pairs recorded. """
+    directory = str(tmp_path / 'jpeg')
+    source = SyntheticJpegSource(scan_size=3500, payload_size=1000, ssrc=1,
+                                 start_sequence=65530)
+    timed_packets = list(source.packets(NUM_FRAMES, start_time=100.0))
+    _record(directory, timed_packets)
+    return directory, source, timed_packets
+
+
+def test_records_roll_over_without_straddling_segments(jpeg_recording):
+    directory, _, timed_packets = jpeg_recording
+    numbers = list_segments(directory)
+    assert len(numbers) > 1
+    index = RecordingIndex(directory)
+    assert len(index) == len(timed_packets)
+    for number, segment in zip(numbers, index.segments):
+        segment_path, _ = segment_paths(directory, 'stream', number)
+        assert segment.kind == KIND_PACKETS
+        assert os.path.getsize(segment_path) == segment.data_size <= SEGMENT_SIZE
+        # Each record starts where the one before it ends.
+        assert segment.offsets == [0] + [offset + size for offset, size in
+                                         zip(segment.offsets[:-1], segment.sizes[:-1])]
+
+
+def test_a_recording_continues_in_new_segments(jpeg_recording):
+    directory, _, timed_packets = jpeg_recording
+    numbers = list_segments(directory)
+    source = SyntheticJpegSource(scan_size=3500, payload_size=1000)
+    more = list(source.packets(2, start_time=200.0))
+    _record(directory, more)
+
+    assert list_segments(directory)[:len(numbers)] == numbers
+    assert len(RecordingIndex(directory)) == len(timed_packets) + len(more)
+
+
+def test_mapped_records_match_what_was_written(jpeg_recording):
+    directory, source, timed_packets = jpeg_recording
+    with RecordingReader(directory) as reader:
+        assert reader.frame_kind == KIND_JPEG
+        assert len(reader) == len(timed_packets)
+        for position, (wall_time, packet) in enumerate(timed_packets):
+            entry = reader.entry(position)
+            assert (entry.wall_time, entry.rtp_timestamp) == (wall_time, packet.timestamp)
+            assert bytes(reader.read(position)) == packet.data
+
+        frames = [bytes(data) for _, data in reader.frames()]
+        assert frames == [source.frame_data(index) for index in range(NUM_FRAMES)]
+
+
+def test_wall_time_lookup_across_segments(jpeg_recording):
+    directory, _, timed_packets = jpeg_recording
+    wall_times = [wall_time for wall_time, _ in timed_packets]
+    with RecordingReader(directory) as reader:
+        for position, wall_time in enumerate(wall_times):
+            assert reader.seek(wall_time) == position
+            assert reader.seek(wall_time + 0.0001) == position
+        # Times outside the recording are clamped to its ends.
+        assert reader.seek(wall_times[0] - 10) == 0
+        assert reader.seek(wall_times[-1] + 10) == len(wall_times) - 1
+
+        first_rollover = len(reader.index.segments[0])
+        start, end = wall_times[first_rollover - 2], wall_times[first_rollover + 3]
+        entries = [entry for entry, _ in reader.time_range(start, end)]
+        assert [entry.wall_time for entry in entries] == \
+            [wall_time for wall_time in wall_times if start <= wall_time < end]
+
+
+def test_a_truncated_index_entry_is_ignored(jpeg_recording):
+    directory, _, timed_packets = jpeg_recording
+    _, index_path = segment_paths(directory, 'stream', list_segments(directory)[-1])
+    # A recorder killed part way through writing an entry.
+    with open(index_path, 'ab') as index_file:
+        index_file.write(b'\x01' * 7)
+
+    with RecordingReader(directory) as reader:
+        assert len(reader) == len(timed_packets)
+        assert bytes(reader.read(len(reader) - 1)) == timed_packets[-1][1].data
+
+
+def test_scrubbing_h264_lands_on_keyframes(tmp_path):
+    directory = str(tmp_path / 'h264')
+    source = SyntheticH264Source(fps=10.0, slice_size=1500, keyframe_interval=4, ssrc=2)
+    depacketizer = H264Depacketizer()
+    recorder = StreamRecorder(directory, kind=KIND_H264, segment_size=SEGMENT_SIZE)
+    try:
+        for wall_time, packet in source.packets(NUM_FRAMES, start_time=0.0):
+            for frame in depacketizer.push(packet):
+                recorder.write_frame(frame, wall_time=wall_time)
+    finally:
+        recorder.close()
+
+    with RecordingReader(directory) as reader:
+        assert len(list_segments(directory)) > 1
+        assert len(reader) == NUM_FRAMES
+        assert [bytes(data) for _, data in reader.frames()] == \
+            [source.frame_data(index) for index in range(NUM_FRAMES)]
+        # 0.65s is between frames 6 and 7, and the keyframe before frame 6 is frame 4.
+        entries = [entry for entry, _ in reader.scrub([0.65, 0.0, 1.95])]
+        assert [reader.seek(entry.wall_time) for entry in entries] == [4, 0, 16]
+        assert all(entry.flags for entry in entries)
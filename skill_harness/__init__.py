@@ -0,0 +1,48 @@
+"""
+Offline skill harness
+
+Run the skills in skillset/ on a computer, without a vehicle or the vehicle's software. The sdk
+directory holds small stand-ins for the parts of vehicle.skills, shared.util and lcmtypes that
+skills import, and StandInAPI stands in for the `api` passed to every callback, with a simple
+kinematic vehicle, person tracks, obstacles and waypoints.
+
+    from skill_harness import Simulation, StandInAPI, load_skill
+
+    api = StandInAPI()
+    api.add_track(position=(6, 0, 0), velocity=(0, 1, 0))
+    sim = Simulation(load_skill('security_bot.SecurityBot'), api)
+    sim.run(seconds=60)
+    print(sim.format_report())
+
+Or from the repository root:
+
+    python -m skill_harness polygon_path.PolygonPath --seconds 60 --press 0:start
+
+python -m skill_harness.benchmarks times the skills in scripted scenarios against a stored
+baseline, see benchmarks.py.
+
+The stand-ins behave plausibly rather than exactly like the vehicle, so use the harness to
+benchmark skills and catch errors, not to tune flight behavior.
+"""
+from __future__ import absolute_import
+
+import os
+import sys
+
+SDK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sdk')
+SKILLSET_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            'skillset')
+
+
+def install():
+    """ Make the sdk stand-ins importable as vehicle, shared and lcmtypes. """
+    if SDK_DIR not in sys.path:
+        sys.path.insert(0, SDK_DIR)
+
+
+install()
+
+# pylint: disable=wrong-import-position
+from .api import StandInAPI  # noqa: E402
+from .simulation import Simulation  # noqa: E402
+from .simulation import load_skill  # noqa: E402
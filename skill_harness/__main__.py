@@ -0,0 +1,79 @@
+"""
+Run a skill in the offline harness and print how long each callback took.
+
+    python -m skill_harness property_tour.PropertyTour --seconds 120 --press 1:go
+    python -m skill_harness party_mode.PartyMode --people 20 --seconds 300
+    python -m skill_harness roof_inspection.RoofInspection --press 0:start --json
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+
+import argparse
+import json
+import logging
+
+from . import Simulation
+from . import StandInAPI
+from . import load_skill
+
+
+def timed(value):
+    """ Parse TIME:VALUE into (seconds, value). """
+    seconds, _, rest = value.partition(':')
+    return float(seconds), rest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('skill', help='the skill to run, as named in skillset/manifest.json')
+    parser.add_argument('--seconds', type=float, default=60.0,
+                        help='simulated seconds to run for')
+    parser.add_argument('--rate', type=float, default=8.0, help='ticks per simulated second')
+    parser.add_argument('--realtime', action='store_true',
+                        help='pace the ticks to the wall clock')
+    parser.add_argument('--press', type=timed, action='append', default=[], metavar='T:BUTTON',
+                        help='press a button at T seconds')
+    parser.add_argument('--rpc', type=timed, action='append', default=[], metavar='T:MESSAGE',
+                        help='send a message to the skill at T seconds')
+    parser.add_argument('--setting', type=timed, action='append', default=[],
+                        metavar='T:ID=VALUE', help='change a setting at T seconds')
+    parser.add_argument('--people', type=int, default=0,
+                        help='number of people walking around the vehicle')
+    parser.add_argument('--seed', type=int, default=0, help='seed for the random people')
+    parser.add_argument('--json', action='store_true', help='print the report as json')
+    parser.add_argument('--verbose', action='store_true', help='show the skill reports')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(message)s')
+
+    api = StandInAPI()
+    api.add_people(args.people, seed=args.seed)
+
+    try:
+        skill = load_skill(args.skill)
+    except (ImportError, AttributeError, SyntaxError) as error:
+        parser.error('could not load {}: {}'.format(args.skill, error))
+    sim = Simulation(skill, api, rate=args.rate, realtime=args.realtime)
+    for seconds, button in args.press:
+        sim.at(seconds, sim.press, button)
+    for seconds, message in args.rpc:
+        sim.at(seconds, sim.rpc, message)
+    for seconds, setting in args.setting:
+        identifier, _, value = setting.partition('=')
+        try:
+            value = float(value)
+        except ValueError:
+            pass
+        sim.at(seconds, sim.change_setting, identifier, value)
+
+    report = sim.run(seconds=args.seconds)
+    if args.json:
+        print(json.dumps(report, indent=2, sort_keys=True))
+    else:
+        print(sim.format_report())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,567 @@
+"""
+A stand-in for the `api` object the skills framework passes to skills.
+
+It holds a simulated world: a point-mass vehicle with a heading and gimbal, person tracks moving
+at constant velocity, obstacles as boxes, and saved waypoints. Skills send their commands
+through the same calls they use on the vehicle. Commands only last one tick, like on the
+vehicle, and step() moves the world forward by integrating them.
+"""
+from __future__ import absolute_import
+
+import math
+import random
+
+import numpy as np
+
+from vehicle.skills.util import core
+from vehicle.skills.util.transform import Rot3
+from vehicle.skills.util.transform import Transform
+
+# Vehicle limits used by the kinematic integration.
+MAX_SPEED = 16.0  # [m/s]
+MAX_ACCELERATION = 5.0  # [m/s^2]
+MAX_HEADING_RATE = math.radians(120)  # [rad/s]
+POSITION_GAIN = 1.0  # [1/s] velocity command per meter of position error
+
+# Meters per degree of latitude, for the flat earth gps conversion.
+METERS_PER_DEGREE = 111320.0
+
+
+class Vec3(object):
+    """ A vector message with x, y and z fields. """
+
+    def __init__(self, vector):
+        self.x, self.y, self.z = (float(v) for v in vector)
+
+
+class Classification(str):
+    """ A track classification that also has the `name` of an lcm enum. """
+
+    @property
+    def name(self):
+        return str(self)
+
+
+class Track(object):
+    """ A tracked object moving at constant velocity. """
+
+    def __init__(self, track_id, position, velocity=None, classification='PERSON',
+                 is_locked=True):
+        self.track_id = track_id
+        self.position = np.array(position, dtype=float)
+        self.velocity = np.zeros(3) if velocity is None else np.array(velocity, dtype=float)
+        self.classification = Classification(classification)
+        self.is_locked = is_locked
+
+    @property
+    def nav_frame(self):
+        return core.AttrDict(trans=core.AttrDict(position=Vec3(self.position)))
+
+    def step(self, dt):
+        self.position += self.velocity * dt
+
+
+class Commands(object):
+    """ The commands given during one tick, with their weights. """
+
+    def __init__(self):
+        self.desired_pos_nav = None
+        self.desired_vel_nav = None
+        self.desired_vel_body = None
+        self.heading = None
+        self.heading_rate = None
+        self.gimbal_pitch = None
+        self.max_speed = None
+
+
+class VehicleAPI(object):
+
+    def __init__(self, world):
+        self._world = world
+
+    def get_position(self):
+        return self._world.position.copy()
+
+    def get_velocity(self):
+        return self._world.velocity.copy()
+
+    def get_speed(self):
+        return float(np.linalg.norm(self._world.velocity))
+
+    def get_heading(self):
+        return self._world.heading
+
+    def get_gimbal_pitch(self):
+        return self._world.gimbal_pitch
+
+    def get_pose(self):
+        return Transform(Rot3.Ypr(self._world.heading, 0, 0), self._world.position)
+
+    def get_camera_trans(self):
+        return Transform(Rot3.Ypr(self._world.heading, self._world.gimbal_pitch, 0),
+                         self._world.position)
+
+    def get_azimuth(self, reference_point=None):
+        """ The direction of the vehicle as seen from the reference point. """
+        if reference_point is None:
+            return self._world.heading
+        delta = self._world.position - reference_point
+        return math.atan2(delta[1], delta[0])
+
+
+class MovementAPI(object):
+
+    def __init__(self, world):
+        self._world = world
+
+    @property
+    def _commands(self):
+        return self._world.commands
+
+    def set_desired_pos_nav(self, position, weight=1.0):
+        self._commands.desired_pos_nav = (np.array(position, dtype=float), weight)
+
+    def set_desired_vel_nav(self, velocity, weight=1.0):
+        self._commands.desired_vel_nav = (np.array(velocity, dtype=float), weight)
+
+    def set_desired_vel_body(self, velocity, weight=1.0):
+        self._commands.desired_vel_body = (np.array(velocity, dtype=float), weight)
+
+    def set_heading(self, heading, weight=1.0):
+        self._commands.heading = (heading, weight)
+
+    def set_heading_rate(self, rate, weight=1.0):
+        self._commands.heading_rate = (rate, weight)
+
+    def set_gimbal_pitch(self, pitch, weight=1.0):
+        self._commands.gimbal_pitch = (pitch, weight)
+
+    def set_max_speed(self, speed):
+        self._commands.max_speed = speed
+
+
+class RayTracer(object):
+    """ The result of the last double tap on the phone, as rays in the nav frame. """
+
+    def __init__(self):
+        self._ray_start = None
+        self._ray_end = None
+        self._focus_position = None
+
+
+class PhoneAPI(object):
+
+    def __init__(self):
+        self.movement_commands_enabled = True
+        self.variables = core.AttrDict(vars={})
+        self.ray_tracer = RayTracer()
+
+    def enable_movement_commands(self):
+        self.movement_commands_enabled = True
+
+    def disable_movement_commands(self):
+        self.movement_commands_enabled = False
+
+    def double_tap(self, start, end):
+        """ Simulate the user double tapping the image along a ray. """
+        # pylint: disable=protected-access
+        self.ray_tracer._ray_start = np.array(start, dtype=float)
+        self.ray_tracer._ray_end = np.array(end, dtype=float)
+        self.ray_tracer._focus_position = self.ray_tracer._ray_end
+
+    def clear_tap(self):
+        self.ray_tracer = RayTracer()
+
+
+class MotionState(object):
+
+    def __init__(self, utime, tracks, subject_locked):
+        self.utime = utime
+        self.tracker_state = core.AttrDict(tracks=tracks)
+        self.subject_locked = subject_locked
+
+
+class SubjectAPI(object):
+
+    def __init__(self, world):
+        self._world = world
+        self.subject_track_id = None
+        self.no_subject_requests = 0
+
+    def get_all_tracks(self):
+        return list(self._world.tracks.values())
+
+    def get_motion_state(self):
+        return MotionState(self._world.utime, self.get_all_tracks(),
+                           self.get_subject_track() is not None)
+
+    def get_subject_track(self):
+        return self._world.tracks.get(self.subject_track_id)
+
+    def has_subject_track(self):
+        return self.get_subject_track() is not None
+
+    def is_following_subject(self, utime=None):
+        return self.has_subject_track()
+
+    def select_track(self, utime, track_id):
+        if track_id in self._world.tracks:
+            self.subject_track_id = track_id
+
+    def cancel_subject_tracking(self, utime=None):
+        self.subject_track_id = None
+
+    def cancel_if_following(self, utime=None):
+        self.subject_track_id = None
+
+    def request_no_subject(self, utime=None):
+        self.no_subject_requests += 1
+        self.subject_track_id = None
+
+    def get_position(self):
+        track = self.get_subject_track()
+        return None if track is None else track.position.copy()
+
+    def get_velocity(self, default_if_none=None):
+        track = self.get_subject_track()
+        return default_if_none if track is None else track.velocity.copy()
+
+    def get_azimuth(self):
+        """ The direction the subject is moving, or None if it is still. """
+        velocity = self.get_velocity()
+        if velocity is None or np.linalg.norm(velocity[:2]) < 0.1:
+            return None
+        return math.atan2(velocity[1], velocity[0])
+
+
+class FocusAPI(object):
+    """ Framing of a subject: the vehicle holds a range, elevation and azimuth around it. """
+
+    def __init__(self, world):
+        self._world = world
+        self.settings = core.AttrDict(min_relative_height_enabled=False, min_relative_height=0.0)
+        self.custom_subject = None
+        self.keep_subject_in_sight = True
+        self.reset()
+
+    def reset(self):
+        """ Clear the per-tick framing commands. """
+        self.range = None
+        self.elevation = None
+        self.azimuth = None
+        self.azimuth_rate = None
+
+    def set_range(self, value, weight=1.0):
+        self.range = (value, weight)
+
+    def set_elevation(self, value, weight=1.0):
+        self.elevation = (value, weight)
+
+    def set_azimuth(self, value=None, weight=1.0):
+        self.azimuth = (value, weight) if value is not None and weight > 0 else None
+
+    def set_azimuth_rate(self, rate, weight=1.0):
+        self.azimuth_rate = (rate, weight)
+
+    def set_custom_subject(self, point):
+        self.custom_subject = np.array(point, dtype=float)
+
+    def set_keep_subject_in_sight(self, keep):
+        self.keep_subject_in_sight = keep
+
+    def apply_tripod_presets(self):
+        self.reset()
+
+
+class SceneAPI(object):
+    """ The AR objects a skill has drawn. """
+
+    def __init__(self):
+        self.objects = []
+        self.clears = 0
+        self.prisms_added = 0
+
+    def clear_all_objects(self):
+        self.objects = []
+        self.clears += 1
+
+    def add_prism(self, prism):
+        self.objects.append(prism)
+        self.prisms_added += 1
+
+
+class WaypointsAPI(object):
+    """ Saved waypoints and a flat earth gps conversion around the origin. """
+
+    def __init__(self, world, origin=(37.4, -122.1), ready_utime=0):
+        self._world = world
+        self.origin = origin
+        # The gps initializes at this utime.
+        self.ready_utime = ready_utime
+        self.waypoints = {}
+
+    def ready_for_waypoints(self):
+        return self._world.utime >= self.ready_utime
+
+    def gps_to_nav(self, lat, lon):
+        north = (lat - self.origin[0]) * METERS_PER_DEGREE
+        east = (lon - self.origin[1]) * METERS_PER_DEGREE * math.cos(math.radians(self.origin[0]))
+        return np.array([north, -east, self._world.position[2]])
+
+    def nav_to_gps(self, position):
+        lat = self.origin[0] + position[0] / METERS_PER_DEGREE
+        lon = self.origin[1] - position[1] / (METERS_PER_DEGREE
+                                              * math.cos(math.radians(self.origin[0])))
+        return lat, lon
+
+    def save_nav_location(self, position, orientation=None, waypoint_id=None):
+        if waypoint_id is None:
+            waypoint_id = len(self.waypoints)
+        self.waypoints[waypoint_id] = Transform(orientation, position)
+        return waypoint_id
+
+    def get_waypoint_in_nav(self, waypoint_id):
+        return self.waypoints.get(waypoint_id)
+
+
+class ObstacleMapAPI(object):
+    """ Obstacles as axis aligned boxes. """
+
+    def __init__(self):
+        self.boxes = []
+
+    def add_box(self, lower, upper):
+        self.boxes.append((np.array(lower, dtype=float), np.array(upper, dtype=float)))
+
+    def depth_test(self, start, end):
+        """ Distance from start to the first obstacle on the segment to end, or None. """
+        start = np.asarray(start, dtype=float)
+        direction = np.asarray(end, dtype=float) - start
+        length = np.linalg.norm(direction)
+        if length == 0:
+            return None
+        nearest = None
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for lower, upper in self.boxes:
+                near = (lower - start) / direction
+                far = (upper - start) / direction
+                enter = np.nanmax(np.minimum(near, far))
+                leave = np.nanmin(np.maximum(near, far))
+                if enter <= leave and leave >= 0 and enter <= 1:
+                    depth = max(enter, 0.0) * length
+                    if nearest is None or depth < nearest:
+                        nearest = depth
+        return nearest
+
+
+class CustomCommsAPI(object):
+
+    def __init__(self):
+        self.statuses = []
+        self.last_status = None
+
+    def publish_status(self, status):
+        self.last_status = status
+        self.statuses.append(status)
+
+
+class HealthMonitorAPI(object):
+
+    def __init__(self):
+        self.battery_low = False
+        self.battery_critically_low = False
+        self.ignoring_lost_phone_connection = False
+
+    def is_battery_low(self):
+        return self.battery_low
+
+    def is_battery_critically_low(self):
+        return self.battery_critically_low
+
+    def obey_lost_phone_connection_behavior(self):
+        self.ignoring_lost_phone_connection = False
+
+    def ignore_lost_phone_connection(self):
+        self.ignoring_lost_phone_connection = True
+
+
+class PlannerAPI(object):
+
+    def __init__(self):
+        self.settings = core.AttrDict(obstacle_safety=1.0, dynamics_aggressiveness=1.0)
+        self.landing = False
+
+    def is_landing(self):
+        return self.landing
+
+
+class SkillsAPI(object):
+
+    def __init__(self):
+        self.requested_skill = None
+
+    def request_skill(self, utime, skill_name):
+        self.requested_skill = skill_name
+
+
+class StandInAPI(object):
+    """
+    The api passed to a skill, and the simulated world behind it.
+
+    Args:
+        position (array): starting position of the vehicle in the nav frame.
+        heading (float): starting heading of the vehicle.
+        gps_ready_time (float): seconds until api.waypoints is ready.
+    """
+
+    def __init__(self, position=(0.0, 0.0, 2.0), heading=0.0, gps_ready_time=0.0):
+        self.utime = 0
+        self.position = np.array(position, dtype=float)
+        self.velocity = np.zeros(3)
+        self.heading = heading
+        self.gimbal_pitch = 0.0
+        self.tracks = {}
+        self.commands = Commands()
+
+        self.vehicle = VehicleAPI(self)
+        self.movement = MovementAPI(self)
+        self.phone = PhoneAPI()
+        self.subject = SubjectAPI(self)
+        self.focus = FocusAPI(self)
+        self.scene = SceneAPI()
+        self.waypoints = WaypointsAPI(self, ready_utime=int(gps_ready_time * 1e6))
+        self.obstacle_map = ObstacleMapAPI()
+        self.custom_comms = CustomCommsAPI()
+        self.health_monitor = HealthMonitorAPI()
+        self.planner = PlannerAPI()
+        self.skills = SkillsAPI()
+
+    def add_track(self, position, velocity=None, classification='PERSON', is_locked=True,
+                  track_id=None):
+        if track_id is None:
+            track_id = max(self.tracks) + 1 if self.tracks else 1
+        track = Track(track_id, position, velocity, classification, is_locked)
+        self.tracks[track_id] = track
+        return track
+
+    def add_people(self, count, seed=0, min_distance=2.0, max_distance=20.0, max_speed=2.0):
+        """
+        Add count people walking in straight lines, starting at random distances from the
+        vehicle. The same seed always gives the same people.
+        """
+        rand = random.Random(seed)
+        for _ in range(count):
+            angle = rand.uniform(0, 2 * math.pi)
+            distance = rand.uniform(min_distance, max_distance)
+            heading = rand.uniform(0, 2 * math.pi)
+            speed = rand.uniform(0.0, max_speed)
+            self.add_track(
+                position=(self.position[0] + distance * math.cos(angle),
+                          self.position[1] + distance * math.sin(angle), 0.0),
+                velocity=(speed * math.cos(heading), speed * math.sin(heading), 0.0))
+
+    def remove_track(self, track_id):
+        self.tracks.pop(track_id, None)
+        if self.subject.subject_track_id == track_id:
+            self.subject.subject_track_id = None
+
+    def step(self, dt):
+        """
+        Integrate the commands of the last tick over dt seconds, then clear them.
+        """
+        commands = self.commands
+        max_speed = min(commands.max_speed or MAX_SPEED, MAX_SPEED)
+        desired_velocity = self._desired_velocity(commands)
+        if desired_velocity is None:
+            # Hover, or fly as the phone says, which the harness treats as hovering.
+            desired_velocity = np.zeros(3)
+        speed = np.linalg.norm(desired_velocity)
+        if speed > max_speed:
+            desired_velocity *= max_speed / speed
+
+        # Accelerate toward the desired velocity.
+        change = desired_velocity - self.velocity
+        max_change = MAX_ACCELERATION * dt
+        if np.linalg.norm(change) > max_change:
+            change *= max_change / np.linalg.norm(change)
+        self.velocity = self.velocity + change
+        self.position = self.position + self.velocity * dt
+        self.position[2] = max(self.position[2], 0.0)
+
+        self._step_heading(commands, dt)
+        if commands.gimbal_pitch is not None:
+            self.gimbal_pitch = float(np.clip(commands.gimbal_pitch[0], -math.pi / 2,
+                                              math.pi / 2))
+
+        for track in self.tracks.values():
+            track.step(dt)
+        self.utime += int(round(dt * 1e6))
+        self.commands = Commands()
+        self.focus.reset()
+
+    def _desired_velocity(self, commands):
+        velocity = None
+        if commands.desired_pos_nav is not None:
+            position, _ = commands.desired_pos_nav
+            velocity = POSITION_GAIN * (position - self.position)
+        framing = self._framing_position()
+        if velocity is None and framing is not None:
+            velocity = POSITION_GAIN * (framing - self.position)
+        if commands.desired_vel_body is not None:
+            body, _ = commands.desired_vel_body
+            nav = Rot3.Ypr(self.heading, 0, 0) * body
+            velocity = nav if velocity is None else velocity + nav
+        if commands.desired_vel_nav is not None:
+            nav, weight = commands.desired_vel_nav
+            velocity = nav if velocity is None else velocity + weight * nav
+        return velocity
+
+    def _framing_position(self):
+        """ Where the focus commands want the vehicle, or None without a subject. """
+        focus = self.focus
+        subject = self.subject.get_position()
+        if subject is None:
+            subject = focus.custom_subject
+        if subject is None or not (focus.range or focus.azimuth or focus.azimuth_rate
+                                   or focus.elevation):
+            return None
+        offset = self.position - subject
+        distance = max(np.linalg.norm(offset), 1e-6)
+        current_range = focus.range[0] if focus.range else distance
+        azimuth = math.atan2(offset[1], offset[0])
+        if focus.azimuth is not None:
+            azimuth = focus.azimuth[0]
+        if focus.azimuth_rate is not None:
+            # Aim a second ahead along the orbit.
+            azimuth += focus.azimuth_rate[0]
+        elevation = math.asin(np.clip(offset[2] / distance, -1.0, 1.0))
+        if focus.elevation is not None:
+            elevation = focus.elevation[0]
+        position = subject + current_range * np.array([
+            math.cos(elevation) * math.cos(azimuth),
+            math.cos(elevation) * math.sin(azimuth),
+            math.sin(elevation)])
+        if focus.settings.min_relative_height_enabled:
+            position[2] = max(position[2], subject[2] + focus.settings.min_relative_height)
+        return position
+
+    def _step_heading(self, commands, dt):
+        rate = 0.0
+        if commands.heading is not None:
+            error = (commands.heading[0] - self.heading + math.pi) % (2 * math.pi) - math.pi
+            rate = error / dt
+        elif commands.heading_rate is not None:
+            rate = commands.heading_rate[0]
+        else:
+            # Face the subject being framed, if any.
+            subject = self.subject.get_position()
+            if subject is None:
+                subject = self.focus.custom_subject
+            if subject is not None and self.focus.keep_subject_in_sight:
+                delta = subject - self.position
+                if np.linalg.norm(delta[:2]) > 1e-6:
+                    error = (math.atan2(delta[1], delta[0]) - self.heading + math.pi) \
+                        % (2 * math.pi) - math.pi
+                    rate = error / dt
+        rate = float(np.clip(rate, -MAX_HEADING_RATE, MAX_HEADING_RATE))
+        self.heading = (self.heading + rate * dt + math.pi) % (2 * math.pi) - math.pi
@@ -0,0 +1,421 @@
+"""
+Benchmark the hot paths of the skills in scripted scenarios, and catch regressions.
+
+Each scenario runs one skill in the stand-in world for a fixed number of ticks: once to time the
+ticks, the callbacks and the skill methods the scenario is about, and once under tracemalloc to
+measure the memory allocated during each tick. The AR prisms sent to the phone are counted
+too. Compare against the stored baseline with
+
+    python -m skill_harness.benchmarks
+
+which exits non-zero if a scenario got slower or allocates more than the tolerance allows.
+Each run of a scenario is bracketed by a fixed calibration loop, and its times are scaled to the
+fastest calibration of the scenario, so that a run slowed by other load or a lower clock speed
+does not count as a regression. Results record that calibration time, and compare() scales
+them by the ratio of calibration times, so that a baseline saved on a faster or less loaded
+computer still applies. Differences of less than
+MIN_TIME_DIFFERENCE are too small to matter against the 125ms budget of a tick and are never
+regressions. For the most reliable comparison, save a baseline of your own before changing a
+skill:
+
+    python -m skill_harness.benchmarks --save-baseline
+    python -m skill_harness.benchmarks security_bot/tracks-1000 --verbose
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+
+import argparse
+import collections
+import contextlib
+import gc
+import json
+import os
+import random
+import subprocess
+import sys
+import timeit
+
+try:
+    import tracemalloc
+except ImportError:
+    # Python 2 has no tracemalloc, so only the timings are measured.
+    tracemalloc = None
+
+import numpy as np
+
+from . import SDK_DIR
+from . import SKILLSET_DIR
+from . import Simulation
+from . import StandInAPI
+from . import load_skill
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             'benchmark_baseline.json')
+# A scenario fails if its time or allocations grow by more than these fractions.
+TIME_TOLERANCE = 0.5
+ALLOCATION_TOLERANCE = 0.25
+# Differences smaller than these are noise, whatever the fraction. Timings of a fraction of a
+# millisecond vary by more than half between runs, and 1ms is under 1% of the tick budget.
+MIN_TIME_DIFFERENCE = 1.0  # [ms]
+MIN_ALLOCATION_DIFFERENCE = 1.0  # [KB]
+# Callbacks called fewer times than this in a scenario are too noisy to compare.
+MIN_CALLS = 50
+# Times are the best of this many runs, like timeit, since slower runs only measure other load.
+REPEAT = 3
+# Runs of the calibration loop to take the fastest of.
+CALIBRATION_REPEAT = 20
+
+Scenario = collections.namedtuple('Scenario', 'name skill ticks setup methods')
+
+SCENARIOS = []
+
+
+def scenario(name, skill, ticks, methods=()):
+    """ Register the decorated function as the setup of a scenario. """
+
+    def register(setup):
+        SCENARIOS.append(Scenario(name, skill, ticks, setup, tuple(methods)))
+        return setup
+
+    return register
+
+
+for _count in (0, 10, 100, 300, 1000):
+    @scenario('security_bot/tracks-{}'.format(_count), 'security_bot.SecurityBot', 400)
+    def _security_bot(sim, count=_count):
+        """ Guard a home point with people walking around it. """
+        sim.api.add_people(count)
+        sim.at(0.0, sim.press, 'set_point')
+
+for _count in (10, 100, 300, 1000):
+    @scenario('party_mode/tracks-{}'.format(_count), 'party_mode.PartyMode', 800,
+              methods=['find_and_lock_subject'])
+    def _party_mode(sim, count=_count):
+        """ Pick people to follow out of a crowd. """
+        sim.api.add_people(count, max_distance=40.0)
+
+
+@scenario('roof_inspection/mission-500', 'roof_inspection.RoofInspection', 800,
+          methods=['update_ar_scene', 'advance_mission'])
+def _roof_inspection(sim):
+    """ Fly a mission of about 500 waypoints. """
+    for identifier, value in (('length', 30), ('width', 21), ('min_height', 4),
+                              ('max_height', 20)):
+        sim.skill.set_value_for_user_setting(identifier, value)
+    sim.at(0.0, sim.press, 'start')
+
+
+@scenario('polygon_path/fly', 'polygon_path.PolygonPath', 400, methods=['update_ar_scene'])
+def _polygon_path(sim):
+    """ Fly an octagon. """
+    sim.skill.set_value_for_user_setting('num_sides', 8)
+    sim.at(0.0, sim.press, 'start')
+
+
+@scenario('polygon_path/settings', 'polygon_path.PolygonPath', 400)
+def _polygon_path_settings(sim):
+    """ Drag the sliders while flying, changing a setting every tick. """
+    sim.at(0.0, sim.press, 'start')
+    for tick in range(400):
+        if tick % 2:
+            sim.at(tick * sim.period, sim.change_setting, 'num_sides', 3 + tick % 6)
+        else:
+            sim.at(tick * sim.period, sim.change_setting, 'radius', 2 + tick % 19)
+
+
+@scenario('orbit_point/approach', 'orbit_point.OrbitPoint', 400,
+          methods=['approach_point', 'perform_orbit'])
+def _orbit_point(sim):
+    """ Double tap a wall far away, approach it and orbit. """
+    sim.api.obstacle_map.add_box((40, -5, 0), (42, 5, 8))
+    sim.at(0.0, sim.change_setting, 'max_distance', 100)
+    sim.at(0.0, sim.api.phone.double_tap, (0, 0, 2), (1, 0, 2))
+    sim.at(0.5, sim.api.phone.clear_tap)
+
+
+# Time importing the skillset package in a fresh interpreter, then running a statement.
+_IMPORT_SCRIPT = """
+import sys
+import timeit
+sys.path[:0] = {paths!r}
+start = timeit.default_timer()
+import skillset
+{statement}
+print(timeit.default_timer() - start)
+"""
+
+
+def import_times(repeat=REPEAT):
+    """
+    Milliseconds to import the skillset package, to import it and every skill like at startup
+    before the registry was lazy, and to import it and select each skill.
+    """
+    cases = [('skillset', 'pass'), ('skillset and every skill', 'skillset.registry.load_all()')]
+    with open(os.path.join(SKILLSET_DIR, 'manifest.json'), 'r') as manifest_file:
+        cases += [(name, 'skillset.registry.get({!r})'.format(str(name)))
+                  for name in sorted(json.load(manifest_file))]
+    paths = [SDK_DIR, os.path.dirname(SKILLSET_DIR)]
+    times = collections.OrderedDict()
+    for label, statement in cases:
+        script = _IMPORT_SCRIPT.format(paths=paths, statement=statement)
+        times[label] = round(1e3 * min(
+            float(subprocess.check_output([sys.executable, '-c', script]))
+            for _ in range(repeat)), 3)
+    return times
+
+
+@contextlib.contextmanager
+def _quiet():
+    """ Hide what the skills print. """
+    stdout = sys.stdout
+    with open(os.devnull, 'w') as devnull:
+        sys.stdout = devnull
+        try:
+            yield
+        finally:
+            sys.stdout = stdout
+
+
+def _simulation(bench):
+    # Skills that pick at random pick the same way in every run.
+    random.seed(0)
+    sim = Simulation(load_skill(bench.skill), StandInAPI())
+    for method in bench.methods:
+        sim.time_method(method)
+    bench.setup(sim)
+    return sim
+
+
+def _allocations(bench):
+    """
+    Run a scenario under tracemalloc, and return the mean KB allocated at the peak of a tick
+    and the KB still allocated at the end.
+    """
+    if tracemalloc is None or not hasattr(tracemalloc, 'reset_peak'):
+        return None
+    sim = _simulation(bench)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        peaks = 0
+        for _ in range(bench.ticks):
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            sim.tick()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks += peak - before
+        end, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'kb_per_tick': round(peaks / 1024.0 / bench.ticks, 3),
+        'retained_kb': round((end - start) / 1024.0, 3),
+    }
+
+
+def _calibration_loop():
+    """ A fixed mix of python and small numpy work, like a skill tick over a few tracks. """
+    points = np.arange(300.0).reshape(100, 3)
+    total = 0.0
+    for step in range(100):
+        total += float(np.linalg.norm(points - points[step], axis=1).min())
+        settings = dict((key, key * 0.5) for key in range(50))
+        total += sum(settings.values())
+    return total
+
+
+def calibrate():
+    """ Milliseconds the calibration loop takes now, the fastest of CALIBRATION_REPEAT runs. """
+    return 1e3 * min(timeit.Timer(_calibration_loop).repeat(CALIBRATION_REPEAT, 1))
+
+
+def _scaled(summary, factor):
+    """ A timing summary with its times multiplied by factor. """
+    return dict((key, value * factor if key.endswith('_ms') else value)
+                for key, value in summary.items())
+
+
+def _calibrated_run(bench):
+    """ Run a scenario, and return its report and the calibration time around it. """
+    before = calibrate()
+    report = _simulation(bench).run(ticks=bench.ticks)
+    return report, 0.5 * (before + calibrate())
+
+
+def _fastest(summaries):
+    return min(summaries, key=lambda summary: summary.get('p50_ms', float('inf')))
+
+
+def run(bench, repeat=REPEAT):
+    """
+    Run one scenario, and return its results, with the fastest median of the repeated runs
+    for the ticks and each callback, once their times are scaled to the fastest calibration.
+    """
+    with _quiet():
+        runs = [_calibrated_run(bench) for _ in range(repeat)]
+        allocations = _allocations(bench)
+    calibration = min(run_calibration for _, run_calibration in runs)
+    reports = []
+    for report, run_calibration in runs:
+        factor = calibration / run_calibration
+        reports.append(dict(report, tick=_scaled(report['tick'], factor),
+                            ticks_per_second=(report['ticks_per_second'] or 0) / factor,
+                            callbacks=dict((name, _scaled(summary, factor))
+                                           for name, summary in report['callbacks'].items())))
+    callbacks = set(name for report in reports for name in report['callbacks'])
+    return {
+        'skill': bench.skill,
+        'ticks': bench.ticks,
+        'ticks_per_second': round(max(report['ticks_per_second'] for report in reports), 1),
+        'tick': _fastest(report['tick'] for report in reports),
+        'callbacks': {name: _fastest(report['callbacks'][name] for report in reports
+                                     if name in report['callbacks'])
+                      for name in callbacks},
+        'allocations': allocations,
+        'scene': reports[0]['scene'],
+        'calibration_ms': round(calibration, 4),
+    }
+
+
+def compare(name, result, baseline, time_tolerance=TIME_TOLERANCE,
+            allocation_tolerance=ALLOCATION_TOLERANCE):
+    """
+    Return a description of each way result regressed from baseline: the median tick or
+    callback time grew by more than time_tolerance, or the memory allocated per tick grew by
+    more than allocation_tolerance. Times are first scaled to the speed of the computer the
+    baseline was saved on, by the ratio of the calibration times.
+    """
+    regressions = []
+    speed = 1.0
+    if baseline.get('calibration_ms') and result.get('calibration_ms'):
+        speed = baseline['calibration_ms'] / result['calibration_ms']
+
+    def check(label, old, new, tolerance, minimum, units, scale=1.0):
+        if old is None or new is None:
+            return
+        new *= scale
+        if new - old > minimum and new > old * (1 + tolerance):
+            regressions.append('{}: {} {:.3f}{} -> {:.3f}{} ({:+.0f}%)'.format(
+                name, label, old, units, new, units, 100.0 * (new - old) / old if old else 0))
+
+    check('tick p50', baseline['tick'].get('p50_ms'), result['tick'].get('p50_ms'),
+          time_tolerance, MIN_TIME_DIFFERENCE, 'ms', speed)
+    for callback, summary in sorted(result['callbacks'].items()):
+        old = baseline['callbacks'].get(callback, {})
+        if min(summary['calls'], old.get('calls', 0)) < MIN_CALLS:
+            continue
+        check('{} p50'.format(callback), old.get('p50_ms'), summary.get('p50_ms'),
+              time_tolerance, MIN_TIME_DIFFERENCE, 'ms', speed)
+    if baseline.get('allocations') and result.get('allocations'):
+        check('allocated per tick', baseline['allocations']['kb_per_tick'],
+              result['allocations']['kb_per_tick'], allocation_tolerance,
+              MIN_ALLOCATION_DIFFERENCE, 'KB')
+    return regressions
+
+
+def format_result(name, result, verbose=False):
+    allocations = result['allocations'] or {}
+    line = '{:<30} {:>9.0f} {:>9.3f} {:>9.3f} {:>10} {:>10} {:>7}'.format(
+        name, result['ticks_per_second'], result['tick']['p50_ms'], result['tick']['p95_ms'],
+        allocations.get('kb_per_tick', '-'), allocations.get('retained_kb', '-'),
+        result['scene']['prisms_sent'])
+    if not verbose:
+        return line
+    lines = [line]
+    for callback, summary in sorted(result['callbacks'].items()):
+        lines.append('    {:<26} {:>7} calls, p50 {:.3f}ms, p95 {:.3f}ms, max {:.3f}ms'.format(
+            callback, summary['calls'], summary['p50_ms'], summary['p95_ms'],
+            summary['max_ms']))
+    return '\n'.join(lines)
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as baseline_file:
+        return json.load(baseline_file)
+
+
+def save_baseline(path, results):
+    with open(path, 'w') as baseline_file:
+        json.dump(results, baseline_file, indent=2, sort_keys=True)
+        baseline_file.write('\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('scenarios', nargs='*',
+                        help='scenarios to run, or prefixes like party_mode/, all by default')
+    parser.add_argument('--list', action='store_true', help='list the scenarios and exit')
+    parser.add_argument('--imports', action='store_true',
+                        help='time importing the skillset and each skill instead')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='baseline json to compare to')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='store the results as the baseline instead of comparing')
+    parser.add_argument('--tolerance', type=float, default=TIME_TOLERANCE,
+                        help='allowed fractional growth of the median times')
+    parser.add_argument('--allocation-tolerance', type=float, default=ALLOCATION_TOLERANCE,
+                        help='allowed fractional growth of the memory allocated per tick')
+    parser.add_argument('--repeat', type=int, default=REPEAT,
+                        help='runs of each scenario to take the fastest of')
+    parser.add_argument('--json', action='store_true', help='print the results as json')
+    parser.add_argument('--verbose', action='store_true', help='show every callback')
+    args = parser.parse_args()
+
+    benches = [bench for bench in SCENARIOS if not args.scenarios or any(
+        bench.name == name or bench.name.startswith(name) for name in args.scenarios)]
+    if args.list:
+        for bench in SCENARIOS:
+            print('{:<30} {}'.format(bench.name, bench.setup.__doc__.strip()))
+        return
+    if args.imports:
+        times = import_times(args.repeat)
+        if args.json:
+            print(json.dumps(times, indent=2))
+        else:
+            print('{:<36} {:>9}'.format('IMPORT', 'MS'))
+            for label, milliseconds in times.items():
+                print('{:<36} {:>9.1f}'.format(label, milliseconds))
+        return
+    if not benches:
+        parser.error('no scenario matches {}'.format(' '.join(args.scenarios)))
+
+    if not args.json:
+        print('{:<30} {:>9} {:>9} {:>9} {:>10} {:>10} {:>7}'.format(
+            'SCENARIO', 'TICKS/S', 'P50 MS', 'P95 MS', 'KB/TICK', 'KB KEPT', 'PRISMS'))
+    results = collections.OrderedDict()
+    for bench in benches:
+        results[bench.name] = run(bench, args.repeat)
+        if not args.json:
+            print(format_result(bench.name, results[bench.name], args.verbose))
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+    if args.save_baseline:
+        baseline = load_baseline(args.baseline)
+        baseline.update(results)
+        save_baseline(args.baseline, baseline)
+        print('Saved the baseline of {} scenarios to {}'.format(len(results), args.baseline),
+              file=sys.stderr)
+        return
+
+    baseline = load_baseline(args.baseline)
+    regressions = []
+    for name, result in results.items():
+        if name in baseline:
+            regressions += compare(name, result, baseline[name], args.tolerance,
+                                   args.allocation_tolerance)
+    missing = [name for name in results if name not in baseline]
+    if missing:
+        print('No baseline for {}'.format(', '.join(missing)), file=sys.stderr)
+    if regressions:
+        print('Regressions against {}:'.format(args.baseline), file=sys.stderr)
+        for regression in regressions:
+            print('  ' + regression, file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
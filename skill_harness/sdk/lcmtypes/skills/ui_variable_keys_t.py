@@ -0,0 +1,7 @@
+"""
+Stand-in for the generated lcm type naming the phone's ui variables.
+"""
+
+
+class ui_variable_keys_t(object):  # pylint: disable=invalid-name
+    pass
@@ -0,0 +1,18 @@
+"""
+Stand-in for the angle helpers of shared.util.common.math.
+"""
+from __future__ import absolute_import
+
+import math
+
+TWO_PI = 2.0 * math.pi
+
+
+def mod_2_pi(angle):
+    """ Wrap an angle into [0, 2pi). """
+    return angle % TWO_PI
+
+
+def angle_difference(a, b):
+    """ The signed difference a - b, wrapped into [-pi, pi). """
+    return (a - b + math.pi) % TWO_PI - math.pi
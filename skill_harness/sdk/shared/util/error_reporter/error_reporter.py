@@ -0,0 +1,36 @@
+"""
+Stand-in for the vehicle's error reporter, forwarding reports to the `skill_harness.er` logger.
+
+Messages are formatted with str.format(*args) like on the vehicle. Quiet reports are logged at
+debug level so they don't flood the output of long runs.
+"""
+from __future__ import absolute_import
+
+import logging
+
+LOGGER = logging.getLogger('skill_harness.er')
+
+
+def _format(message, args):
+    return message.format(*args) if args else message
+
+
+def REPORT_STATUS(message, *args):  # pylint: disable=invalid-name
+    LOGGER.info(_format(message, args))
+
+
+def REPORT_STATUS_NOW(message, *args):  # pylint: disable=invalid-name
+    LOGGER.info(_format(message, args))
+
+
+def REPORT_QUIET(message, *args):  # pylint: disable=invalid-name
+    if LOGGER.isEnabledFor(logging.DEBUG):
+        LOGGER.debug(_format(message, args))
+
+
+def REPORT_WARNING(message, *args):  # pylint: disable=invalid-name
+    LOGGER.warning(_format(message, args))
+
+
+def REPORT_EXCEPTION_NOW(message, *args):  # pylint: disable=invalid-name
+    LOGGER.exception(_format(message, args))
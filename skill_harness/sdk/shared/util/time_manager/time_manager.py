@@ -0,0 +1,28 @@
+"""
+Stand-in for the vehicle's time manager. Times are microsecond utimes of the simulated clock.
+"""
+from __future__ import absolute_import
+
+
+def utime_to_seconds(utime):
+    return utime / 1e6
+
+
+def seconds_to_utime(seconds):
+    return int(seconds * 1e6)
+
+
+class DownSampler(object):
+    """
+    Say when at least `period` seconds have passed since it was last ready.
+    """
+
+    def __init__(self, period):
+        self.period = period
+        self.last_utime = None
+
+    def ready(self, utime):
+        if self.last_utime is None or utime - self.last_utime >= seconds_to_utime(self.period):
+            self.last_utime = utime
+            return True
+        return False
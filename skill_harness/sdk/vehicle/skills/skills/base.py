@@ -0,0 +1,77 @@
+"""
+Stand-in for the base class of all skills.
+
+User settings start at the values declared in USER_SETTINGS and are changed by the harness.
+Skills may skip calling Skill.__init__, as OrbitPoint does, so all state here is created lazily.
+"""
+from __future__ import absolute_import
+
+
+class SettingId(str):
+    """
+    The identifier of a changed setting, passed to setting_changed().
+
+    Skills compare it to a string or read its `id`, so it supports both.
+    """
+
+    @property
+    def id(self):  # pylint: disable=invalid-name
+        return str(self)
+
+
+class Skill(object):
+    """
+    A behavior the vehicle runs, with callbacks called by the skills framework.
+    """
+
+    USER_SETTINGS = ()
+
+    def __init__(self):
+        self._needs_layout = True
+
+    # Framework side
+
+    @property
+    def user_settings(self):
+        """ {identifier: value} of every user setting. """
+        settings = self.__dict__.get('_user_settings')
+        if settings is None:
+            settings = self._user_settings = {
+                element.identifier: element.default_value() for element in self.USER_SETTINGS}
+        return settings
+
+    def get_value_for_user_setting(self, identifier):
+        return self.user_settings[identifier]
+
+    def set_value_for_user_setting(self, identifier, value):
+        if identifier not in self.user_settings:
+            raise KeyError('{} has no user setting {}'.format(type(self).__name__, identifier))
+        self.user_settings[identifier] = value
+        return SettingId(identifier)
+
+    def set_needs_layout(self):
+        """ Ask for get_onscreen_controls() to be called after this update. """
+        self._needs_layout = True
+
+    def needs_layout(self):
+        return self.__dict__.get('_needs_layout', True)
+
+    def clear_needs_layout(self):
+        self._needs_layout = False
+
+    # Skill side, overridden by skills
+
+    def update(self, api):
+        pass
+
+    def get_onscreen_controls(self, api):
+        return {}
+
+    def button_pressed(self, api, button_id):
+        pass
+
+    def setting_changed(self, api, setting_id):
+        pass
+
+    def handle_rpc(self, api, message):
+        return None
@@ -0,0 +1,34 @@
+"""
+Stand-ins for vehicle.skills.util.
+"""
+from __future__ import absolute_import
+
+import math
+
+
+class LowPassFilter(object):
+    """
+    First order low pass filter of a value sampled at utimes, with a time constant in seconds.
+    """
+
+    def __init__(self, time_constant):
+        self.time_constant = time_constant
+        self.value = None
+        self.last_utime = None
+
+    def reset(self):
+        self.value = None
+        self.last_utime = None
+
+    def step(self, value, utime):
+        if self.value is None:
+            self.value = value
+        else:
+            dt = max(utime - self.last_utime, 0) / 1e6
+            alpha = 1.0 - math.exp(-dt / self.time_constant) if self.time_constant > 0 else 1.0
+            self.value = self.value + alpha * (value - self.value)
+        self.last_utime = utime
+        return self.value
+
+    def get(self):
+        return self.value
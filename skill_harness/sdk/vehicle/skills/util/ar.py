@@ -0,0 +1,30 @@
+"""
+Stand-ins for the augmented reality objects skills draw in the Skydio app.
+"""
+from __future__ import absolute_import
+
+import math
+
+import numpy as np
+
+from .transform import Rot3
+from .transform import Transform
+
+
+class Prism(object):
+    """ A box of `size` centered at nav_T_center. """
+
+    def __init__(self, nav_T_center, size):
+        self.nav_T_center = nav_T_center
+        self.size = np.asarray(size, dtype=float)
+
+
+def make_cable_prism(start, end, width=0.05):
+    """ A thin prism drawn from start to end. """
+    start = np.asarray(start, dtype=float)
+    delta = np.asarray(end, dtype=float) - start
+    length = np.linalg.norm(delta)
+    yaw = math.atan2(delta[1], delta[0])
+    pitch = -math.atan2(delta[2], math.hypot(delta[0], delta[1]))
+    return Prism(Transform(Rot3.Ypr(yaw, pitch, 0), start + delta / 2.0),
+                 size=np.array([length, width, width]))
@@ -0,0 +1,36 @@
+"""
+Stand-ins for the small helpers of vehicle.skills.util.core.
+"""
+from __future__ import absolute_import
+
+import math
+
+import numpy as np
+
+
+class AttrDict(dict):
+    """ A dict whose keys are also attributes. """
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+
+def msg_to_ndarray(msg):
+    """ Convert a vector message with x, y and z fields to an array. """
+    return np.array([msg.x, msg.y, msg.z])
+
+
+def azimuth(vector):
+    """ The heading of a vector in the xy plane. """
+    return math.atan2(vector[1], vector[0])
+
+
+def elevation(vector):
+    """ The angle of a vector above the xy plane. """
+    return math.atan2(vector[2], math.hypot(vector[0], vector[1]))
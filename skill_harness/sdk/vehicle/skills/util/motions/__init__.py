@@ -0,0 +1,100 @@
+"""
+Stand-ins for the motions used by skills.
+"""
+from __future__ import absolute_import
+
+import math
+
+import numpy as np
+
+from .goto_motion import GotoMotion
+from .motion import Motion
+from .motion import heading_and_pitch
+
+
+class CableMotion(Motion):
+    """ Move in a straight line between two poses, turning the camera from one to the other. """
+
+    def __init__(self, nav_T_start, nav_T_end, params=None):
+        super(CableMotion, self).__init__(params)
+        self.nav_T_start = nav_T_start
+        self.nav_T_end = nav_T_end
+
+    def update(self, api):
+        start = self.nav_T_start.translation()
+        end = self.nav_T_end.translation()
+        length = np.linalg.norm(end - start)
+        progress = 1.0
+        if length > 1e-6:
+            progress = np.clip(np.dot(api.vehicle.get_position() - start, end - start)
+                               / length ** 2, 0.0, 1.0)
+        _, start_pitch, start_yaw = self.nav_T_start.get_euler_angles()
+        _, end_pitch, end_yaw = self.nav_T_end.get_euler_angles()
+        turn = (end_yaw - start_yaw + math.pi) % (2 * math.pi) - math.pi
+        heading = start_yaw + progress * turn
+        pitch = start_pitch + progress * (end_pitch - start_pitch)
+        if self.go_to(api, end, heading, pitch) or self.gave_up(api):
+            self.done = True
+
+
+class LookatMotion(Motion):
+    """ Move to start_point, then to end_point, looking at lookat_point throughout. """
+
+    def __init__(self, start_point, end_point, lookat_point, params=None):
+        super(LookatMotion, self).__init__(params)
+        self.start_point = np.asarray(start_point, dtype=float)
+        self.end_point = np.asarray(end_point, dtype=float)
+        self.lookat_point = np.asarray(lookat_point, dtype=float)
+        self.reached_start = False
+
+    def reset(self, api):
+        super(LookatMotion, self).reset(api)
+        self.reached_start = False
+
+    def update(self, api):
+        heading, pitch = heading_and_pitch(self.lookat_point - api.vehicle.get_position())
+        if not self.reached_start:
+            self.reached_start = self.go_to(api, self.start_point, heading, pitch)
+            if self.gave_up(api):
+                self.done = True
+            return
+        if self.go_to(api, self.end_point, heading, pitch) or self.gave_up(api):
+            self.done = True
+
+
+class OrbitMotion(Motion):
+    """ Circle `revolutions` times around a center at radius and height, looking at it. """
+
+    # How far ahead along the circle to aim each tick.
+    LEAD_ANGLE = math.radians(20)
+
+    def __init__(self, center, radius, height, revolutions=1, params=None):
+        super(OrbitMotion, self).__init__(params)
+        self.center = np.asarray(center, dtype=float)
+        self.radius = radius
+        self.height = height
+        self.revolutions = revolutions
+        self.swept = 0.0
+        self.last_angle = None
+
+    def reset(self, api):
+        super(OrbitMotion, self).reset(api)
+        self.swept = 0.0
+        self.last_angle = None
+
+    def update(self, api):
+        offset = api.vehicle.get_position() - self.center
+        angle = math.atan2(offset[1], offset[0])
+        if self.last_angle is not None:
+            self.swept += abs((angle - self.last_angle + math.pi) % (2 * math.pi) - math.pi)
+        self.last_angle = angle
+        if self.swept >= 2 * math.pi * self.revolutions:
+            self.done = True
+            return
+        target_angle = angle + self.LEAD_ANGLE
+        target = self.center + np.array([self.radius * math.cos(target_angle),
+                                         self.radius * math.sin(target_angle), self.height])
+        heading, pitch = heading_and_pitch(self.center - api.vehicle.get_position())
+        self.go_to(api, target, heading, pitch)
+        if self.gave_up(api):
+            self.done = True
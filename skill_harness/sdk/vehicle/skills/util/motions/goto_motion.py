@@ -0,0 +1,18 @@
+"""
+Stand-in for a motion to a single pose.
+"""
+from __future__ import absolute_import
+
+from .motion import Motion
+
+
+class GotoMotion(Motion):
+
+    def __init__(self, nav_T_goal, params=None):
+        super(GotoMotion, self).__init__(params)
+        self.nav_T_goal = nav_T_goal
+
+    def update(self, api):
+        _, pitch, yaw = self.nav_T_goal.get_euler_angles()
+        if self.go_to(api, self.nav_T_goal.translation(), yaw, pitch) or self.gave_up(api):
+            self.done = True
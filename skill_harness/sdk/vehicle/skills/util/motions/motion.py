@@ -0,0 +1,78 @@
+"""
+Stand-in for the base class of motions, multi-tick movements that a skill updates until done.
+"""
+from __future__ import absolute_import
+
+import math
+
+import numpy as np
+
+from .. import core
+
+# Defaults for the params a motion reads.
+DEFAULT_PARAMS = dict(
+    speed=4.0,  # [m/s]
+    distance_margin=0.5,  # [m]
+    giveup_utime=int(3e6),
+    giveup_speed=0.1,  # [m/s]
+)
+
+
+class Motion(object):
+    """
+    Call update() every tick until done is set, and reset() to run it again.
+    """
+
+    def __init__(self, params=None):
+        self.params = core.AttrDict(DEFAULT_PARAMS)
+        self.params.update(params or {})
+        self.done = False
+        self._slow_since_utime = None
+
+    def update(self, api):
+        raise NotImplementedError('subclass me')
+
+    def reset(self, api):
+        self.done = False
+        self._slow_since_utime = None
+
+    def go_to(self, api, position, heading=None, pitch=None):
+        """ Move toward a position and return True once within the distance margin. """
+        api.movement.set_desired_pos_nav(position)
+        api.movement.set_max_speed(self.params.speed)
+        if heading is not None:
+            api.movement.set_heading(heading)
+        if pitch is not None:
+            api.movement.set_gimbal_pitch(pitch)
+        distance = np.linalg.norm(np.asarray(position) - api.vehicle.get_position())
+        return distance < self.params.distance_margin
+
+    def gave_up(self, api):
+        """ True once the vehicle has made no progress for giveup_utime. """
+        if api.vehicle.get_speed() >= self.params.giveup_speed:
+            self._slow_since_utime = None
+            return False
+        if self._slow_since_utime is None:
+            self._slow_since_utime = api.utime
+        return api.utime - self._slow_since_utime > self.params.giveup_utime
+
+    @staticmethod
+    def move_to_waypoint(api, waypoint_id, desired_speed=None):
+        """ Fly to a saved waypoint, facing along it, and return True once there. """
+        nav_T_waypoint = api.waypoints.get_waypoint_in_nav(waypoint_id)
+        if nav_T_waypoint is None:
+            return False
+        goal = nav_T_waypoint.translation()
+        _, pitch, yaw = nav_T_waypoint.get_euler_angles()
+        api.movement.set_desired_pos_nav(goal)
+        api.movement.set_heading(yaw)
+        api.movement.set_gimbal_pitch(pitch)
+        if desired_speed is not None:
+            api.movement.set_max_speed(desired_speed)
+        return np.linalg.norm(goal - api.vehicle.get_position()) < DEFAULT_PARAMS['distance_margin']
+
+
+def heading_and_pitch(delta):
+    """ The heading and gimbal pitch that look along delta. """
+    return (math.atan2(delta[1], delta[0]),
+            -math.atan2(delta[2], math.hypot(delta[0], delta[1])))
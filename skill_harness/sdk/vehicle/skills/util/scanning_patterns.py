@@ -0,0 +1,140 @@
+"""
+Stand-ins for the scanning patterns used to inspect a structure from a polygon of nav points.
+
+Each pattern returns a list of camera poses (Transforms looking along x) in the nav frame. The
+geometry is simple but gives realistic numbers of waypoints for the size of the polygon.
+"""
+from __future__ import absolute_import
+
+import enum
+import math
+
+import numpy as np
+
+from .transform import Rot3
+from .transform import Transform
+
+# Spacing between neighbouring poses of a lawnmower scan.
+SCAN_SPACING = 2.0  # [m]
+# How far outside the polygon the perimeter and orbit patterns fly.
+STANDOFF = 5.0  # [m]
+
+
+class ScanPattern(enum.Enum):
+    ORBIT = 0
+    PERIMETER = 1
+    PERIMETER_B = 2
+    ROOFTOP = 3
+    FACADE = 4
+
+
+def look_at(position, target):
+    """ A pose at position with the camera looking at target. """
+    delta = np.asarray(target, dtype=float) - np.asarray(position, dtype=float)
+    yaw = math.atan2(delta[1], delta[0])
+    pitch = -math.atan2(delta[2], math.hypot(delta[0], delta[1]))
+    return Transform(Rot3.Ypr(yaw, pitch, 0), position)
+
+
+def _centroid(nav_points):
+    return np.mean([np.asarray(point, dtype=float) for point in nav_points], axis=0)
+
+
+def _outward(point, centroid):
+    direction = np.asarray(point, dtype=float)[:2] - centroid[:2]
+    norm = np.linalg.norm(direction)
+    if norm < 1e-9:
+        return np.array([1.0, 0.0, 0.0])
+    return np.array([direction[0] / norm, direction[1] / norm, 0.0])
+
+
+def orbit_prism(nav_points, height, num_poses=12):
+    """ Poses on a circle around the polygon, looking at its center. """
+    centroid = _centroid(nav_points)
+    radius = max(np.linalg.norm(np.asarray(p, dtype=float)[:2] - centroid[:2])
+                 for p in nav_points) + STANDOFF
+    poses = []
+    for i in range(num_poses):
+        angle = 2.0 * math.pi * i / num_poses
+        position = centroid + np.array([radius * math.cos(angle), radius * math.sin(angle), 0.0])
+        position[2] = height
+        poses.append(look_at(position, centroid))
+    return poses
+
+
+def perimeter_scan(nav_points, height, lookat_height=0.0):
+    """ A pose outside each corner, looking across the polygon at its center. """
+    centroid = _centroid(nav_points)
+    target = np.array([centroid[0], centroid[1], lookat_height])
+    poses = []
+    for point in nav_points:
+        position = np.asarray(point, dtype=float) + STANDOFF * _outward(point, centroid)
+        position[2] = height
+        poses.append(look_at(position, target))
+    return poses
+
+
+def perimeter_scan_b(nav_points, height, lookat_height=0.0):
+    """ A pose outside each corner, looking at the corner. """
+    centroid = _centroid(nav_points)
+    poses = []
+    for point in nav_points:
+        point = np.asarray(point, dtype=float)
+        position = point + STANDOFF * _outward(point, centroid)
+        position[2] = height
+        poses.append(look_at(position, np.array([point[0], point[1], lookat_height])))
+    return poses
+
+
+def _inside(point, polygon):
+    """ Even-odd test of a point against a polygon in the xy plane. """
+    x, y = point[0], point[1]
+    inside = False
+    for i in range(len(polygon)):
+        x1, y1 = polygon[i][0], polygon[i][1]
+        x2, y2 = polygon[i - 1][0], polygon[i - 1][1]
+        if (y1 > y) != (y2 > y) and x < (x2 - x1) * (y - y1) / (y2 - y1) + x1:
+            inside = not inside
+    return inside
+
+
+def scan_prism(nav_points, height_limits, range_to_surface, scan_patterns=()):
+    """
+    Lawnmower passes over each face of the prism standing on the polygon, at range_to_surface,
+    and over the roof looking down if ROOFTOP is among the scan_patterns.
+    """
+    low, high = height_limits
+    rows = max(int(math.ceil((high - low) / SCAN_SPACING)), 0) + 1
+    centroid = _centroid(nav_points)
+    poses = []
+    for i in range(len(nav_points)):
+        start = np.asarray(nav_points[i - 1], dtype=float)
+        end = np.asarray(nav_points[i], dtype=float)
+        edge = end - start
+        length = np.linalg.norm(edge[:2])
+        if length < 1e-9:
+            continue
+        outward = np.array([edge[1], -edge[0], 0.0]) / length
+        if np.dot(outward[:2], (start + end)[:2] / 2.0 - centroid[:2]) < 0:
+            outward = -outward
+        columns = int(math.ceil(length / SCAN_SPACING)) + 1
+        for column in range(columns):
+            along = start + edge * (column / float(columns - 1) if columns > 1 else 0.5)
+            # Alternate up and down passes.
+            row_order = range(rows) if column % 2 == 0 else reversed(range(rows))
+            for row in row_order:
+                height = low + (high - low) * (row / float(rows - 1) if rows > 1 else 0.0)
+                surface = np.array([along[0], along[1], height])
+                poses.append(look_at(surface + range_to_surface * outward, surface))
+
+    if ScanPattern.ROOFTOP in scan_patterns:
+        xs = [p[0] for p in nav_points]
+        ys = [p[1] for p in nav_points]
+        altitude = high + range_to_surface
+        for row, y in enumerate(np.arange(min(ys), max(ys) + 1e-9, SCAN_SPACING)):
+            xs_row = np.arange(min(xs), max(xs) + 1e-9, SCAN_SPACING)
+            for x in (xs_row if row % 2 == 0 else xs_row[::-1]):
+                if _inside((x, y), nav_points):
+                    poses.append(look_at(np.array([x, y, altitude]),
+                                         np.array([x + 1e-3, y, high])))
+    return poses
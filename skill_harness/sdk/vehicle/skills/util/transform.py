@@ -0,0 +1,89 @@
+"""
+Stand-ins for the rigid body transforms used by skills.
+
+Rotations are 3x3 matrices. Ypr(yaw, pitch, roll) rotates about z, then y, then x, and
+get_euler_angles() returns (roll, pitch, yaw).
+"""
+from __future__ import absolute_import
+
+import math
+
+import numpy as np
+
+
+class Rot3(object):
+
+    def __init__(self, matrix=None):
+        self.matrix = np.eye(3) if matrix is None else np.asarray(matrix, dtype=float)
+
+    @classmethod
+    def Ypr(cls, yaw, pitch, roll):  # pylint: disable=invalid-name
+        cy, sy = math.cos(yaw), math.sin(yaw)
+        cp, sp = math.cos(pitch), math.sin(pitch)
+        cr, sr = math.cos(roll), math.sin(roll)
+        return cls(np.array([
+            [cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr],
+            [sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr],
+            [-sp, cp * sr, cp * cr],
+        ]))
+
+    def ypr(self):
+        roll, pitch, yaw = self.get_euler_angles()
+        return np.array([yaw, pitch, roll])
+
+    def get_euler_angles(self):
+        m = self.matrix
+        pitch = math.asin(max(-1.0, min(1.0, -m[2, 0])))
+        roll = math.atan2(m[2, 1], m[2, 2])
+        yaw = math.atan2(m[1, 0], m[0, 0])
+        return np.array([roll, pitch, yaw])
+
+    def inverse(self):
+        return Rot3(self.matrix.T)
+
+    def copy(self):
+        return Rot3(self.matrix.copy())
+
+    def __mul__(self, other):
+        if isinstance(other, Rot3):
+            return Rot3(self.matrix.dot(other.matrix))
+        return self.matrix.dot(np.asarray(other, dtype=float))
+
+    def __repr__(self):
+        return 'Rot3.Ypr({:.3f}, {:.3f}, {:.3f})'.format(*self.ypr())
+
+
+class Transform(object):
+    """
+    A rotation and a translation. Multiplying by a point gives the point in the outer frame.
+    """
+
+    def __init__(self, rotation=None, translation=None):
+        self._rotation = rotation if rotation is not None else Rot3()
+        self._translation = (np.zeros(3) if translation is None
+                             else np.array(translation, dtype=float))
+
+    def rotation(self):
+        return self._rotation
+
+    def translation(self):
+        return self._translation.copy()
+
+    def get_euler_angles(self):
+        return self._rotation.get_euler_angles()
+
+    def inverse(self):
+        inverse_rotation = self._rotation.inverse()
+        return Transform(inverse_rotation, -(inverse_rotation * self._translation))
+
+    def copy(self):
+        return Transform(self._rotation.copy(), self._translation.copy())
+
+    def __mul__(self, other):
+        if isinstance(other, Transform):
+            return Transform(self._rotation * other._rotation,  # pylint: disable=protected-access
+                             self * other._translation)  # pylint: disable=protected-access
+        return self._rotation * other + self._translation
+
+    def __repr__(self):
+        return 'Transform({!r}, {})'.format(self._rotation, self._translation.tolist())
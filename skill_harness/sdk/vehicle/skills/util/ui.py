@@ -0,0 +1,56 @@
+"""
+Stand-ins for the ui elements skills show in the Skydio app.
+"""
+from __future__ import absolute_import
+
+
+class UiElement(object):
+
+    def __init__(self, identifier, label='', detail='', **kwargs):
+        self.identifier = identifier
+        self.label = label
+        self.detail = detail
+        self.extra = kwargs
+
+    def default_value(self):
+        return None
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self.identifier)
+
+
+class UiButton(UiElement):
+
+    def __init__(self, identifier, label='', detail='', style=None, **kwargs):
+        super(UiButton, self).__init__(identifier, label, detail, **kwargs)
+        self.style = style
+
+
+class UiSlider(UiElement):
+
+    def __init__(self, identifier, label='', detail='', min_value=0.0, max_value=1.0, value=0.0,
+                 units='', **kwargs):
+        super(UiSlider, self).__init__(identifier, label, detail, **kwargs)
+        self.min_value = min_value
+        self.max_value = max_value
+        self.value = value
+        self.units = units
+
+    def default_value(self):
+        return self.value
+
+
+class UiRadioOption(UiElement):
+    pass
+
+
+class UiRadioGroup(UiElement):
+    """ Its value is the identifier of the selected option. """
+
+    def __init__(self, identifier, label='', detail='', options=(), selected_option=0, **kwargs):
+        super(UiRadioGroup, self).__init__(identifier, label, detail, **kwargs)
+        self.options = list(options)
+        self.selected_option = selected_option
+
+    def default_value(self):
+        return self.options[self.selected_option].identifier
@@ -0,0 +1,225 @@
+"""
+Run a skill against the stand-in api, tick by tick, timing every callback.
+"""
+from __future__ import absolute_import
+
+import heapq
+import importlib
+import itertools
+import sys
+import time
+import timeit
+import types
+
+from . import SKILLSET_DIR
+from .api import StandInAPI
+
+# The name skill modules are imported under, as submodules of the skillset.
+SKILLSET_PACKAGE = 'skillset'
+# The skill callbacks the harness calls and times.
+CALLBACKS = ('update', 'get_onscreen_controls', 'button_pressed', 'setting_changed',
+             'handle_rpc')
+
+
+def _skillset_package(skillset_dir):
+    """
+    The skillset directory as a package, without running its __init__.py, so that skills can
+    import their neighbours relatively and one module that fails to import doesn't keep the
+    others from running.
+    """
+    package = sys.modules.get(SKILLSET_PACKAGE)
+    if package is None or list(getattr(package, '__path__', [])) != [skillset_dir]:
+        package = types.ModuleType(SKILLSET_PACKAGE)
+        package.__path__ = [skillset_dir]
+        for module_name in list(sys.modules):
+            if module_name.startswith(SKILLSET_PACKAGE + '.'):
+                del sys.modules[module_name]
+        sys.modules[SKILLSET_PACKAGE] = package
+    return package
+
+
+def load_skill(name, skillset_dir=SKILLSET_DIR):
+    """
+    Import and construct a skill named like in the manifest, e.g. 'polygon_path.PolygonPath'.
+    """
+    module_name, class_name = name.rsplit('.', 1)
+    _skillset_package(skillset_dir)
+    module = importlib.import_module('{}.{}'.format(SKILLSET_PACKAGE, module_name))
+    return getattr(module, class_name)()
+
+
+class CallbackTimes(object):
+    """
+    Wall time of every call to one callback.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.times = []
+
+    def add(self, seconds):
+        self.times.append(seconds)
+
+    def percentile(self, percent):
+        if not self.times:
+            return None
+        ordered = sorted(self.times)
+        return ordered[min(int(len(ordered) * percent / 100.0), len(ordered) - 1)]
+
+    def summary(self):
+        """ Call count, and mean, p50, p95 and max time in milliseconds. """
+        if not self.times:
+            return {'calls': 0}
+        return {
+            'calls': len(self.times),
+            'mean_ms': 1e3 * sum(self.times) / len(self.times),
+            'p50_ms': 1e3 * self.percentile(50),
+            'p95_ms': 1e3 * self.percentile(95),
+            'max_ms': 1e3 * max(self.times),
+        }
+
+
+class Simulation(object):
+    """
+    Drive a skill like the skills framework does: update() every tick, get_onscreen_controls()
+    after any tick that asked for a layout, and the other callbacks when the user or a client
+    does something.
+
+    Args:
+        skill (Skill): the skill to run.
+        api (StandInAPI): the world to run it in, a default one if None.
+        rate (float): ticks per simulated second, 8 like the vehicle.
+        realtime (bool): pace ticks to the wall clock instead of running as fast as possible.
+    """
+
+    def __init__(self, skill, api=None, rate=8.0, realtime=False):
+        self.skill = skill
+        self.api = api or StandInAPI()
+        self.rate = rate
+        self.period = 1.0 / rate
+        self.realtime = realtime
+        self.ticks = 0
+        self.controls = None
+        self.replies = []
+        self.times = {name: CallbackTimes(name) for name in CALLBACKS}
+        self.tick_times = CallbackTimes('tick')
+        self.wall_time = 0.0
+        self._events = []
+        self._event_order = itertools.count()
+
+    @property
+    def time(self):
+        """ Simulated seconds since the start. """
+        return self.api.utime / 1e6
+
+    def _call(self, name, *args):
+        start = timeit.default_timer()
+        try:
+            return getattr(self.skill, name)(self.api, *args)
+        finally:
+            self.times[name].add(timeit.default_timer() - start)
+
+    def time_method(self, name):
+        """
+        Also time calls to another method of the skill, like a helper its update() calls, and
+        report it with the callbacks.
+        """
+        method = getattr(self.skill, name)
+        times = self.times[name] = CallbackTimes(name)
+
+        def timed(*args, **kwargs):
+            start = timeit.default_timer()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                times.add(timeit.default_timer() - start)
+
+        setattr(self.skill, name, timed)
+
+    def press(self, button_id):
+        """ The user pressed a button in the app. """
+        self._call('button_pressed', button_id)
+
+    def rpc(self, message):
+        """ A client sent a message to the skill, returns the reply. """
+        reply = self._call('handle_rpc', message)
+        self.replies.append(reply)
+        return reply
+
+    def change_setting(self, identifier, value):
+        """ The user changed a setting in the app. """
+        self._call('setting_changed', self.skill.set_value_for_user_setting(identifier, value))
+
+    def at(self, seconds, action, *args):
+        """
+        Call action(*args) before the first tick at or after `seconds` of simulated time,
+        e.g. sim.at(2.0, sim.press, 'start').
+        """
+        heapq.heappush(self._events, (seconds, next(self._event_order), action, args))
+
+    def tick(self):
+        start = timeit.default_timer()
+        while self._events and self._events[0][0] <= self.time + 1e-9:
+            _, _, action, args = heapq.heappop(self._events)
+            action(*args)
+        self._call('update')
+        if self.skill.needs_layout():
+            self.skill.clear_needs_layout()
+            self.controls = self._call('get_onscreen_controls')
+        self.tick_times.add(timeit.default_timer() - start)
+        self.api.step(self.period)
+        self.ticks += 1
+
+    def run(self, seconds=None, ticks=None):
+        """
+        Tick for `seconds` of simulated time or a number of ticks, and return the report().
+        """
+        if ticks is None:
+            ticks = int(round(seconds * self.rate))
+        wall_start = timeit.default_timer()
+        for i in range(ticks):
+            if self.realtime:
+                wait = wall_start + i * self.period - timeit.default_timer()
+                if wait > 0:
+                    time.sleep(wait)
+            self.tick()
+        self.wall_time += timeit.default_timer() - wall_start
+        return self.report()
+
+    def report(self):
+        """ Tick rate, the time spent in each callback and the AR scene traffic. """
+        return {
+            'ticks': self.ticks,
+            'simulated_seconds': self.time,
+            'wall_seconds': self.wall_time,
+            'ticks_per_second': self.ticks / self.wall_time if self.wall_time else None,
+            'realtime_factor': self.time / self.wall_time if self.wall_time else None,
+            'budget_ms': 1e3 * self.period,
+            'tick': self.tick_times.summary(),
+            'callbacks': {name: times.summary() for name, times in self.times.items()
+                          if times.times},
+            'scene': {'clears': self.api.scene.clears,
+                      'prisms_sent': self.api.scene.prisms_added},
+        }
+
+    def format_report(self):
+        report = self.report()
+        lines = ['{} ticks, {:.1f}s simulated in {:.2f}s: {:.0f} ticks/s, {:.0f}x real time'.format(
+            report['ticks'], report['simulated_seconds'], report['wall_seconds'],
+            report['ticks_per_second'] or 0, report['realtime_factor'] or 0)]
+        lines.append('{:<24} {:>7} {:>9} {:>9} {:>9}'.format(
+            'CALLBACK', 'CALLS', 'P50 MS', 'P95 MS', 'MAX MS'))
+        rows = [('tick', report['tick'])] + sorted(report['callbacks'].items())
+        for name, summary in rows:
+            if summary['calls']:
+                lines.append('{:<24} {:>7} {:>9.3f} {:>9.3f} {:>9.3f}'.format(
+                    name, summary['calls'], summary['p50_ms'], summary['p95_ms'],
+                    summary['max_ms']))
+        if report['scene']['prisms_sent']:
+            lines.append('{} AR prisms sent, the scene cleared {} times'.format(
+                report['scene']['prisms_sent'], report['scene']['clears']))
+        overruns = sum(1 for seconds in self.tick_times.times if seconds > self.period)
+        if overruns:
+            lines.append('{} ticks took longer than the {:.0f}ms budget'.format(
+                overruns, report['budget_ms']))
+        return '\n'.join(lines)
@@ -1,9 +1,36 @@
-from .com_link import ComLink
-from .follow_modes import Lead, Side
-from .party_mode import PartyMode
-from .orbit_point import OrbitPoint
-from .polygon_path import PolygonPath
-from .property_tour import PropertyTour
-from .remote import RemoteControl
-from .roof_inspection import RoofInspection
-from .security_bot import SecurityBot
+"""
+The sample skills. Each skill's module is imported the first time its class is looked up, like
+skillset.PartyMode, see skill_registry.py.
+"""
+from __future__ import absolute_import
+
+import os
+import sys
+import types
+
+from .skill_registry import SkillRegistry
+
+registry = SkillRegistry(__name__, os.path.dirname(os.path.abspath(__file__)))
+
+__all__ = sorted(str(name) for name in registry.class_names())
+
+
+class _LazySkillset(types.ModuleType):
+    """ The skillset package, importing the module of a skill when its class is looked up. """
+
+    def __getattr__(self, name):
+        skill = registry.class_names().get(name)
+        if skill is None:
+            raise AttributeError('module {} has no attribute {}'.format(__name__, name))
+        return registry.get(skill)
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(__all__))
+
+
+# Swap in the lazy package, keeping this module alive since python 2 clears the globals of
+# modules it frees.
+_lazy = _LazySkillset(__name__, __doc__)
+_lazy.__dict__.update(globals())
+_lazy.__dict__['_module'] = sys.modules[__name__]
+sys.modules[__name__] = _lazy
@@ -0,0 +1,155 @@
+"""
+Send the phone only the changes to the augmented reality scene a skill draws.
+
+Skills describe the whole scene they want every time, and clearing and re-adding every prism
+ships the whole scene to the phone even when nothing moved. SceneManager keeps what it last sent,
+keyed by ids the skill chooses, and diffs the desired prisms against it:
+
+    scene = SceneManager()
+    scene.update(api, {waypoint_id: (nav_T_center, size) for ...})
+
+Prisms that moved less than the tolerance count as unchanged. If nothing changed nothing is
+sent. The scene api can only add prisms or clear them all, so new prisms alone are added to the
+scene as it is, and any removed or moved prism means clearing and adding the whole scene again.
+"""
+from __future__ import absolute_import
+
+import math
+
+import numpy as np
+
+from vehicle.skills.util.ar import Prism
+
+# Prisms closer than these to what was sent count as unchanged.
+POSITION_TOLERANCE = 0.05  # [m]
+ANGLE_TOLERANCE = 0.02  # [rad]
+SIZE_TOLERANCE = 0.01  # [m]
+# Rough size of a prism in the scene sent to the phone: a position, a quaternion and a size.
+PRISM_BYTES = 10 * 8
+
+
+class SceneDiff(object):
+    """
+    How the desired scene differs from what was last sent, and what sending it cost.
+    """
+
+    def __init__(self, added, removed, moved, unchanged):
+        self.added = added
+        self.removed = removed
+        self.moved = moved
+        self.unchanged = unchanged
+        self.rebuilt = False
+        self.objects_sent = 0
+        # {object id: pose} of the desired prisms.
+        self.poses = {}
+
+    @property
+    def empty(self):
+        return not (self.added or self.removed or self.moved)
+
+    @property
+    def objects_saved(self):
+        """ Prisms not sent, compared to clearing and adding the whole scene. """
+        return len(self.added) + len(self.moved) + len(self.unchanged) - self.objects_sent
+
+    @property
+    def bytes_saved(self):
+        return self.objects_saved * PRISM_BYTES
+
+
+class SceneManager(object):
+    """
+    The prisms last sent to the phone, by id.
+
+    Args:
+        position_tolerance (float): meters a prism may move without being sent again.
+        angle_tolerance (float): radians a prism may turn without being sent again.
+    """
+
+    def __init__(self, position_tolerance=POSITION_TOLERANCE, angle_tolerance=ANGLE_TOLERANCE):
+        self.position_tolerance = position_tolerance
+        self.angle_tolerance = angle_tolerance
+        # {object id: pose} as last sent, None before the first send.
+        self.sent = None
+        self.updates = 0
+        self.rebuilds = 0
+        self.objects_sent = 0
+        self.objects_saved = 0
+
+    @staticmethod
+    def _pose(nav_T_center, size):
+        """ Position, euler angles and size as a flat tuple. """
+        return tuple(nav_T_center.translation().tolist()) + \
+            tuple(nav_T_center.get_euler_angles().tolist()) + tuple(np.asarray(size).tolist())
+
+    def _moved(self, old, new):
+        """ Whether two poses differ by more than the tolerances. """
+        squared_distance = ((new[0] - old[0]) ** 2 + (new[1] - old[1]) ** 2 +
+                            (new[2] - old[2]) ** 2)
+        if squared_distance > self.position_tolerance ** 2:
+            return True
+        for i in (3, 4, 5):
+            if abs((new[i] - old[i] + math.pi) % (2 * math.pi) - math.pi) > self.angle_tolerance:
+                return True
+        for i in (6, 7, 8):
+            if abs(new[i] - old[i]) > SIZE_TOLERANCE:
+                return True
+        return False
+
+    def diff(self, prisms):
+        """ The SceneDiff of {object id: (nav_T_center, size)} against what was last sent. """
+        sent = self.sent or {}
+        added, moved, unchanged = [], [], []
+        poses = {}
+        for object_id, (nav_T_center, size) in prisms.items():
+            pose = poses[object_id] = self._pose(nav_T_center, size)
+            if object_id not in sent:
+                added.append(object_id)
+            elif self._moved(sent[object_id], pose):
+                moved.append(object_id)
+            else:
+                unchanged.append(object_id)
+        removed = [object_id for object_id in sent if object_id not in prisms]
+        diff = SceneDiff(added, removed, moved, unchanged)
+        diff.poses = poses
+        return diff
+
+    def update(self, api, prisms):
+        """
+        Make the scene on the phone {object id: (nav_T_center, size)}, sending as little as the
+        scene api allows. Returns the SceneDiff.
+        """
+        diff = self.diff(prisms)
+        self.updates += 1
+        if self.sent is not None and diff.empty:
+            self.objects_saved += diff.objects_saved
+            return diff
+
+        if self.sent is None or diff.removed or diff.moved:
+            api.scene.clear_all_objects()
+            to_send = list(prisms)
+            self.sent = {}
+            diff.rebuilt = True
+            self.rebuilds += 1
+        else:
+            to_send = diff.added
+        for object_id in to_send:
+            nav_T_center, size = prisms[object_id]
+            api.scene.add_prism(Prism(nav_T_center, size=np.asarray(size, dtype=float)))
+            self.sent[object_id] = diff.poses[object_id]
+        diff.objects_sent = len(to_send)
+        self.objects_sent += diff.objects_sent
+        self.objects_saved += diff.objects_saved
+        return diff
+
+    def clear(self, api):
+        """ Remove every prism. """
+        if self.sent != {}:
+            api.scene.clear_all_objects()
+            self.sent = {}
+
+    def stats(self):
+        """ Totals over every update so far. """
+        return dict(updates=self.updates, rebuilds=self.rebuilds, objects_sent=self.objects_sent,
+                    objects_saved=self.objects_saved,
+                    bytes_saved=self.objects_saved * PRISM_BYTES)
@@ -9,7 +9,12 @@ from vehicle.skills.util.ui import UiButton
 from vehicle.skills.util.motions.goto_motion import GotoMotion
 from vehicle.skills.util.transform import Transform
 
+from .layout import scheduled_layout
+from .profiling import profiled
 
+
+@scheduled_layout()
+@profiled()
 class ComLink(Skill):
     """ Communicate with a client device over HTTP.
 
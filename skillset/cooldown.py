@@ -0,0 +1,87 @@
+"""
+Keys that were used recently, forgotten once a cooldown period has passed.
+
+A skill that should not repeat a choice too soon, like following the same track again, records
+each use and asks which candidates have cooled down:
+
+    cooldown = CooldownTable(20.0)
+    cooldown.touch(track_id, api.utime)
+    eligible = cooldown.eligible(candidate_ids, api.utime)  # boolean array
+
+The table is kept in the order keys were last used, so expired keys are dropped from the
+oldest end in O(1) each and the table never holds more than the keys used in one period. A
+table can remember keys for longer than their cooldown, to tell how long ago they were used,
+and then holds the keys used within that memory.
+"""
+from __future__ import absolute_import
+
+import collections
+
+import numpy as np
+
+import shared.util.time_manager.time_manager as tm
+
+
+class CooldownTable(object):
+    """
+    The last utime of each key used within the memory period.
+
+    Args:
+        period (float): seconds after its last use that a key is eligible again.
+        memory (float): seconds after its last use that a key is forgotten, at least period.
+    """
+
+    def __init__(self, period, memory=None):
+        self.period = period
+        self.memory = period if memory is None else max(memory, period)
+        self._period_utime = tm.seconds_to_utime(period)
+        self._memory_utime = tm.seconds_to_utime(self.memory)
+        # {key: utime of last use}, oldest use first.
+        self._last_utime = collections.OrderedDict()
+        self.touches = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._last_utime)
+
+    def __contains__(self, key):
+        return key in self._last_utime
+
+    def touch(self, key, utime):
+        """ Record a use of key, starting its cooldown over. """
+        # Re-inserting moves the key to the newest end.
+        self._last_utime.pop(key, None)
+        self._last_utime[key] = utime
+        self.touches += 1
+
+    def expire(self, utime):
+        """ Forget the keys last used longer than memory before utime. """
+        last_utime = self._last_utime
+        while last_utime:
+            key = next(iter(last_utime))
+            if utime - last_utime[key] < self._memory_utime:
+                break
+            del last_utime[key]
+            self.evictions += 1
+
+    def eligible(self, keys, utime):
+        """ Boolean array of whether each key is out of its cooldown at utime. """
+        self.expire(utime)
+        last_utime = self._last_utime
+        cooled_utime = utime - self._period_utime
+        return np.fromiter((last_utime.get(key, cooled_utime) <= cooled_utime for key in keys),
+                           dtype=bool, count=len(keys))
+
+    def seconds_since(self, keys, utime):
+        """ Array of the seconds since each key was last used, inf for keys not remembered. """
+        self.expire(utime)
+        last_utime = self._last_utime
+        since = np.full(len(keys), np.inf)
+        if last_utime:
+            # Only the few remembered keys are looked up one by one.
+            for index in np.flatnonzero(np.isin(keys, list(last_utime))):
+                since[index] = tm.utime_to_seconds(utime - last_utime[keys[index]])
+        return since
+
+    def stats(self):
+        return dict(size=len(self), touches=self.touches, evictions=self.evictions)
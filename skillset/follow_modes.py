@@ -4,7 +4,12 @@ import numpy as np
 import shared.util.common.math as ac_math
 from vehicle.skills.skills.base import Skill
 
+from .layout import scheduled_layout
+from .profiling import profiled
 
+
+@scheduled_layout()
+@profiled()
 class SubjectRelativeAzimuth(Skill):
     """ Stay a relative angle from the subject's motion. """
 
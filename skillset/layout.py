@@ -0,0 +1,161 @@
+"""
+Send the phone a new layout only when the onscreen controls of a skill actually changed.
+
+Skills call set_needs_layout() whenever the controls might have changed, some of them every
+tick, and each call makes the framework call get_onscreen_controls() and send the result to the
+phone. Decorate a skill class to schedule its layouts instead:
+
+    @scheduled_layout()
+    class MySkill(Skill):
+        ...
+
+set_needs_layout() then only records a request. After update(), a pending request builds the
+controls and compares them with the ones last sent, and the framework is asked for a layout only
+if they differ. Requests closer together than min_period are coalesced into one, made once the
+period has passed, so a skill asking every tick builds its controls and is laid out at most
+1 / min_period times a second.
+"""
+from __future__ import absolute_import
+
+import enum
+import functools
+
+import numpy as np
+
+from shared.util.time_manager import time_manager as tm
+
+# Shortest time between two layouts of a skill.
+LAYOUT_PERIOD = 0.25  # [s]
+
+
+def fingerprint(value):
+    """
+    A comparable summary of a controls dict, so that equal controls built at different times
+    compare equal, including the ui elements and arrays in them.
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((str(key), fingerprint(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(fingerprint(item) for item in value)
+    if isinstance(value, np.ndarray):
+        return tuple(value.tolist())
+    if isinstance(value, enum.Enum):
+        return str(value)
+    if hasattr(value, '__dict__') or hasattr(value, '__slots__'):
+        fields = getattr(value, '__dict__', None)
+        if fields is None:
+            fields = {name: getattr(value, name, None) for name in value.__slots__}
+        return (type(value).__name__, fingerprint(fields))
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+class LayoutScheduler(object):
+    """
+    Layout requests of one skill, and the controls last sent.
+
+    Args:
+        min_period (float): shortest time in seconds between two layouts.
+    """
+
+    def __init__(self, min_period=LAYOUT_PERIOD):
+        self.min_period = min_period
+        # The phone has no controls from the skill yet.
+        self.requested = True
+        self.pending = None
+        self._pending_fingerprint = None
+        self._sent_fingerprint = None
+        self._last_build_utime = None
+        self.requests = 0
+        self.builds = 0
+        self.layouts = 0
+
+    def request(self):
+        self.requested = True
+        self.requests += 1
+
+    def poll(self, build, utime):
+        """
+        Build the controls if a layout is requested and due, and return whether they differ
+        from the ones last sent.
+        """
+        if not self.requested:
+            return False
+        if self._last_build_utime is not None and \
+                utime - self._last_build_utime < tm.seconds_to_utime(self.min_period):
+            return False
+        self.requested = False
+        controls = build()
+        self.builds += 1
+        self._last_build_utime = utime
+        controls_fingerprint = fingerprint(controls)
+        if controls_fingerprint == self._sent_fingerprint:
+            return False
+        self.pending = controls
+        self._pending_fingerprint = controls_fingerprint
+        return True
+
+    def controls(self, build):
+        """ The controls to send, built by poll() or now if the framework asked on its own. """
+        if self.pending is not None:
+            controls, controls_fingerprint = self.pending, self._pending_fingerprint
+            self.pending = self._pending_fingerprint = None
+        else:
+            controls = build()
+            self.builds += 1
+            controls_fingerprint = fingerprint(controls)
+        self._sent_fingerprint = controls_fingerprint
+        self.layouts += 1
+        return controls
+
+    def stats(self):
+        return dict(requests=self.requests, builds=self.builds, layouts=self.layouts)
+
+
+def scheduled_layout(min_period=LAYOUT_PERIOD):
+    """
+    Class decorator that lays out a skill only when its controls change, see LayoutScheduler.
+
+    The scheduler of each skill instance is created on first use and available as
+    skill.layout_scheduler. Subclasses of a decorated skill are scheduled too.
+    """
+
+    def decorate(cls):
+        if getattr(cls.update, 'scheduled_layout', False):
+            return cls
+        set_needs_layout = getattr(cls.set_needs_layout, '__func__', cls.set_needs_layout)
+        update = getattr(cls.update, '__func__', cls.update)
+        get_onscreen_controls = getattr(cls.get_onscreen_controls, '__func__',
+                                        cls.get_onscreen_controls)
+
+        def get_scheduler(self):
+            scheduler = self.__dict__.get('_layout_scheduler')
+            if scheduler is None:
+                scheduler = self._layout_scheduler = LayoutScheduler(min_period)
+            return scheduler
+
+        def request_layout(self):
+            self.layout_scheduler.request()
+
+        @functools.wraps(update)
+        def scheduled_update(self, api):
+            result = update(self, api)
+            if self.layout_scheduler.poll(lambda: get_onscreen_controls(self, api), api.utime):
+                set_needs_layout(self)
+            return result
+
+        @functools.wraps(get_onscreen_controls)
+        def scheduled_get_onscreen_controls(self, api):
+            return self.layout_scheduler.controls(lambda: get_onscreen_controls(self, api))
+
+        scheduled_update.scheduled_layout = True
+        cls.layout_scheduler = property(get_scheduler)
+        cls.set_needs_layout = request_layout
+        cls.update = scheduled_update
+        cls.get_onscreen_controls = scheduled_get_onscreen_controls
+        return cls
+
+    return decorate
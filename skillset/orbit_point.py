@@ -1,3 +1,5 @@
+from __future__ import absolute_import
+from __future__ import print_function
 import enum
 import numpy as np
 
@@ -7,6 +9,10 @@ from vehicle.skills.skills.base import Skill
 from vehicle.skills.util import ar
 from vehicle.skills.util import ui
 
+from .ar_scene import SceneManager
+from .layout import scheduled_layout
+from .profiling import profiled
+
 
 # TODO(matt): fix the phone API
 def safe_get_key(phone_api, key):
@@ -45,6 +51,8 @@ TEST_DEPTH = 5.0
 VERTICAL_DRAWING_OFFSET = np.array([0, 0, -1.0])
 
 
+@scheduled_layout()
+@profiled()
 class OrbitPoint(Skill):
     """
     Double tap on the screen to start orbiting a point
@@ -75,10 +83,10 @@ class OrbitPoint(Skill):
         # Called by the sdk whenever the user changes a setting
         if user_setting.id == 'max_distance':
             self.max_distance = int(self.get_value_for_user_setting('max_distance'))
-            print "max_distance =", self.max_distance
+            print("max_distance =", self.max_distance)
         elif user_setting.id == 'orbit_range':
             self.orbit_range = int(self.get_value_for_user_setting('orbit_range'))
-            print "orbit_range =", self.orbit_range
+            print("orbit_range =", self.orbit_range)
 
 
     def __init__(self):
@@ -97,6 +105,8 @@ class OrbitPoint(Skill):
         self.max_distance = int(self.get_value_for_user_setting('max_distance'))
         self.orbit_range = int(self.get_value_for_user_setting('orbit_range'))
 
+        # The prisms drawn in the app, sending only the ones that change
+        self.ar_scene = SceneManager()
 
     @property
     def state(self):
@@ -126,9 +136,7 @@ class OrbitPoint(Skill):
         end = start + TEST_DEPTH * self.tap_ray
 
         # Use AR to draw the line as a prism.
-        ray_prism = ar.make_cable_prism(start + VERTICAL_DRAWING_OFFSET, end)
-        api.scene.clear_all_objects()
-        api.scene.add_prism(ray_prism)
+        self.draw_cable(api, 'ray', start + VERTICAL_DRAWING_OFFSET, end)
 
         # Get the distance from the start point to the nearest obstacle along the ray, or None.
         depth = api.obstacle_map.depth_test(start, end)
@@ -159,9 +167,15 @@ class OrbitPoint(Skill):
         api.focus.set_keep_subject_in_sight(False)
 
         # Use AR to draw the point
-        api.scene.clear_all_objects()
-        ray_prism = ar.make_cable_prism(self.orbit_point, self.orbit_point + np.array([0, 0, 1.0]))
-        api.scene.add_prism(ray_prism)
+        self.draw_cable(api, 'orbit_point', self.orbit_point,
+                        self.orbit_point + np.array([0, 0, 1.0]))
+
+    def draw_cable(self, api, object_id, start, end):
+        """
+        Make the AR scene a single cable prism from start to end.
+        """
+        prism = ar.make_cable_prism(start, end)
+        self.ar_scene.update(api, {object_id: (prism.nav_T_center, prism.size)})
 
     def button_pressed(self, api, button_id):
         """
@@ -216,5 +230,5 @@ class OrbitPoint(Skill):
         if self.state == State.ORBITING:
             self.perform_orbit(api)
 
-        # Force the screen to redraw.
+        # Ask for the screen to redraw, which only happens if the controls changed.
         self.set_needs_layout()
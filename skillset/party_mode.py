@@ -3,10 +3,7 @@ import enum
 import math
 import numpy as np
 from numpy.linalg import norm
-import random
-import string
 
-from vehicle.skills.util import core
 import shared.util.error_reporter.error_reporter as er
 import shared.util.time_manager.time_manager as tm
 from vehicle.skills.skills import Skill
@@ -14,9 +11,18 @@ from vehicle.skills.util import LowPassFilter
 from vehicle.skills.util.ui import UiButton
 from vehicle.skills.util.ui import UiSlider
 
+from .cooldown import CooldownTable
+from .layout import scheduled_layout
+from .profiling import profiled
+from .scoring import CandidateScorer
+from .spatial_index import GridIndex
+from .tracks import TrackSnapshot
+
 # pylint: disable=too-many-statements
 
 
+@scheduled_layout()
+@profiled()
 class PartyMode(Skill):
     """ Searches in an area, locking onto people and staying on them if they are moving."""
 
@@ -66,6 +72,8 @@ class PartyMode(Skill):
     MIN_HEIGHT = 2.0  # [m]
     # Minimum time to wait before re-locking onto a previously locked track
     MIN_REPEAT_TRACK_TIME = 20.0  # [s]
+    # After this long a previously locked track scores like one never locked
+    FOLLOW_MEMORY_TIME = 120.0  # [s]
     # Maximum amount of time to follow a track that doesn't move
     MAX_TRACK_STILL_TIME = 8.0  # [s]
     # A track that exceeds this speed is defined as moving.
@@ -79,9 +87,17 @@ class PartyMode(Skill):
         # The point that we're anchored at
         self.nav_t_anchor = None
 
-        # Maps track ids to the last utime that we were tracking them, to not repeat tracks too
+        # The last utime that we were tracking each recent track id, to not repeat tracks too
         # soon.
-        self.trackid_last_utime_dict = dict()
+        self.track_cooldown = CooldownTable(self.MIN_REPEAT_TRACK_TIME,
+                                            memory=self.FOLLOW_MEMORY_TIME)
+
+        # Scores the candidates to lock onto, preferring close, moving, not recently seen ones.
+        self.candidate_scorer = CandidateScorer(self.MAX_LOCK_DISTANCE, self.FOLLOW_MEMORY_TIME,
+                                                self.MOVING_CUTOFF_SPEED)
+
+        # Grid of the track positions, kept across ticks.
+        self.track_index = GridIndex()
 
         # Multiply this by the direction of the rate to change up the search strategy
         self.rate_direction_mult = 1
@@ -103,47 +119,47 @@ class PartyMode(Skill):
         # or if not, if we were able to find a good candidate to start tracking.
 
         # A good candidate is a track that we haven't recently finished tracking, is locked,
-        # and is close enough.
+        # and is close enough. The best one is close, moving and hasn't been tracked for long.
         vehicle_position = api.vehicle.get_position()
         motion_state = api.subject.get_motion_state()
         tracker_state = motion_state.tracker_state
 
         selected_track = api.subject.get_subject_track()
         if selected_track is not None:
-            self.trackid_last_utime_dict[selected_track.track_id] = motion_state.utime
+            self.track_cooldown.touch(selected_track.track_id, motion_state.utime)
             return True
 
-        locked_tracks = []
-        for track in tracker_state.tracks:
-            if track.classification.name != 'PERSON':
-                # skip non-person tracks
-                continue
-            track_position = core.msg_to_ndarray(track.nav_frame.trans.position)
-            distance = norm(track_position - vehicle_position)
-            distance_from_start = norm(track_position - self.nav_t_anchor)
-
-            # Check that this trackid hasn't been tracked in some amount of time
-            been_long_enough = True
-            if track.track_id in self.trackid_last_utime_dict:
-                last_time = self.trackid_last_utime_dict[track.track_id]
-                time_since_last = tm.utime_to_seconds(motion_state.utime - last_time)
-                if time_since_last < self.MIN_REPEAT_TRACK_TIME:
-                    been_long_enough = False
-
-            er.REPORT_QUIET(
-                "Track[id: {}, locked: {}, distance: {}, from_start: {} been_long_enough: {}]",
-                track.track_id, track.is_locked, distance, distance_from_start, been_long_enough)
-
-            if track.is_locked and (distance < self.MAX_LOCK_DISTANCE) and been_long_enough and (
-                    distance_from_start < self.get_value_for_user_setting('radius')):
-                locked_tracks.append(track)
-
-        if locked_tracks:
-            chosen_track = random.choice(locked_tracks)
-            er.REPORT_QUIET("Found {} locked tracks, chose track {}", len(locked_tracks),
-                            chosen_track.track_id)
-
-            self.trackid_last_utime_dict[chosen_track.track_id] = motion_state.utime
+        # Find the locked people near both the vehicle and the anchor from the grid, then check
+        # the repeat time of the few left. Every track is observed so that the speeds of the
+        # candidates are known once there are some.
+        snapshot = TrackSnapshot.from_tracker_state(
+            tracker_state, motion_state.utime).indexed(self.track_index)
+        self.candidate_scorer.observe(snapshot.track_ids, snapshot.positions, motion_state.utime)
+        near_vehicle, near_anchor = self.track_index.within(
+            [vehicle_position, self.nav_t_anchor],
+            [self.MAX_LOCK_DISTANCE, self.get_value_for_user_setting('radius')],
+            mask=snapshot.is_person & snapshot.is_locked)
+        in_range = np.intersect1d(near_vehicle, near_anchor, assume_unique=True)
+
+        # Candidates haven't been tracked in some amount of time.
+        candidates = in_range[self.track_cooldown.eligible(snapshot.track_ids[in_range],
+                                                           motion_state.utime)]
+
+        er.REPORT_QUIET("Tracks: {}, people near anchor: {}, near vehicle: {}, candidates: {}",
+                        len(snapshot), len(near_anchor), len(near_vehicle), len(candidates))
+
+        if len(candidates):
+            candidate_ids = snapshot.track_ids[candidates]
+            scores = self.candidate_scorer.score(
+                candidate_ids, snapshot.positions[candidates], vehicle_position,
+                self.track_cooldown.seconds_since(candidate_ids, motion_state.utime),
+                motion_state.utime)
+            best = int(np.argmax(scores))
+            chosen_track = snapshot.tracks[candidates[best]]
+            er.REPORT_QUIET("Found {} locked tracks, chose track {} with score {:.2f}",
+                            len(candidates), chosen_track.track_id, scores[best])
+
+            self.track_cooldown.touch(chosen_track.track_id, motion_state.utime)
             api.subject.select_track(motion_state.utime, chosen_track.track_id)
             return True
 
@@ -191,7 +207,7 @@ class PartyMode(Skill):
             buttons = []
             show_stop = True
         else:
-            title = string.capitalize(self.state.name)
+            title = self.state.name.capitalize()
             detail = ''
             buttons = []
             show_stop = True
@@ -18,12 +18,17 @@ from vehicle.skills.util.ui import UiSlider
 
 # Augmented Reality Support
 from vehicle.skills.util.transform import Rot3, Transform
-from vehicle.skills.util.ar import Prism
+
+from .ar_scene import SceneManager
+from .layout import scheduled_layout
+from .profiling import profiled
 
 
 M_2PI = 2 * pi
 
 
+@scheduled_layout()
+@profiled()
 class PolygonPath(Skill):
     """
     Fly in the shape of a polygon with a user-defined number of sides.
@@ -90,6 +95,9 @@ class PolygonPath(Skill):
         # create a downsampler so we can update AR at most once a second
         self.publish_downsampler = tm.DownSampler(1.0)
 
+        # the prisms drawn in the app, sending only the ones that change
+        self.ar_scene = SceneManager()
+
     def button_pressed(self, api, button_id):
         """ Called by the sdk whenever the user presses a button """
         print("user pressed {}".format(button_id))
@@ -135,8 +143,7 @@ class PolygonPath(Skill):
 
     def update_ar_scene(self, api):
         """Draw prisms in the shape of the polygon."""
-        api.scene.clear_all_objects()
-
+        prisms = {}
         num_sides = float(self.get_value_for_user_setting('num_sides'))
         radius = self.get_value_for_user_setting('radius')
         adjust_angle = pi - (num_sides - 2) * pi / num_sides / 2
@@ -149,9 +156,8 @@ class PolygonPath(Skill):
             nav_T_vertex = Transform(side_rot, vertex_pos)
             size = 2 * sin(pi / num_sides) * radius
             prism_pos = nav_T_vertex * np.array([size / 2, 0, -1.3])
-            p = Prism(nav_T_center=Transform(side_rot, prism_pos),
-                      size=np.array([size, .2, .2]))
-            api.scene.add_prism(p)
+            prisms[side] = (Transform(side_rot, prism_pos), np.array([size, .2, .2]))
+        self.ar_scene.update(api, prisms)
 
     def update(self, api):
         """ Called by the sdk multiple times a second. """
@@ -178,8 +184,8 @@ class PolygonPath(Skill):
 
         if self.desired_position is None:
             desired_angle = self.index / num_sides * M_2PI
-            direction = np.array([cos(desired_angle), sin(desired_angle), 0])
-            self.desired_position = self.center + radius * direction
+            vertex_direction = np.array([cos(desired_angle), sin(desired_angle), 0])
+            self.desired_position = self.center + radius * vertex_direction
             print("new desired position {}".format(self.desired_position))
             self.last_change_utime = api.utime
 
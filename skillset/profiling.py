@@ -0,0 +1,195 @@
+"""
+Time the callbacks of a skill against the budget of one update.
+
+The skills framework calls update() at 8Hz, so update() and anything the framework calls in the
+same tick, like get_onscreen_controls() and handle_rpc(), share a budget of 125ms. Decorate a
+skill class to record the wall time of each call to those methods in a fixed-size ring buffer:
+
+    @profiled()
+    class MySkill(Skill):
+        ...
+
+    skill.profiler.summary()  # {'update': {'calls': 812, 'p50_ms': 0.4, ...}, ...}
+
+Calls longer than the budget are counted as overruns. With profile_overruns, the call after an
+overrun runs under cProfile, and if it overruns too its hottest functions are kept in the
+summary. Skills without a status of their own can also publish the summary as their status,
+with publish_period=PUBLISH_PERIOD.
+"""
+from __future__ import absolute_import
+
+import cProfile
+import functools
+import json
+import pstats
+import timeit
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+from shared.util.time_manager.time_manager import DownSampler
+
+# The methods timed by default.
+PROFILED_METHODS = ('update', 'get_onscreen_controls', 'handle_rpc')
+# The time the framework allows for one tick at 8Hz.
+BUDGET = 0.125  # [s]
+# Number of recent calls of each method the percentiles are taken over.
+WINDOW = 256
+# Number of functions kept from the profile of an overrun.
+PROFILE_LINES = 12
+# Suggested seconds between publishing the summary of a profiled skill.
+PUBLISH_PERIOD = 10.0
+
+
+class CallTimes(object):
+    """
+    The wall time of the last `size` calls of one method, and totals over all calls.
+    """
+
+    def __init__(self, size=WINDOW):
+        self.samples = [0.0] * size
+        self.calls = 0
+        self.overruns = 0
+        self.max = 0.0
+
+    def add(self, seconds, overrun):
+        self.samples[self.calls % len(self.samples)] = seconds
+        self.calls += 1
+        self.max = max(self.max, seconds)
+        if overrun:
+            self.overruns += 1
+
+    def recent(self):
+        return self.samples[:min(self.calls, len(self.samples))]
+
+    def summary(self):
+        """ Call and overrun counts, p50 and p95 of the recent calls and max of all calls. """
+        recent = sorted(self.recent())
+        if not recent:
+            return {'calls': 0, 'overruns': 0}
+
+        def percentile(percent):
+            return recent[min(int(len(recent) * percent / 100.0), len(recent) - 1)]
+
+        return {
+            'calls': self.calls,
+            'overruns': self.overruns,
+            'p50_ms': round(1e3 * percentile(50), 3),
+            'p95_ms': round(1e3 * percentile(95), 3),
+            'max_ms': round(1e3 * self.max, 3),
+        }
+
+
+class SkillProfiler(object):
+    """
+    Per-method call times of one skill.
+
+    Args:
+        budget (float): seconds a call may take before it counts as an overrun.
+        window (int): number of recent calls per method to take percentiles over.
+        publish_period (float): seconds between publishing the summary, None to not publish.
+        profile_overruns (bool): run cProfile on the call after an overrun.
+    """
+
+    def __init__(self, budget=BUDGET, window=WINDOW, publish_period=None,
+                 profile_overruns=False):
+        self.budget = budget
+        self.window = window
+        self.profile_overruns = profile_overruns
+        self.times = {}
+        self.overrun_profiles = {}
+        self._armed = set()
+        self._publish_downsampler = DownSampler(publish_period) if publish_period else None
+
+    def call(self, name, function, *args):
+        """ Call function(*args), recording its time under name. """
+        times = self.times.get(name)
+        if times is None:
+            times = self.times[name] = CallTimes(self.window)
+
+        profile = None
+        if name in self._armed:
+            self._armed.discard(name)
+            profile = cProfile.Profile()
+            profile.enable()
+        start = timeit.default_timer()
+        try:
+            return function(*args)
+        finally:
+            seconds = timeit.default_timer() - start
+            if profile is not None:
+                profile.disable()
+            overrun = seconds > self.budget
+            times.add(seconds, overrun)
+            if overrun and self.profile_overruns:
+                if profile is not None:
+                    self.overrun_profiles[name] = self._hottest(profile)
+                else:
+                    self._armed.add(name)
+
+    @staticmethod
+    def _hottest(profile):
+        """ The functions that took the most time in a profile, as pstats prints them. """
+        output = StringIO()
+        pstats.Stats(profile, stream=output).sort_stats('cumulative').print_stats(PROFILE_LINES)
+        return output.getvalue()
+
+    def summary(self):
+        """ {method: summary} of every method called so far, with the budget. """
+        summary = {name: times.summary() for name, times in self.times.items()}
+        summary['budget_ms'] = 1e3 * self.budget
+        if self.overrun_profiles:
+            summary['overrun_profiles'] = dict(self.overrun_profiles)
+        return summary
+
+    def maybe_publish(self, api):
+        """ Publish the summary as the skill status if publish_period has passed. """
+        if self._publish_downsampler and self._publish_downsampler.ready(api.utime):
+            api.custom_comms.publish_status(json.dumps({'profile': self.summary()}))
+
+
+def _timed(name, method):
+    """ Wrap a skill method to time it with the skill's profiler. """
+
+    @functools.wraps(method)
+    def wrapper(self, api, *args):
+        profiler = self.profiler
+        result = profiler.call(name, method, self, api, *args)
+        if name == 'update':
+            profiler.maybe_publish(api)
+        return result
+
+    wrapper.profiled = True
+    return wrapper
+
+
+def profiled(budget=BUDGET, window=WINDOW, publish_period=None, profile_overruns=False,
+             methods=PROFILED_METHODS):
+    """
+    Class decorator that times the given methods of a skill, see SkillProfiler for the args.
+
+    The profiler of each skill instance is created on first use and available as
+    skill.profiler. Methods inherited from a profiled base class are not timed twice.
+    """
+
+    def decorate(cls):
+        for name in methods:
+            method = getattr(cls, name, None)
+            if method is None or getattr(method, 'profiled', False):
+                continue
+            setattr(cls, name, _timed(name, getattr(method, '__func__', method)))
+
+        def get_profiler(self):
+            profiler = self.__dict__.get('_profiler')
+            if profiler is None:
+                profiler = self._profiler = SkillProfiler(
+                    budget=budget, window=window, publish_period=publish_period,
+                    profile_overruns=profile_overruns)
+            return profiler
+
+        cls.profiler = property(get_profiler)
+        return cls
+
+    return decorate
@@ -14,6 +14,9 @@ from vehicle.skills.util.transform import Transform
 from vehicle.skills.util.ui import UiButton
 from vehicle.skills.util.ui import UiSlider
 
+from .layout import scheduled_layout
+from .profiling import profiled
+
 
 class TourState(enum.Enum):
     # Wait for the user to start the tour
@@ -26,6 +29,8 @@ class TourState(enum.Enum):
     STOP = 5
 
 
+@scheduled_layout()
+@profiled()
 class PropertyTour(Skill):
     """
     Create a simple tour based on the front door of a house
@@ -5,11 +5,16 @@ import numpy as np
 
 from vehicle.skills.skills import Skill
 
+from .layout import scheduled_layout
+from .profiling import profiled
+
 
 class MotionCommand(object):
 
-    def __init__(self, utime, data):
+    def __init__(self, utime, data, seq=None):
         self.utime = utime
+        # Optional client sequence number, echoed in the status for latency measurement.
+        self.seq = seq
 
         velx, vely, velz, yaw_rate, pitch_rate = data
         vel_body = np.array([velx, vely, velz])
@@ -22,6 +27,8 @@ COMMAND_TIMEOUT = 1.0  # [s] Number of seconds to keep executing a command.
 # This prevents the vehicle from continuing to fly after WiFi loss
 
 
+@scheduled_layout()
+@profiled()
 class RemoteControl(Skill):
     """ Control the vehicle from an separate computer via WiFi or USB ethernet. """
 
@@ -43,6 +50,7 @@ class RemoteControl(Skill):
         status = {}
         status['speed'] = api.vehicle.get_speed()
         status['position'] = list(api.vehicle.get_position())
+        status['command_seq'] = self.command.seq if self.command else None
         api.custom_comms.publish_status(json.dumps(status))
 
         if not self.command:
@@ -69,4 +77,4 @@ class RemoteControl(Skill):
         # Assume json encoding.
         data = json.loads(message)
         if 'move' in data:
-            self.command = MotionCommand(api.utime, data['move'])
+            self.command = MotionCommand(api.utime, data['move'], data.get('seq'))
@@ -10,12 +10,18 @@ from shared.util.error_reporter import error_reporter as er
 from shared.util.time_manager import time_manager as tm
 from vehicle.skills.skills import Skill
 from vehicle.skills.util import scanning_patterns
-from vehicle.skills.util.ar import Prism
 from vehicle.skills.util.motions.motion import Motion
 from vehicle.skills.util.transform import Transform
 from vehicle.skills.util.ui import UiButton
 from vehicle.skills.util.ui import UiSlider
 
+from .ar_scene import SceneManager
+from .layout import scheduled_layout
+from .profiling import profiled
+
+# Size of the prism drawn in front of each waypoint.
+WAYPOINT_PRISM_SIZE = np.array([0.1, 1.0, 1.0])  # [m]
+
 
 class MissionStatus(enum.Enum):
     # System awaiting mission parameters.
@@ -37,6 +43,8 @@ class MissionStatus(enum.Enum):
     ERROR = 5
 
 
+@scheduled_layout()
+@profiled()
 class RoofInspection(Skill):
     """
     Capture a roof by flying around it.
@@ -111,6 +119,7 @@ class RoofInspection(Skill):
         self.paused = False
         self._auto_init_start_utime = None
         self.pending_request = None
+        self.ar_scene = SceneManager()
 
     def scan_abort(self, api):
         """
@@ -119,7 +128,7 @@ class RoofInspection(Skill):
         self.global_waypoints = []
         self.current_waypoint_index = None
         self.waypoint_start_utime = None
-        api.scene.clear_all_objects()
+        self.ar_scene.clear(api)
         self.status_code = MissionStatus.ABORTED
         self.paused = False
         self._auto_init_start_utime = None
@@ -368,7 +377,7 @@ class RoofInspection(Skill):
                 paused=self.paused,
                 status_code=self.status_code.name,
                 **self.status_message)
-            if self.current_waypoint_index >= 0:
+            if self.current_waypoint_index is not None and self.current_waypoint_index >= 0:
                 status['current_waypoint_index'] = self.current_waypoint_index
             api.custom_comms.publish_status(json.dumps(status))
 
@@ -376,10 +385,8 @@ class RoofInspection(Skill):
         """
         Populate the augmented scene with the latest waypoints.
         """
-        # Reset
-        api.scene.clear_all_objects()
-
-        # Add new prisms for each waypoint
+        # Add a prism for each waypoint, sending only the changes.
+        prisms = {}
         if self.global_waypoints:
 
             # Send up to 30 patches (waypoint nav trans) to the phone
@@ -397,8 +404,8 @@ class RoofInspection(Skill):
                 if waypoint is not None:
                     nav_T_center = Transform(waypoint.rotation(),
                                              waypoint * np.array([2.0, 0, 0]))
-                    p = Prism(nav_T_center, size=np.array([0.1, 1.0, 1.0]))
-                    api.scene.add_prism(p)
+                    prisms[waypoint_id] = (nav_T_center, WAYPOINT_PRISM_SIZE)
+        self.ar_scene.update(api, prisms)
 
     def create_mission(self, api, gps_polygon=None, nav_polygon=None,
                        home_point=(None, None),
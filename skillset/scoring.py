@@ -0,0 +1,170 @@
+"""
+Score the tracks a skill could follow, to pick the best one instead of one at random.
+
+Each candidate scores between 0 and 1 as a weighted sum of three terms, all vectorized:
+
+    distance   1 when at the reference point, 0 at max_distance or beyond
+    recency    0 right after it was last followed, 1 once memory seconds have passed
+    speed      0 when standing still, 1 at moving_speed or faster
+
+Speeds are measured from the positions of the same track ids in the last tick passed to
+observe(), which only keeps a reference to the arrays, so every track can be observed each tick
+while only the few candidates are scored. Positions older than MAX_SPEED_GAP, like those from
+before a period the skill did not observe, give no speed. Candidates whose distance, speed and
+recency are unchanged since the last call keep their last score.
+
+    scorer = CandidateScorer(max_distance=8.0, memory=120.0, moving_speed=1.0)
+    scorer.observe(snapshot.track_ids, snapshot.positions, api.utime)
+    ...
+    scores = scorer.score(track_ids, positions, vehicle_position, seconds_since, api.utime)
+    best = track_ids[np.argmax(scores)]
+"""
+from __future__ import absolute_import
+
+import numpy as np
+
+import shared.util.time_manager.time_manager as tm
+
+# Weights of the terms, which sum to 1.
+DISTANCE_WEIGHT = 0.4
+RECENCY_WEIGHT = 0.3
+SPEED_WEIGHT = 0.3
+# Changes in the inputs of a score smaller than these leave it unchanged.
+DISTANCE_TOLERANCE = 0.05  # [m]
+SPEED_TOLERANCE = 0.05  # [m/s]
+# Longest time between two positions of a track that a speed is measured over, two ticks at 8Hz.
+MAX_SPEED_GAP = 0.25  # [s]
+
+
+class _Positions(object):
+    """ The positions of the tracks of one tick, looked up by track id. """
+
+    def __init__(self, utime, track_ids, positions):
+        self.utime = utime
+        self.track_ids = track_ids
+        self.positions = positions
+        self._order = None
+        self._sorted_ids = None
+
+    def lookup(self, track_ids):
+        """ The position of each track id, and whether it was in this tick. """
+        if self._order is None:
+            # Sorted the first time a speed is measured from this tick, if ever.
+            self._order = np.argsort(self.track_ids, kind='mergesort')
+            self._sorted_ids = self.track_ids[self._order]
+        slots = np.minimum(np.searchsorted(self._sorted_ids, track_ids), len(self._order) - 1)
+        return self.positions[self._order[slots]], self._sorted_ids[slots] == track_ids
+
+
+class _Scored(object):
+    """ The inputs and scores of one call, sorted by track id. """
+
+    def __init__(self, utime, track_ids, distances, speeds, recencies, scores):
+        order = np.argsort(track_ids, kind='mergesort')
+        self.utime = utime
+        self.track_ids = track_ids[order]
+        self.distances = distances[order]
+        self.speeds = speeds[order]
+        self.recencies = recencies[order]
+        self.scores = scores[order]
+
+    def match(self, track_ids):
+        """ Index of each track id in this call, and whether it was in it. """
+        slots = np.minimum(np.searchsorted(self.track_ids, track_ids), len(self.track_ids) - 1)
+        return slots, self.track_ids[slots] == track_ids
+
+
+class CandidateScorer(object):
+    """
+    Scores candidate tracks, remembering the last ticks observed to measure speeds and the
+    last call to reuse scores.
+
+    Args:
+        max_distance (float): meters from the reference point at which the distance term is 0.
+        memory (float): seconds after being followed at which the recency term is 1.
+        moving_speed (float): meters per second at which the speed term is 1.
+    """
+
+    def __init__(self, max_distance, memory, moving_speed):
+        self.max_distance = max_distance
+        self.memory = memory
+        self.moving_speed = moving_speed
+        self._last = None
+        # The last two ticks observed, newest last.
+        self._observed = (None, None)
+        self.scored = 0
+        self.reused = 0
+
+    def observe(self, track_ids, positions, utime):
+        """ Remember the positions of the tracks of a tick, to measure speeds from. """
+        newest = self._observed[1]
+        if newest is not None and newest.utime == utime:
+            newest = self._observed[0]
+        self._observed = (newest, _Positions(utime, np.asarray(track_ids),
+                                             np.asarray(positions, dtype=float).reshape(-1, 3)))
+
+    def _speeds(self, track_ids, positions, utime):
+        """ The speed of each candidate, 0 if it was not in a recent enough earlier tick. """
+        speeds = np.zeros(len(track_ids))
+        earlier = [observed for observed in self._observed
+                   if observed is not None and observed.utime < utime]
+        if not earlier:
+            return speeds
+        before = earlier[-1]
+        seconds = tm.utime_to_seconds(utime - before.utime)
+        if seconds > MAX_SPEED_GAP or not len(before.track_ids):
+            return speeds
+        last_positions, seen = before.lookup(track_ids)
+        moved = np.linalg.norm(positions - last_positions, axis=1)
+        return np.where(seen, moved / seconds, 0.0)
+
+    def score(self, track_ids, positions, reference_position, seconds_since, utime):
+        """
+        The score of each candidate, higher is better.
+
+        Args:
+            track_ids (np.ndarray): ids of the candidates.
+            positions (np.ndarray): nav frame position of each candidate, one per row.
+            reference_position (np.ndarray): the point distances are measured from.
+            seconds_since (np.ndarray): seconds since each candidate was last followed, inf if
+                never or too long ago to remember.
+            utime (int): the time of the positions.
+        """
+        track_ids = np.asarray(track_ids)
+        positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+        distances = np.linalg.norm(positions - np.asarray(reference_position, dtype=float),
+                                   axis=1)
+        recencies = np.minimum(np.asarray(seconds_since, dtype=float) / self.memory, 1.0)
+
+        speeds = self._speeds(track_ids, positions, utime)
+        unchanged = np.zeros(len(track_ids), dtype=bool)
+        last = self._last
+        if last is not None and len(last.track_ids):
+            slots, seen = last.match(track_ids)
+            unchanged = seen & \
+                (np.abs(distances - last.distances[slots]) < DISTANCE_TOLERANCE) & \
+                (np.abs(speeds - last.speeds[slots]) < SPEED_TOLERANCE) & \
+                (recencies == last.recencies[slots])
+
+        scores = np.empty(len(track_ids))
+        if np.any(unchanged):
+            scores[unchanged] = last.scores[slots[unchanged]]
+        changed = ~unchanged
+        scores[changed] = \
+            DISTANCE_WEIGHT * np.clip(1.0 - distances[changed] / self.max_distance, 0.0, 1.0) + \
+            RECENCY_WEIGHT * recencies[changed] + \
+            SPEED_WEIGHT * np.minimum(speeds[changed] / self.moving_speed, 1.0)
+
+        reused = int(np.count_nonzero(unchanged))
+        self.reused += reused
+        self.scored += len(track_ids) - reused
+        if reused:
+            # Compare against the inputs the kept scores were computed from, so that small
+            # changes do not add up unnoticed.
+            distances[unchanged] = last.distances[slots[unchanged]]
+            speeds[unchanged] = last.speeds[slots[unchanged]]
+        self._last = _Scored(utime, track_ids, distances, speeds, recencies, scores)
+        return scores
+
+    def stats(self):
+        return dict(scored=self.scored, reused=self.reused)
@@ -14,19 +14,21 @@ from vehicle.skills.skills import Skill
 from vehicle.skills.util.ui import UiButton
 from vehicle.skills.util.ui import UiSlider
 
+from .layout import scheduled_layout
+from .profiling import profiled
+from .tracks import TrackSnapshot
+from .tracks import TrackSnapshotCache
 
-def get_closest_person(subject_api, reference_position, min_radius=1e6):
-    closest = None
-    for track in subject_api.get_all_tracks():
-        if track.classification != 'PERSON':
-            continue
-        delta = np.linalg.norm(reference_position - track.position)
-        if delta < min_radius:
-            min_radius = delta
-            closest = track
-    return closest
 
+def get_closest_person(subject_api, reference_position, min_radius=1e6, snapshot=None):
+    if snapshot is None:
+        snapshot = TrackSnapshot.from_tracks(subject_api.get_all_tracks())
+    index = snapshot.nearest(reference_position, mask=snapshot.is_person, max_distance=min_radius)
+    return None if index is None else snapshot.tracks[index]
 
+
+@scheduled_layout()
+@profiled()
 class SecurityBot(Skill):
     """
     Visually scan the area, counting people.
@@ -71,6 +73,8 @@ class SecurityBot(Skill):
         self.running = True
         self.following = False
         self.status_downsampler = DownSampler(1.0)
+        # The tracks of the current tick, shared by update and get_onscreen_controls.
+        self.track_cache = TrackSnapshotCache()
 
     def button_pressed(self, api, button_id):
         """ Called by the sdk whenever the user presses a button """
@@ -89,8 +93,12 @@ class SecurityBot(Skill):
 
         if self.running:
             # Show a title based on detected objects
-            num_detections = len(api.subject.get_all_tracks())
-            closest_object = get_closest_person(api.subject, self.home_point)
+            snapshot = self.track_cache.get(api)
+            num_detections = len(snapshot)
+            closest_object = None
+            if self.home_point is not None:
+                closest_object = get_closest_person(api.subject, self.home_point,
+                                                    snapshot=snapshot)
             if closest_object:
                 distance = np.linalg.norm(closest_object.position - self.home_point)
             else:
@@ -146,7 +154,8 @@ class SecurityBot(Skill):
 
         # Find the closest track
         search_radius = self.get_value_for_user_setting('search_radius')
-        closest_object = get_closest_person(api.subject, self.home_point, min_radius=search_radius)
+        closest_object = get_closest_person(api.subject, self.home_point, min_radius=search_radius,
+                                            snapshot=self.track_cache.get(api))
 
         # Move to track, if any are close enough
         if closest_object is not None:
@@ -0,0 +1,97 @@
+"""
+Find the skills of the skillset in manifest.json, and import each one only when it is used.
+
+Only one skill runs at a time, so importing every skill module, and everything they import,
+whenever the skills process starts is wasted work. The registry answers what the app shows about
+each skill from the manifest alone, imports a skill's module the first time its class is asked
+for, and keeps the class for next time:
+
+    registry = SkillRegistry('skillset', skillset_dir)
+    registry.metadata('party_mode.PartyMode')['display_name']  # 'Party Mode', nothing imported
+    PartyMode = registry.get('party_mode.PartyMode')          # imports party_mode
+    registry.prewarm('polygon_path.PolygonPath')               # imports in a background thread
+"""
+from __future__ import absolute_import
+
+import importlib
+import json
+import os
+import threading
+
+MANIFEST = 'manifest.json'
+
+
+class SkillRegistry(object):
+    """
+    The skills of a skillset package, by their manifest name like 'party_mode.PartyMode'.
+
+    Args:
+        package (str): the name the skillset package is imported as.
+        skillset_dir (str): the directory of the package, holding manifest.json.
+    """
+
+    def __init__(self, package, skillset_dir):
+        self.package = package
+        with open(os.path.join(skillset_dir, MANIFEST), 'r') as manifest_file:
+            self.manifest = json.load(manifest_file)
+        self._classes = {}
+        self._lock = threading.Lock()
+
+    def names(self):
+        """ Manifest names of every skill, sorted. """
+        return sorted(self.manifest)
+
+    def class_names(self):
+        """ {class name: manifest name} of every skill, like {'Lead': 'follow_modes.Lead'}. """
+        return {name.rsplit('.', 1)[1]: name for name in self.manifest}
+
+    def metadata(self, name):
+        """
+        What the app shows about a skill, from the manifest, with the class name as the display
+        name if the manifest has none.
+        """
+        metadata = dict(display_name=name.rsplit('.', 1)[1], short_name='', hint='',
+                        explanation='')
+        metadata.update(self.manifest[name])
+        return metadata
+
+    def is_loaded(self, name):
+        return name in self._classes
+
+    def get(self, name):
+        """ The class of a skill, importing its module the first time. """
+        skill_class = self._classes.get(name)
+        if skill_class is not None:
+            return skill_class
+        if name not in self.manifest:
+            raise KeyError('No skill {} in {}'.format(name, MANIFEST))
+        module_name, class_name = name.rsplit('.', 1)
+        with self._lock:
+            if name not in self._classes:
+                module = importlib.import_module('{}.{}'.format(self.package, module_name))
+                self._classes[name] = getattr(module, class_name)
+        return self._classes[name]
+
+    def load_all(self):
+        """ Import every skill, returning {class name: class}. """
+        return {class_name: self.get(name) for class_name, name in self.class_names().items()}
+
+    def prewarm(self, name, background=True):
+        """
+        Import a skill ahead of its selection, such as the skill selected at startup. In the
+        background, import errors are left for get() to raise when the skill is selected.
+        """
+        if not background:
+            self.get(name)
+            return None
+
+        def load():
+            try:
+                self.get(name)
+            except Exception:  # pylint: disable=broad-except
+                pass
+
+        thread = threading.Thread(target=load, name='prewarm {}'.format(name))
+        thread.daemon = True
+        thread.start()
+        return thread
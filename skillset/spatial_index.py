@@ -0,0 +1,162 @@
+"""
+A uniform grid over track positions, for radius and k-nearest queries around several points.
+
+Crowd skills ask where people are relative to more than one point each tick, like the vehicle,
+the anchor and the home point. GridIndex buckets the positions into square cells in the ground
+plane, so a query only measures the positions in the cells its radius overlaps:
+
+    index = GridIndex()
+    index.update(snapshot.positions)
+    near_vehicle, near_home = index.within([vehicle_position, home_point], [8.0, 100.0])
+    closest, = index.nearest([home_point], k=1)
+
+Queries return indices into the positions of the last update. The grid is sorted on the first
+query that uses it after an update, and positions that mostly stayed in their cells re-sort an
+almost sorted order, which is close to linear. With fewer than MIN_GRID_SIZE positions the
+queries just measure them all, which is faster than looking up cells.
+"""
+from __future__ import absolute_import
+
+import numpy as np
+
+# Side of a grid cell, about the distance of the shortest queries the skills make.
+CELL_SIZE = 8.0  # [m]
+# Fewest positions the grid is used for.
+MIN_GRID_SIZE = 2000
+# Cell keys are x_cell * _STRIDE + y_cell, so the cells of one column have consecutive keys.
+_STRIDE = 1 << 32
+
+_NO_INDICES = np.zeros(0, dtype=np.intp)
+
+
+class GridIndex(object):
+    """
+    Positions bucketed into a grid of square cells in the x-y plane.
+
+    Args:
+        cell_size (float): side of a cell in meters.
+        min_grid_size (int): fewest positions to use the grid for.
+    """
+
+    def __init__(self, cell_size=CELL_SIZE, min_grid_size=MIN_GRID_SIZE):
+        self.cell_size = float(cell_size)
+        self.min_grid_size = min_grid_size
+        self.positions = np.zeros((0, 3))
+        # The cell key of each position, and the positions sorted by key, as of the last sort.
+        self._keys = np.zeros(0, dtype=np.int64)
+        self._order = _NO_INDICES
+        self._sorted_keys = self._keys
+        self._sorted = True
+        self.updates = 0
+        self.sorts = 0
+
+    def __len__(self):
+        return len(self.positions)
+
+    def _cells(self, xy):
+        return np.floor(np.asarray(xy) / self.cell_size).astype(np.int64)
+
+    def update(self, positions):
+        """ Index new positions. """
+        self.positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+        self._sorted = False
+        self.updates += 1
+
+    def _sort(self):
+        """ Sort the positions by cell, reusing the last order if the count has not changed. """
+        self._sorted = True
+        cells = self._cells(self.positions[:, :2])
+        keys = cells[:, 0] * _STRIDE + cells[:, 1]
+        if len(keys) == len(self._keys):
+            if np.array_equal(keys, self._keys):
+                return
+            # A stable sort of an almost sorted order is close to linear.
+            self._order = self._order[np.argsort(keys[self._order], kind='mergesort')]
+        else:
+            self._order = np.argsort(keys, kind='mergesort')
+        self._keys = keys
+        self._sorted_keys = keys[self._order]
+        self.sorts += 1
+
+    def _candidates(self, point, radius):
+        """
+        Sorted indices of the positions in the cells a circle overlaps, or None when measuring
+        every position is quicker.
+        """
+        count = len(self.positions)
+        if count < self.min_grid_size or not np.isfinite(radius):
+            return None
+        low = self._cells(point[:2] - radius)
+        high = self._cells(point[:2] + radius)
+        # Measuring every position is cheaper than looking up more cells than there are.
+        if (high[0] - low[0] + 1) * (high[1] - low[1] + 1) >= count:
+            return None
+        if not self._sorted:
+            self._sort()
+        columns = np.arange(low[0], high[0] + 1, dtype=np.int64)
+        starts = np.searchsorted(self._sorted_keys, columns * _STRIDE + low[1], 'left')
+        ends = np.searchsorted(self._sorted_keys, columns * _STRIDE + high[1], 'right')
+        slices = [self._order[start:end] for start, end in zip(starts, ends) if end > start]
+        if not slices:
+            return _NO_INDICES
+        return np.sort(np.concatenate(slices))
+
+    def _measure(self, point, radius, limit, mask):
+        """
+        The positions in mask closer than limit to a point, as sorted indices and distances,
+        looking only in the cells within radius of it. Also whether every position was looked
+        at.
+        """
+        candidates = self._candidates(point, radius)
+        if candidates is None:
+            # Measure everything without gathering copies of the positions.
+            distances = np.linalg.norm(self.positions - point, axis=1)
+            inside = distances < limit
+            if mask is not None:
+                inside &= mask
+            candidates = np.flatnonzero(inside)
+            return candidates, distances[candidates], True
+        if mask is not None:
+            candidates = candidates[mask[candidates]]
+        distances = np.linalg.norm(self.positions[candidates] - point, axis=1)
+        inside = distances < limit
+        return candidates[inside], distances[inside], False
+
+    @staticmethod
+    def _points(points):
+        return np.asarray(points, dtype=float).reshape(-1, 3)
+
+    def within(self, points, radii, mask=None):
+        """
+        For each point, the sorted indices of the positions closer than its radius.
+
+        Args:
+            points (np.ndarray): reference points, one per row.
+            radii (float or list): one radius for every point, or one per point.
+            mask (np.ndarray): if given, only positions where mask is true are returned.
+        """
+        points = self._points(points)
+        radii = np.broadcast_to(np.asarray(radii, dtype=float), (len(points),))
+        return [self._measure(point, radius, radius, mask)[0]
+                for point, radius in zip(points, radii)]
+
+    def nearest(self, points, k=1, max_distance=np.inf, mask=None):
+        """
+        For each point, the indices of up to k positions closer than max_distance, closest
+        first. Ties go to the lower index.
+        """
+        results = []
+        for point in self._points(points):
+            # Widen the search until k positions are closer than its radius. Those are then
+            # closer than any position outside the cells looked at, so the k closest measured
+            # are the k closest of all.
+            radius = min(self.cell_size, max_distance)
+            while True:
+                candidates, distances, complete = self._measure(point, radius, max_distance,
+                                                                mask)
+                if complete or radius >= max_distance or \
+                        np.count_nonzero(distances < radius) >= k:
+                    break
+                radius = min(2.0 * radius, max_distance)
+            results.append(candidates[np.argsort(distances, kind='mergesort')[:k]])
+        return results
@@ -0,0 +1,129 @@
+"""
+The subject tracks of one tick packed into arrays, for vectorized queries over crowds.
+
+Looping over the tracks in python with a norm per track is slow once there are hundreds of
+them. A TrackSnapshot reads the tracks once and answers distance filters and nearest person
+queries with numpy:
+
+    snapshot = TrackSnapshot.from_tracks(api.subject.get_all_tracks(), api.utime)
+    index = snapshot.nearest(home_point, mask=snapshot.is_person)
+    closest = snapshot.tracks[index] if index is not None else None
+
+Skills that look at the tracks from more than one callback in a tick share one snapshot
+through a TrackSnapshotCache. A snapshot indexed with a GridIndex, see spatial_index.py,
+answers nearest() from the grid.
+"""
+from __future__ import absolute_import
+
+import numpy as np
+
+from .spatial_index import GridIndex
+
+PERSON = 'PERSON'
+
+
+def _classification_name(classification):
+    """ The name of a classification, which is a string or an lcm enum. """
+    return getattr(classification, 'name', classification)
+
+
+class TrackSnapshot(object):
+    """
+    Positions, person and lock flags and ids of the tracks of one tick, as arrays indexed like
+    `tracks`.
+
+    Args:
+        tracks (list): the track objects.
+        positions (list): the nav frame position of each track.
+        utime (int): the time the tracks are from.
+    """
+
+    def __init__(self, tracks, positions, utime=None):
+        self.tracks = list(tracks)
+        self.utime = utime
+        self.index = None
+        self.positions = np.array(positions, dtype=float).reshape(-1, 3)
+        self.track_ids = np.array([track.track_id for track in self.tracks])
+        count = len(self.tracks)
+        self.is_person = np.fromiter(
+            (_classification_name(track.classification) == PERSON for track in self.tracks),
+            dtype=bool, count=count)
+        self.is_locked = np.fromiter(
+            (bool(getattr(track, 'is_locked', False)) for track in self.tracks),
+            dtype=bool, count=count)
+
+    @classmethod
+    def from_tracks(cls, tracks, utime=None):
+        """ Snapshot the tracks of api.subject.get_all_tracks(). """
+        tracks = list(tracks)
+        return cls(tracks, [track.position for track in tracks], utime)
+
+    @classmethod
+    def from_tracker_state(cls, tracker_state, utime=None):
+        """ Snapshot the track messages of a motion state's tracker_state. """
+        tracks = list(tracker_state.tracks)
+        positions = []
+        for track in tracks:
+            position = track.nav_frame.trans.position
+            positions.append((position.x, position.y, position.z))
+        return cls(tracks, positions, utime)
+
+    def __len__(self):
+        return len(self.tracks)
+
+    def indexed(self, index):
+        """ Update a GridIndex kept across ticks with these tracks, and query through it. """
+        index.update(self.positions)
+        self.index = index
+        return self
+
+    def distances(self, reference_position):
+        """ The distance of every track from a point. """
+        return np.linalg.norm(self.positions - np.asarray(reference_position, dtype=float),
+                              axis=1)
+
+    def within(self, reference_position, radius):
+        """ Mask of the tracks closer than radius to a point. """
+        return self.distances(reference_position) < radius
+
+    def nearest(self, reference_position, mask=None, max_distance=np.inf):
+        """
+        Index of the track closest to a point, among the tracks in mask if given and closer
+        than max_distance. None if there is no such track.
+        """
+        if not self.tracks:
+            return None
+        if self.index is not None:
+            nearest, = self.index.nearest(reference_position, max_distance=max_distance,
+                                          mask=mask)
+            return int(nearest[0]) if len(nearest) else None
+        distances = self.distances(reference_position)
+        if mask is not None:
+            distances = np.where(mask, distances, np.inf)
+        index = int(np.argmin(distances))
+        if not distances[index] < max_distance:
+            return None
+        return index
+
+
+class TrackSnapshotCache(object):
+    """
+    The snapshot of the current tick, taken the first time it is asked for in the tick, and
+    indexed in a GridIndex kept across ticks.
+    """
+
+    def __init__(self):
+        self.index = GridIndex()
+        self.snapshot = None
+        self.snapshots = 0
+        self.hits = 0
+
+    def get(self, api):
+        """ The snapshot of api.subject.get_all_tracks() at api.utime. """
+        if self.snapshot is not None and self.snapshot.utime == api.utime:
+            self.hits += 1
+            return self.snapshot
+        self.snapshot = TrackSnapshot.from_tracks(api.subject.get_all_tracks(),
+                                                  api.utime).indexed(self.index)
+        self.snapshots += 1
+        return self.snapshot